@@ -0,0 +1,20 @@
+"""话题评论按时间分页的 (topic_id, created_at) 复合索引
+
+Revision ID: 2d8f5b3c7e10
+Revises: 9c4e7a1b2f63
+Create Date: 2026-10-18
+"""
+from app.db.migration import create_indexes, drop_indexes
+
+revision = "2d8f5b3c7e10"
+down_revision = "9c4e7a1b2f63"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_indexes("comments", {"idx_comments_topic_created_at": ["topic_id", "created_at"]})
+
+
+def downgrade():
+    drop_indexes("comments", ["idx_comments_topic_created_at"])
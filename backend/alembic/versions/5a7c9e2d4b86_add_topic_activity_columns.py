@@ -0,0 +1,44 @@
+"""话题活跃度冗余列（评论数、最后活跃时间、热度分）及各排序方式的索引
+
+新增列后按实际数据重算已有话题（同 python -m app.manage recompute-topic-activity）。
+
+Revision ID: 5a7c9e2d4b86
+Revises: 2d8f5b3c7e10
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.orm import Session
+
+from app.db.migration import add_columns, create_indexes, drop_columns, drop_indexes
+
+revision = "5a7c9e2d4b86"
+down_revision = "2d8f5b3c7e10"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_topics_last_activity_at": ["last_activity_at", "id"],
+    "idx_topics_hot_score": ["hot_score", "id"],
+    "idx_topics_comment_count": ["comment_count", "id"],
+}
+
+
+def upgrade():
+    added = add_columns(
+        "topics",
+        sa.Column("comment_count", sa.Integer, server_default="0"),
+        sa.Column("last_activity_at", sa.DateTime, nullable=True),
+        sa.Column("hot_score", sa.Float, server_default="0"),
+    )
+    create_indexes("topics", INDEXES)
+    if added:
+        from app.services import topic_activity
+
+        with Session(bind=op.get_bind()) as db:
+            topic_activity.recompute(db)
+
+
+def downgrade():
+    drop_indexes("topics", list(INDEXES))
+    drop_columns("topics", ["comment_count", "last_activity_at", "hot_score"])
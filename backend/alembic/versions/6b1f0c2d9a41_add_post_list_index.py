@@ -0,0 +1,20 @@
+"""公开文章列表的 (published, created_at) 复合索引
+
+Revision ID: 6b1f0c2d9a41
+Revises:
+Create Date: 2026-10-18
+"""
+from app.db.migration import create_indexes, drop_indexes
+
+revision = "6b1f0c2d9a41"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_indexes("posts", {"idx_posts_published_created_at": ["published", "created_at"]})
+
+
+def downgrade():
+    drop_indexes("posts", ["idx_posts_published_created_at"])
@@ -0,0 +1,46 @@
+"""楼中楼评论的物化路径列及子树、按楼分页的索引
+
+新增列后为已有评论补全层级字段（同 python -m app.manage backfill-comment-paths，旧评论均作为顶层评论）。
+
+Revision ID: 8e3b6d1f0a27
+Revises: 5a7c9e2d4b86
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.orm import Session
+
+from app.db.migration import add_columns, create_indexes, create_missing_tables, drop_columns, drop_indexes
+
+revision = "8e3b6d1f0a27"
+down_revision = "5a7c9e2d4b86"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_comments_topic_depth_created_at": ["topic_id", "depth", "created_at"],
+    "idx_comments_path": ["path"],
+    "idx_comments_thread_path": ["thread_id", "path"],
+}
+
+
+def upgrade():
+    added = add_columns(
+        "comments",
+        sa.Column("parent_id", sa.Integer, sa.ForeignKey("comments.id"), nullable=True),
+        sa.Column("thread_id", sa.Integer, nullable=True),
+        sa.Column("depth", sa.Integer, server_default="0"),
+        sa.Column("path", sa.String(255), nullable=True),
+    )
+    if added:
+        from app.services import comment_threads
+
+        create_missing_tables()
+        with Session(bind=op.get_bind()) as db:
+            comment_threads.backfill_paths(db)
+    create_indexes("comments", INDEXES)
+
+
+def downgrade():
+    drop_indexes("comments", list(INDEXES))
+    drop_columns("comments", ["parent_id", "thread_id", "depth", "path"])
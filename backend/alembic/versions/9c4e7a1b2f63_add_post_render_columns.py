@@ -0,0 +1,35 @@
+"""文章预渲染结果的列
+
+已有文章的这些列为空，详情接口在内存中渲染（不写库）；升级后执行
+python -m app.manage render-posts 回填。
+
+Revision ID: 9c4e7a1b2f63
+Revises: 6b1f0c2d9a41
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+
+from app.db.migration import add_columns, drop_columns
+
+revision = "9c4e7a1b2f63"
+down_revision = "6b1f0c2d9a41"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("content_html", "content_hash", "toc", "word_count", "reading_time", "auto_excerpt")
+
+
+def upgrade():
+    add_columns(
+        "posts",
+        sa.Column("content_html", sa.Text, nullable=True),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("toc", sa.JSON, nullable=True),
+        sa.Column("word_count", sa.Integer, server_default="0"),
+        sa.Column("reading_time", sa.Integer, server_default="1"),
+        sa.Column("auto_excerpt", sa.Text, nullable=True),
+    )
+
+
+def downgrade():
+    drop_columns("posts", list(COLUMNS))
@@ -0,0 +1,28 @@
+"""询价表单提交的幂等键列及唯一索引
+
+未执行此迁移时后台写入询价会因缺少列失败（逐条退避重试，留在本机队列中）。
+
+Revision ID: c7a1d4e9b352
+Revises: 8e3b6d1f0a27
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+
+from app.db.migration import add_columns, create_indexes, drop_columns, drop_indexes
+
+revision = "c7a1d4e9b352"
+down_revision = "8e3b6d1f0a27"
+branch_labels = None
+depends_on = None
+
+INDEXES = {"idx_inquiries_intake_key": ["intake_key"]}
+
+
+def upgrade():
+    add_columns("inquiries", sa.Column("intake_key", sa.String(80), nullable=True))
+    create_indexes("inquiries", INDEXES, unique=True)
+
+
+def downgrade():
+    drop_indexes("inquiries", list(INDEXES))
+    drop_columns("inquiries", ["intake_key"])
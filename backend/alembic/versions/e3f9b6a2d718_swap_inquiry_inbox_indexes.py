@@ -0,0 +1,33 @@
+"""管理端收件箱的 (status, created_at)、(service_id, created_at) 复合索引，替换单列索引
+
+复合索引的前缀即可用于按状态、按服务筛选，原单列索引不再需要。
+
+Revision ID: e3f9b6a2d718
+Revises: c7a1d4e9b352
+Create Date: 2026-10-18
+"""
+from app.db.migration import create_indexes, drop_indexes
+
+revision = "e3f9b6a2d718"
+down_revision = "c7a1d4e9b352"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_inquiries_status_created_at": ["status", "created_at"],
+    "idx_inquiries_service_created_at": ["service_id", "created_at"],
+}
+REPLACED = {
+    "idx_inquiries_status": ["status"],
+    "idx_inquiries_service_id": ["service_id"],
+}
+
+
+def upgrade():
+    create_indexes("inquiries", INDEXES)
+    drop_indexes("inquiries", list(REPLACED))
+
+
+def downgrade():
+    create_indexes("inquiries", REPLACED)
+    drop_indexes("inquiries", list(INDEXES))
@@ -1,20 +1,41 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.orm import Session, joinedload, load_only
 from sqlalchemy import or_
 
 from app.db.session import get_db
 from app.models.models import Post, User
-from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse
+from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostDetailResponse, PostListResponse, PostSummary
 from app.core.security import get_current_user
 from app.api.deps import get_admin_user
 from app.core.limiter import limiter
+from app.lib.http_cache import conditional_response, make_etag
+from app.lib.pagination import decode_cursor, encode_cursor, seek_after
+from app.services import counters, image_variants, markdown_render, post_search
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/blog", tags=["博客"])
 
 
+# 摘要视图只读取这些列，正文等大字段不从数据库取出
+SUMMARY_COLUMNS = (
+    Post.id, Post.title, Post.slug, Post.excerpt, Post.auto_excerpt,
+    Post.cover_image, Post.created_at, Post.updated_at,
+)
+
+
+def _summaries(posts: list[Post]) -> list[PostSummary]:
+    """转换为摘要视图，未填写摘要时使用写入时生成的自动摘要"""
+    return [image_variants.to_response(PostSummary, post, excerpt=post.excerpt or post.auto_excerpt) for post in posts]
+
+
+def _responses(posts: list[Post]) -> list[PostResponse]:
+    return [image_variants.to_response(PostResponse, post) for post in posts]
+
+
 # ============ 公开端点（无需登录） ============
 
 @router.get("/posts", response_model=PostListResponse)
@@ -24,12 +45,33 @@ def get_posts(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     search: str = None,
+    cursor: str | None = Query(None, description="上一页返回的 next_cursor，传入后忽略 page；不能与 search 同时使用"),
+    view: Literal["full", "summary"] = Query("full", description="summary 时只返回标题、摘要等字段，不含正文"),
     db: Session = Depends(get_db)
 ):
     """获取已发布的文章列表（公开）"""
-    query = db.query(Post).filter(Post.published == True).options(joinedload(Post.author))
+    if search and cursor:
+        # 搜索结果按相关度排序，没有时间游标，用 page 翻页
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="搜索结果请使用 page 翻页")
+    summary = view == "summary"
+    query = db.query(Post).filter(Post.published == True)
+    if summary:
+        # 搜索时需要正文生成命中片段
+        query = query.options(load_only(*SUMMARY_COLUMNS, *((Post.content,) if search else ())))
+    else:
+        query = query.options(joinedload(Post.author))
 
     if search:
+        # 优先使用全文索引，按相关度排序并返回命中片段
+        hits = post_search.search_posts(db, search, offset=(page - 1) * limit, limit=limit)
+        if hits is not None:
+            ids, total = hits
+            by_id = {post.id: post for post in query.filter(Post.id.in_(ids)).all()} if ids else {}
+            posts = [by_id[post_id] for post_id in ids if post_id in by_id]
+            highlights = {post.slug: post_search.make_snippet(post.content, search) for post in posts}
+            posts = _summaries(posts) if summary else _responses(posts)
+            return {"posts": posts, "total": total, "page": page, "limit": limit, "highlights": highlights}
+
         query = query.filter(
             or_(
                 Post.title.contains(search),
@@ -37,28 +79,51 @@ def get_posts(
             )
         )
 
-    total = query.count()
-    posts = query.order_by(Post.created_at.desc()) \
-        .offset((page - 1) * limit) \
-        .limit(limit) \
-        .all()
-
-    return {"posts": posts, "total": total, "page": page, "limit": limit}
-
-
-@router.get("/posts/{slug}", response_model=PostResponse)
+    # 无搜索条件时使用维护的计数，避免每次 COUNT(*)
+    total = query.count() if search else counters.get(db, counters.PUBLISHED_POSTS)
+    query = query.order_by(Post.created_at.desc(), Post.id.desc())
+    if cursor:
+        # 游标模式：直接在 created_at 索引上定位，深翻页不再跳过前面的行
+        try:
+            created_at, last_id = decode_cursor(cursor, datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的游标")
+        query = query.filter(seek_after(Post.created_at, Post.id, created_at, last_id))
+    else:
+        query = query.offset((page - 1) * limit)
+    # 多取一条判断是否还有下一页
+    posts = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+    posts = _summaries(posts) if summary else _responses(posts)
+    return {"posts": posts, "total": total, "page": page, "limit": limit, "next_cursor": next_cursor}
+
+
+@router.get("/posts/{slug}", response_model=PostDetailResponse)
 @limiter.limit("120/minute")  # 限制每分钟120次请求
-def get_post(request: Request, slug: str, db: Session = Depends(get_db)):
-    """获取文章详情（公开，仅已发布的文章）"""
+def get_post(request: Request, response: Response, slug: str, db: Session = Depends(get_db)):
+    """获取文章详情（公开，仅已发布的文章），返回写入时预渲染的 HTML"""
     post = db.query(Post).filter(Post.slug == slug, Post.published == True).options(joinedload(Post.author)).first()
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
-    return post
+    # 渲染器版本变化时 HTML 也会变化，一并计入 ETag；封面图派生版本生成完成后响应也会变化
+    variants = image_variants.variants_for(post.cover_image)
+    etag = make_etag(post.id, post.updated_at, markdown_render.RENDERER_VERSION, variants is not None)
+    not_modified = conditional_response(request, response, etag, post.updated_at)
+    if not_modified:
+        return not_modified
+    if post.content_html is None:
+        # 尚未回填的旧文章：本次在内存中渲染，不写库（由 render-posts 命令回填）
+        rendered = markdown_render.render_markdown(post.content)
+        return {**PostResponse.model_validate(post).model_dump(), **rendered, "cover_image_variants": variants}
+    return image_variants.to_response(PostDetailResponse, post, cover_image_variants=variants)
 
 
 # ============ 管理端点（需要管理员权限） ============
 
-@router.post("/posts", response_model=PostResponse)
+@router.post("/posts", response_model=PostDetailResponse)
 def create_post(
     post_data: PostCreate,
     current_user: User = Depends(get_admin_user),  # 仅管理员可创建
@@ -66,17 +131,22 @@ def create_post(
 ):
     try:
         post = Post(**post_data.model_dump(), author_id=current_user.id)
+        markdown_render.render_post(post)
         db.add(post)
+        db.flush()
+        post_search.index_post(db, post)
+        if post.published:
+            counters.increment(db, counters.PUBLISHED_POSTS)
         db.commit()
         db.refresh(post)
-        return post
+        return image_variants.to_response(PostDetailResponse, post)
     except Exception as e:
         db.rollback()
         logger.exception("Failed to create post")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="创建失败，请稍后重试")
 
 
-@router.put("/posts/{slug}", response_model=PostResponse)
+@router.put("/posts/{slug}", response_model=PostDetailResponse)
 def update_post(
     slug: str,
     post_data: PostUpdate,
@@ -88,12 +158,20 @@ def update_post(
         if not post:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
 
-        for key, value in post_data.model_dump(exclude_unset=True).items():
+        was_published = post.published
+        updates = post_data.model_dump(exclude_unset=True)
+        for key, value in updates.items():
             setattr(post, key, value)
+        markdown_render.render_post(post)
+
+        if post.published != was_published:
+            counters.increment(db, counters.PUBLISHED_POSTS, 1 if post.published else -1)
 
+        if updates.keys() & {"title", "content", "published"}:
+            post_search.index_post(db, post)
         db.commit()
         db.refresh(post)
-        return post
+        return image_variants.to_response(PostDetailResponse, post)
     except HTTPException:
         raise
     except Exception as e:
@@ -113,6 +191,9 @@ def delete_post(
         if not post:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在")
 
+        post_search.remove_post(db, post.id)
+        if post.published:
+            counters.increment(db, counters.PUBLISHED_POSTS, -1)
         db.delete(post)
         db.commit()
         return {"message": "删除成功"}
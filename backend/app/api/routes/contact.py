@@ -1,12 +1,10 @@
 import logging
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, Header, HTTPException, Request, status
 from pydantic import BaseModel, EmailStr, Field
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
-from app.core.config import settings
 from app.core.limiter import limiter
+from app.schemas.intake import IntakeAccepted
+from app.services import intake
 
 logger = logging.getLogger(__name__)
 
@@ -20,35 +18,21 @@ class ContactForm(BaseModel):
     message: str = Field(..., min_length=10, max_length=5000, description="消息内容")
 
 
-@router.post("")
+@router.post("", response_model=IntakeAccepted, status_code=status.HTTP_202_ACCEPTED)
 @limiter.limit("3/minute")  # 限制每分钟3次联系表单提交
-def send_contact_email(form: ContactForm, request: Request):
-    """发送联系表单邮件"""
+def send_contact_email(
+    form: ContactForm,
+    request: Request,
+    idempotency_key: str | None = Header(
+        None, alias="Idempotency-Key", max_length=64, pattern=r"^[A-Za-z0-9_-]+$",
+        description="客户端生成的幂等键，重试时携带同一个值",
+    ),
+):
+    """提交联系表单：写入本地队列后立即返回，后台写入询价列表并发送通知邮件"""
     try:
-        msg = MIMEMultipart()
-        msg["From"] = settings.FROM_EMAIL
-        msg["To"] = settings.FROM_EMAIL
-        msg["Subject"] = f"来自 {form.name} 的联系 - {form.subject}"
-
-        body = f"""
-        姓名: {form.name}
-        邮箱: {form.email}
-        主题: {form.subject}
-
-        消息内容:
-        {form.message}
-        """
-        msg.attach(MIMEText(body, "plain", "utf-8"))
-
-        if settings.SMTP_HOST:
-            server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-            server.quit()
-
-        logger.info(f"Contact email sent from {form.email}")
-        return {"message": "邮件发送成功"}
+        key = intake.submit("contact", form.model_dump(), idempotency_key)
+        logger.info(f"Contact form queued from {form.email}")
+        return {"key": key, "message": "消息已收到，我们会尽快回复"}
     except Exception as e:
-        logger.exception("Failed to send contact email")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="邮件发送失败，请稍后重试")
+        logger.exception("Failed to queue contact form")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="提交失败，请稍后重试")
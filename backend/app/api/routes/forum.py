@@ -1,32 +1,71 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
 
 from app.db.session import get_db
 from app.models.models import Topic, Comment, User
-from app.schemas.topic import TopicCreate, TopicUpdate, TopicResponse, TopicListResponse, CommentCreate, CommentResponse
+from app.schemas.topic import (
+    TopicCreate, TopicUpdate, TopicResponse, TopicListResponse,
+    CommentCreate, CommentResponse, CommentThreadResponse,
+    BulkDeleteRequest, BulkDeleteResponse,
+)
 from app.core.security import get_current_user
 from app.api.deps import get_admin_user
+from app.lib.listing import ListFormat, keyset_list
+from app.lib.pagination import decode_cursor, encode_cursor, seek_after
+from app.services import (
+    comment_events, comment_threads, counters, moderation, near_duplicates, site_search, topic_activity,
+    view_buffer,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/forum", tags=["论坛"])
 
+# 排序方式 -> (排序列, 游标中排序键的类型)，均按 (排序列, id) 倒序，由对应的复合索引支撑
+TOPIC_SORTS = {
+    "latest": (Topic.created_at, datetime),
+    "active": (Topic.last_activity_at, datetime),
+    "hot": (Topic.hot_score, float),
+    "comments": (Topic.comment_count, int),
+}
+
 
 @router.get("/topics", response_model=TopicListResponse)
 def get_topics(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None, description="上一页返回的 next_cursor，传入后忽略 page"),
+    sort: Literal["latest", "active", "hot", "comments"] = Query(
+        "latest", description="latest 最新发布，active 最近活跃，hot 热度，comments 评论最多"
+    ),
     db: Session = Depends(get_db)
 ):
-    total = db.query(Topic).count()
-    topics = db.query(Topic).options(joinedload(Topic.author)) \
-        .order_by(Topic.created_at.desc()) \
-        .offset((page - 1) * limit) \
-        .limit(limit) \
-        .all()
-
-    return {"topics": topics, "total": total, "page": page, "limit": limit}
+    total = counters.get(db, counters.TOPICS)
+    sort_column, key_type = TOPIC_SORTS[sort]
+    query = db.query(Topic).options(joinedload(Topic.author)) \
+        .order_by(sort_column.desc(), Topic.id.desc())
+    if cursor:
+        try:
+            key, last_id = decode_cursor(cursor, key_type, int)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的游标")
+        query = query.filter(seek_after(sort_column, Topic.id, key, last_id))
+    else:
+        query = query.offset((page - 1) * limit)
+    # 多取一条判断是否还有下一页
+    topics = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(topics) > limit:
+        topics = topics[:limit]
+        next_cursor = encode_cursor(getattr(topics[-1], sort_column.key), topics[-1].id)
+    return {"topics": topics, "total": total, "page": page, "limit": limit, "next_cursor": next_cursor}
 
 
 @router.get("/topics/{topic_id}", response_model=TopicResponse)
@@ -36,11 +75,11 @@ def get_topic(topic_id: int, db: Session = Depends(get_db)):
     if not topic:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="话题不存在")
 
-    # 增加浏览量
-    topic.views += 1
-    db.commit()
-
-    return topic
+    # 浏览量先记入内存缓冲，由后台任务批量写回，读请求不再开启写事务
+    view_buffer.record(db, topic_id)
+    return TopicResponse.model_validate(topic).model_copy(
+        update={"views": topic.views + view_buffer.pending(topic_id)}
+    )
 
 
 @router.post("/topics", response_model=TopicResponse)
@@ -50,11 +89,18 @@ def create_topic(
     db: Session = Depends(get_db)
 ):
     try:
+        if near_duplicates.screen(db, near_duplicates.topic_text(topic_data.title, topic_data.content), current_user.id):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="内容与近期发布的内容重复")
+
         topic = Topic(**topic_data.model_dump(), author_id=current_user.id)
+        topic_activity.init_topic(topic)
         db.add(topic)
+        counters.increment(db, counters.TOPICS)
         db.commit()
         db.refresh(topic)
         return topic
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.exception("Failed to create topic")
@@ -103,6 +149,7 @@ def delete_topic(
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权删除此话题")
 
         db.delete(topic)
+        counters.increment(db, counters.TOPICS, -1)
         db.commit()
         return {"message": "删除成功"}
     except HTTPException:
@@ -125,10 +172,22 @@ def add_comment(
         if not topic:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="话题不存在")
 
-        comment = Comment(**comment_data.dict(), author_id=current_user.id, topic_id=topic_id)
-        db.add(comment)
+        parent = None
+        if comment_data.parent_id is not None:
+            parent = db.query(Comment).filter(
+                Comment.id == comment_data.parent_id, Comment.topic_id == topic_id
+            ).first()
+            if not parent:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="回复的评论不存在")
+        if near_duplicates.screen(db, comment_data.content, current_user.id):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="内容与近期发布的内容重复")
+
+        comment = Comment(content=comment_data.content, author_id=current_user.id, topic_id=topic_id)
+        comment_threads.attach(db, comment, parent)
+        topic_activity.comment_added(db, topic_id, comment.created_at)
         db.commit()
         db.refresh(comment)
+        comment_events.feed.notify()
         return comment
     except HTTPException:
         raise
@@ -139,30 +198,160 @@ def add_comment(
 
 
 @router.get("/topics/{topic_id}/comments", response_model=list[CommentResponse])
-def get_comments(topic_id: int, db: Session = Depends(get_db)):
-    comments = db.query(Comment).options(joinedload(Comment.author)) \
-        .filter(Comment.topic_id == topic_id) \
-        .order_by(Comment.created_at.desc()).all()
+def get_comments(
+    topic_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    order: Literal["desc", "asc"] = Query("desc", description="desc 最新在前，asc 最早在前"),
+    cursor: str | None = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    since: int | None = Query(None, ge=0, description="轮询增量：只返回 id 大于该值的评论，按 id 正序"),
+    db: Session = Depends(get_db)
+):
+    """
+    分页获取话题评论，按 (created_at, id) 排序，走 (topic_id, created_at) 复合索引
+    还有下一页时在响应头 X-Next-Cursor 中返回游标（order 需与上一页一致）
+    """
+    if since is not None:
+        # 轮询客户端只取新增评论，下次以最后一条的 id 作为 since
+        return comment_events.backlog(db, topic_id, since, limit)
+
+    descending = order == "desc"
+    query = db.query(Comment).filter(Comment.topic_id == topic_id)
+    if descending:
+        query = query.order_by(Comment.created_at.desc(), Comment.id.desc())
+    else:
+        query = query.order_by(Comment.created_at.asc(), Comment.id.asc())
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor, datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的游标")
+        query = query.filter(seek_after(Comment.created_at, Comment.id, created_at, last_id, descending=descending))
+    # 多取一条判断是否还有下一页
+    comments = query.limit(limit + 1).all()
+
+    if len(comments) > limit:
+        comments = comments[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(comments[-1].created_at, comments[-1].id)
     return comments
 
 
+@router.get("/topics/{topic_id}/comments/stream")
+async def stream_comments(
+    topic_id: int,
+    request: Request,
+    last_event_id: int | None = Header(None, ge=0, description="断线重连时浏览器自动携带的 Last-Event-ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    新评论实时推送（text/event-stream），事件 id 为评论 id
+    携带 Last-Event-ID 时先补发之后的评论；否则只推送连接之后的新评论
+    """
+    def load_replay() -> tuple[int, list[dict]] | None:
+        if not db.query(Topic.id).filter(Topic.id == topic_id).first():
+            return None
+        if last_event_id is None:
+            latest = db.query(func.max(Comment.id)).filter(Comment.topic_id == topic_id).scalar()
+            return latest or 0, []
+        comments = comment_events.backlog(db, topic_id, last_event_id)
+        return last_event_id, [comment_events.event_payload(comment) for comment in comments]
+
+    # 先订阅再读取历史，两者之间提交的评论不会遗漏（重复的按 id 去重）
+    subscription = comment_events.broker.subscribe(topic_id)
+    try:
+        loaded = await run_in_threadpool(load_replay)
+    except Exception:
+        comment_events.broker.unsubscribe(subscription)
+        raise
+    if loaded is None:
+        comment_events.broker.unsubscribe(subscription)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="话题不存在")
+
+    last_id, replay = loaded
+    return StreamingResponse(
+        comment_events.stream(subscription, replay, last_id, request.is_disconnected),
+        media_type="text/event-stream",
+        # 关闭 nginx 对该响应的缓冲，事件即时送达
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _comment_node(comment: Comment) -> dict:
+    return CommentResponse.model_validate(comment).model_dump()
+
+
+@router.get("/topics/{topic_id}/threads", response_model=list[CommentThreadResponse])
+def get_comment_threads(
+    topic_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=50),
+    replies: int = Query(3, ge=0, le=50, description="每个楼返回的前 N 条回复（深度优先顺序）"),
+    cursor: str | None = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    db: Session = Depends(get_db)
+):
+    """
+    按楼分页获取话题评论：顶层评论按时间正序，每楼附带前 N 条回复
+    回复通过一次窗口函数查询取出，不逐层查询
+    """
+    query = db.query(Comment).filter(Comment.topic_id == topic_id, Comment.depth == 0) \
+        .order_by(Comment.created_at.asc(), Comment.id.asc())
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor, datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的游标")
+        query = query.filter(seek_after(Comment.created_at, Comment.id, created_at, last_id, descending=False))
+    roots = query.limit(limit + 1).all()
+    has_more = len(roots) > limit
+    roots = roots[:limit]
+
+    thread_ids = [root.id for root in roots]
+    counts = comment_threads.reply_counts(db, thread_ids)
+    tree = comment_threads.build_tree(
+        roots + comment_threads.first_replies(db, thread_ids, replies), _comment_node
+    )
+    for node in tree:
+        node["reply_count"] = counts.get(node["id"], 0)
+
+    if has_more:
+        response.headers["X-Next-Cursor"] = encode_cursor(roots[-1].created_at, roots[-1].id)
+    return tree
+
+
+@router.get("/comments/{comment_id}/thread", response_model=CommentThreadResponse)
+def get_comment_subtree(
+    comment_id: int,
+    max_depth: int = Query(comment_threads.MAX_DEPTH, ge=0, le=comment_threads.MAX_DEPTH, description="相对层数"),
+    db: Session = Depends(get_db)
+):
+    """获取一条评论及其全部回复（一次路径区间查询）"""
+    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    if not comment or comment.path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="评论不存在")
+    comments = comment_threads.subtree_query(db, comment, max_depth=max_depth).all()
+    return comment_threads.build_tree(comments, _comment_node)[0]
+
+
 # ============ 管理端点（需要管理员权限） ============
 
 @router.get("/admin/topics", response_model=list[TopicResponse])
 def admin_get_all_topics(
+    response: Response,
     search: str = None,
+    limit: int | None = Query(None, ge=1, le=500, description="每页数量；为空时流式返回全部"),
+    cursor: str | None = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    format: ListFormat = Query("json", description="ndjson 时逐行流式导出"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """获取所有话题（仅管理员）"""
-    from sqlalchemy import or_
-    query = db.query(Topic).options(joinedload(Topic.author))
-
-    if search:
-        query = query.filter(Topic.title.contains(search))
+    """获取所有话题（仅管理员），按创建时间倒序"""
+    def build_query(session: Session):
+        query = session.query(Topic)
+        if search:
+            query = query.filter(Topic.title.contains(search))
+        return query
 
-    topics = query.order_by(Topic.created_at.desc()).all()
-    return topics
+    return keyset_list(db, build_query, TopicResponse, response, limit, cursor, format)
 
 
 @router.delete("/admin/topics/{topic_id}")
@@ -178,6 +367,7 @@ def admin_delete_topic(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="话题不存在")
 
         db.delete(topic)
+        counters.increment(db, counters.TOPICS, -1)
         db.commit()
         return {"message": "删除成功"}
     except HTTPException:
@@ -188,15 +378,34 @@ def admin_delete_topic(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="删除失败，请稍后重试")
 
 
+@router.post("/admin/topics/bulk-delete", response_model=BulkDeleteResponse)
+def admin_bulk_delete_topics(
+    criteria: BulkDeleteRequest,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """按条件批量删除话题及其评论（仅管理员）"""
+    try:
+        result = moderation.delete_topics(db, criteria)
+        logger.info(f"管理员 {current_user.id} 批量删除话题: {result}")
+        return result
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to bulk delete topics")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="删除失败，请稍后重试")
+
+
 @router.get("/admin/comments", response_model=list[CommentResponse])
 def admin_get_all_comments(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=500, description="每页数量；为空时流式返回全部"),
+    cursor: str | None = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    format: ListFormat = Query("json", description="ndjson 时逐行流式导出"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """获取所有评论（仅管理员）"""
-    comments = db.query(Comment).options(joinedload(Comment.author)) \
-        .order_by(Comment.created_at.desc()).all()
-    return comments
+    """获取所有评论（仅管理员），按创建时间倒序"""
+    return keyset_list(db, lambda session: session.query(Comment), CommentResponse, response, limit, cursor, format)
 
 
 @router.delete("/admin/comments/{comment_id}")
@@ -211,7 +420,18 @@ def admin_delete_comment(
         if not comment:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="评论不存在")
 
-        db.delete(comment)
+        # 连同全部回复一起删除
+        if comment.path is not None:
+            lower, upper = comment_threads.subtree_bounds(comment.path)
+            subtree = db.query(Comment).filter(Comment.path >= lower, Comment.path < upper)
+            site_search.record(db, "comment", [row.id for row in subtree.with_entities(Comment.id)])
+            removed = subtree.delete(synchronize_session=False)
+        else:
+            db.delete(comment)
+            removed = 1
+        if comment.topic_id is not None:
+            db.flush()
+            topic_activity.comment_removed(db, comment.topic_id, removed)
         db.commit()
         return {"message": "删除成功"}
     except HTTPException:
@@ -220,3 +440,20 @@ def admin_delete_comment(
         db.rollback()
         logger.exception("Failed to delete comment (admin)")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="删除失败，请稍后重试")
+
+
+@router.post("/admin/comments/bulk-delete", response_model=BulkDeleteResponse)
+def admin_bulk_delete_comments(
+    criteria: BulkDeleteRequest,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """按条件批量删除评论及其全部回复（仅管理员）"""
+    try:
+        result = moderation.delete_comments(db, criteria)
+        logger.info(f"管理员 {current_user.id} 批量删除评论: {result}")
+        return result
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to bulk delete comments")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="删除失败，请稍后重试")
@@ -0,0 +1,25 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.lib.http_cache import conditional_response
+from app.schemas.home import HomeResponse
+from app.services import homepage
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/home", tags=["首页"])
+
+
+@router.get("", response_model=HomeResponse)
+async def get_home(request: Request, db: Session = Depends(get_db)):
+    """首页数据：精选项目、最新文章、作品集、在售服务（一次请求返回）"""
+    try:
+        body, etag = await homepage.get(db)
+    except Exception as e:
+        logger.exception("Failed to load home page")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="加载失败，请稍后重试")
+    # 响应体已缓存为 JSON 字节，直接返回，不再经过 response_model 校验
+    response = Response(content=body, media_type="application/json")
+    return conditional_response(request, response, etag) or response
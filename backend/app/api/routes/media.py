@@ -0,0 +1,32 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.requests import ClientDisconnect
+
+from app.api.deps import get_admin_user
+from app.models.models import User
+from app.schemas.media import MediaUploadResponse
+from app.services import image_variants, media_uploads
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/media", tags=["媒体"])
+
+
+@router.post("", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_media(request: Request, current_user: User = Depends(get_admin_user)):
+    """上传图片（multipart/form-data，文件字段名为 file），请求体流式写入磁盘，相同文件只保存一份"""
+    try:
+        stored = await media_uploads.receive(
+            request.stream(), request.headers.get("content-type", ""), request.headers.get("content-length")
+        )
+    except media_uploads.UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ClientDisconnect:
+        logger.info("上传过程中客户端断开连接")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="上传中断")
+    except Exception:
+        logger.exception("保存上传文件失败")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="保存上传文件失败")
+    # 提前在后台生成派生版本，文章或作品发布时通常已经就绪
+    image_variants.derivatives.variants(stored["url"])
+    return stored
@@ -1,23 +1,23 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.models import Portfolio, User
 from app.core.security import get_current_user
 from app.api.deps import get_admin_user
-from app.schemas.portfolio import PortfolioCreate, PortfolioUpdate, PortfolioResponse
+from app.lib.http_cache import conditional_response, make_etag, row_etag
+from app.schemas.ordering import ReorderRequest, ReorderResponse
+from app.schemas.portfolio import VALID_CATEGORIES, PortfolioCreate, PortfolioUpdate, PortfolioResponse
+from app.services import catalog_snapshots, counters, image_variants, reordering
 
 logger = logging.getLogger(__name__)
 
-# 有效的作品集分类列表
-VALID_CATEGORIES = {"design", "photography", "illustration", "ui-ux", "3d", "video", "other"}
-
 router = APIRouter(prefix="/portfolio", tags=["作品集"])
 
 
-@router.get("")
-def get_portfolio_items(category: str | None = None, db: Session = Depends(get_db)):
+@router.get("", response_model=list[PortfolioResponse])
+def get_portfolio_items(request: Request, category: str | None = None, db: Session = Depends(get_db)):
     # 验证分类参数
     if category and category not in VALID_CATEGORIES:
         raise HTTPException(
@@ -25,19 +25,35 @@ def get_portfolio_items(category: str | None = None, db: Session = Depends(get_d
             detail=f"无效的分类，支持的分类: {', '.join(sorted(VALID_CATEGORIES))}"
         )
 
+    part = catalog_snapshots.snapshots.get(f"portfolio/{category}" if category else "portfolio")
+    if part is not None:
+        return catalog_snapshots.respond(request, part)
     query = db.query(Portfolio)
     if category:
         query = query.filter(Portfolio.category == category)
     items = query.order_by(Portfolio.sort_order.asc(), Portfolio.created_at.desc()).all()
-    return items
+    return [image_variants.to_response(PortfolioResponse, item) for item in items]
+
+
+@router.get("/categories", response_model=dict[str, int])
+def get_portfolio_categories(db: Session = Depends(get_db)):
+    """各分类的作品数量（读取维护的计数）"""
+    categories = sorted(VALID_CATEGORIES)
+    values = counters.get_many(db, [counters.portfolio_category_key(category) for category in categories])
+    return {category: values[counters.portfolio_category_key(category)] for category in categories}
 
 
 @router.get("/{item_id}", response_model=PortfolioResponse)
-def get_portfolio_item(item_id: int, db: Session = Depends(get_db)):
+def get_portfolio_item(item_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     item = db.query(Portfolio).filter(Portfolio.id == item_id).first()
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="作品不存在")
-    return item
+    # 作品没有 updated_at，按内容生成 ETag；作品图派生版本生成完成后响应也会变化
+    variants = image_variants.variants_for(item.image_url)
+    etag = make_etag(row_etag(item), variants is not None)
+    return conditional_response(request, response, etag) or image_variants.to_response(
+        PortfolioResponse, item, image_variants=variants
+    )
 
 
 @router.post("", response_model=PortfolioResponse)
@@ -49,15 +65,36 @@ def create_portfolio_item(
     try:
         item = Portfolio(**data.model_dump())
         db.add(item)
+        counters.increment(db, counters.portfolio_category_key(item.category))
         db.commit()
         db.refresh(item)
-        return item
+        return image_variants.to_response(PortfolioResponse, item)
     except Exception as e:
         db.rollback()
         logger.exception("Failed to create portfolio item")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="创建失败，请稍后重试")
 
 
+@router.put("/order", response_model=ReorderResponse)
+def reorder_portfolio_items(
+    data: ReorderRequest,
+    current_user: User = Depends(get_admin_user),  # 仅管理员可排序
+    db: Session = Depends(get_db)
+):
+    """按 ids 的顺序调整全部作品的排序：只改写相对顺序变化的条目，一条 UPDATE 语句"""
+    try:
+        result = reordering.reorder(db, Portfolio, "portfolio", data.ids)
+        db.commit()
+        return result
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to reorder portfolio items")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="排序失败，请稍后重试")
+
+
 @router.put("/{item_id}", response_model=PortfolioResponse)
 def update_portfolio_item(
     item_id: int,
@@ -70,12 +107,16 @@ def update_portfolio_item(
         if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="作品不存在")
 
+        old_category = item.category
         for key, value in data.model_dump(exclude_unset=True).items():
             setattr(item, key, value)
 
+        if item.category != old_category:
+            counters.increment(db, counters.portfolio_category_key(old_category), -1)
+            counters.increment(db, counters.portfolio_category_key(item.category))
         db.commit()
         db.refresh(item)
-        return item
+        return image_variants.to_response(PortfolioResponse, item)
     except HTTPException:
         raise
     except Exception as e:
@@ -96,6 +137,7 @@ def delete_portfolio_item(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="作品不存在")
 
         db.delete(item)
+        counters.increment(db, counters.portfolio_category_key(item.category), -1)
         db.commit()
         return {"message": "删除成功"}
     except HTTPException:
@@ -1,12 +1,16 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.models import Project, User
-from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
+from app.schemas.ordering import ReorderRequest, ReorderResponse
+from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, TechFacet
 from app.core.security import get_current_user
 from app.api.deps import get_admin_user
+from app.lib.http_cache import conditional_response, make_etag
+from app.services import catalog_snapshots, image_variants, project_tags, reordering
 
 logger = logging.getLogger(__name__)
 
@@ -14,20 +18,43 @@ router = APIRouter(prefix="/projects", tags=["项目"])
 
 
 @router.get("", response_model=list[ProjectResponse])
-def get_projects(featured: bool = None, db: Session = Depends(get_db)):
+def get_projects(
+    request: Request,
+    featured: bool = None,
+    tech: list[str] | None = Query(None, description="技术栈筛选，可重复传入，不区分大小写"),
+    match: Literal["all", "any"] = Query("all", description="all 时需使用全部所列技术，any 时使用任一即可"),
+    db: Session = Depends(get_db)
+):
+    # 全部项目与精选项目直接返回快照
+    if not tech and featured is not False:
+        part = catalog_snapshots.snapshots.get("projects/featured" if featured else "projects")
+        if part is not None:
+            return catalog_snapshots.respond(request, part)
     query = db.query(Project)
     if featured is not None:
         query = query.filter(Project.featured == featured)
+    if tech:
+        query = project_tags.filter_projects(query, tech, match)
     projects = query.order_by(Project.sort_order.asc(), Project.created_at.desc()).all()
-    return projects
+    return [image_variants.to_response(ProjectResponse, project) for project in projects]
+
+
+@router.get("/tech", response_model=list[TechFacet])
+def get_tech_facets(limit: int = Query(50, ge=1, le=200), db: Session = Depends(get_db)):
+    """各技术栈的项目数（读取维护的计数），按项目数降序"""
+    return [{"name": tag.name, "slug": tag.slug, "count": tag.project_count} for tag in project_tags.facets(db, limit)]
 
 
 @router.get("/{slug}", response_model=ProjectResponse)
-def get_project(slug: str, db: Session = Depends(get_db)):
+def get_project(slug: str, request: Request, response: Response, db: Session = Depends(get_db)):
     project = db.query(Project).filter(Project.slug == slug).first()
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
-    return project
+    # 封面图派生版本生成完成后响应也会变化
+    variants = image_variants.variants_for(project.cover_image)
+    etag = make_etag(project.id, project.updated_at, variants is not None)
+    not_modified = conditional_response(request, response, etag, project.updated_at)
+    return not_modified or image_variants.to_response(ProjectResponse, project, cover_image_variants=variants)
 
 
 @router.post("", response_model=ProjectResponse)
@@ -39,15 +66,37 @@ def create_project(
     try:
         project = Project(**project_data.model_dump(), author_id=current_user.id)
         db.add(project)
+        db.flush()
+        project_tags.sync_project(db, project)
         db.commit()
         db.refresh(project)
-        return project
+        return image_variants.to_response(ProjectResponse, project)
     except Exception as e:
         db.rollback()
         logger.exception("Failed to create project")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="创建失败，请稍后重试")
 
 
+@router.put("/order", response_model=ReorderResponse)
+def reorder_projects(
+    data: ReorderRequest,
+    current_user: User = Depends(get_admin_user),  # 仅管理员可排序
+    db: Session = Depends(get_db)
+):
+    """按 ids 的顺序调整全部项目的排序：只改写相对顺序变化的条目，一条 UPDATE 语句"""
+    try:
+        result = reordering.reorder(db, Project, "project", data.ids)
+        db.commit()
+        return result
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to reorder projects")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="排序失败，请稍后重试")
+
+
 @router.put("/{slug}", response_model=ProjectResponse)
 def update_project(
     slug: str,
@@ -60,12 +109,15 @@ def update_project(
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
 
-        for key, value in project_data.model_dump(exclude_unset=True).items():
+        changes = project_data.model_dump(exclude_unset=True)
+        for key, value in changes.items():
             setattr(project, key, value)
+        if "tech_stack" in changes:
+            project_tags.sync_project(db, project)
 
         db.commit()
         db.refresh(project)
-        return project
+        return image_variants.to_response(ProjectResponse, project)
     except HTTPException:
         raise
     except Exception as e:
@@ -85,6 +137,7 @@ def delete_project(
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
 
+        project_tags.remove_project(db, project.id)
         db.delete(project)
         db.commit()
         return {"message": "删除成功"}
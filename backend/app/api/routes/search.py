@@ -0,0 +1,48 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.schemas.search import SearchResponse, SearchType, SuggestItem
+from app.services import site_search, suggest
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["搜索"])
+
+
+@router.get("/search", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1, max_length=100, description="关键词，多个词之间为“且”"),
+    type: Optional[SearchType] = Query(None, description="只返回该类型的结果"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """站内统一搜索：文章、话题、评论、项目、作品集、服务，按相关度排序"""
+    try:
+        hits, total, facets = site_search.index.search(db, q, type, offset=(page - 1) * limit, limit=limit)
+        return {
+            "query": q,
+            "total": total,
+            "facets": facets,
+            "results": site_search.hydrate(db, hits, q),
+        }
+    except Exception as e:
+        logger.exception("Failed to search")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="搜索失败，请稍后重试")
+
+
+@router.get("/suggest", response_model=list[SuggestItem])
+def suggest_titles(
+    q: str = Query(..., min_length=1, max_length=50, description="已输入的前缀"),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """输入联想：以 q 开头的文章标题、项目名称、技术栈、作品集分类（标题中的英文单词也可作为开头）"""
+    try:
+        return suggest.suggester.suggest(db, q, limit)
+    except Exception as e:
+        logger.exception("Failed to suggest")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="获取联想失败，请稍后重试")
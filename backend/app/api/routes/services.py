@@ -1,17 +1,26 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import get_args
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 
 from app.db.session import get_db
 from app.models.models import Service, Inquiry, Order, User
 from app.schemas.service import (
     ServiceCreate, ServiceUpdate, ServiceResponse,
-    InquiryCreate, InquiryResponse, InquiryUpdate,
+    InquiryCreate, InquiryResponse, InquiryUpdate, InquiryStatus, InquiryStatusCounts,
     OrderCreate, OrderResponse, OrderUpdate
 )
 from app.core.security import get_current_user
 from app.api.deps import get_admin_user
-from app.lib.utils import generate_order_no
+from app.lib.http_cache import conditional_response, row_etag
+from app.lib.listing import ListFormat, keyset_list
+from app.schemas.intake import IntakeAccepted, IntakeQueueStats
+from app.schemas.ordering import ReorderRequest, ReorderResponse
+from app.services import catalog_snapshots, intake, reordering
+from app.services.order_numbers import order_numbers
 
 logger = logging.getLogger(__name__)
 
@@ -21,35 +30,93 @@ router = APIRouter(prefix="/services", tags=["服务"])
 # ============ 服务管理端点 ============
 
 @router.get("", response_model=list[ServiceResponse])
-def get_services(db: Session = Depends(get_db)):
+def get_services(request: Request, db: Session = Depends(get_db)):
+    part = catalog_snapshots.snapshots.get("services")
+    if part is not None:
+        return catalog_snapshots.respond(request, part)
     services = db.query(Service).filter(Service.active == True).order_by(Service.sort_order.asc()).all()
     return services
 
 
 # ============ 询价端点 ============
 # 公开端点：创建询价（无需登录）
-@router.post("/inquiries", response_model=InquiryResponse)
-def create_inquiry(inquiry_data: InquiryCreate, db: Session = Depends(get_db)):
+# 写入本地队列后立即返回，由后台任务批量写入数据库（见 app.services.intake）
+@router.post("/inquiries", response_model=IntakeAccepted, status_code=status.HTTP_202_ACCEPTED)
+def create_inquiry(
+    inquiry_data: InquiryCreate,
+    idempotency_key: str | None = Header(
+        None, alias="Idempotency-Key", max_length=64, pattern=r"^[A-Za-z0-9_-]+$",
+        description="客户端生成的幂等键，重试时携带同一个值",
+    ),
+):
     try:
-        inquiry = Inquiry(**inquiry_data.model_dump())
-        db.add(inquiry)
-        db.commit()
-        db.refresh(inquiry)
-        return inquiry
+        key = intake.submit("inquiry", inquiry_data.model_dump(), idempotency_key)
+        return {"key": key, "message": "询价已提交，我们会尽快与您联系"}
     except Exception as e:
-        db.rollback()
         logger.exception("Failed to create inquiry")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="创建失败，请稍后重试")
 
 
+@router.get("/inquiries/queue", response_model=IntakeQueueStats)
+def get_intake_queue(current_user: User = Depends(get_admin_user)):
+    """本机表单提交队列的深度（各主机各自统计）"""
+    return intake.stats()
+
+
+def _utc(value: datetime) -> datetime:
+    # created_at 存的是不带时区的 UTC 时间
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _filter_inquiries(query, service_id, created_from, created_to):
+    if service_id is not None:
+        query = query.filter(Inquiry.service_id == service_id)
+    if created_from is not None:
+        query = query.filter(Inquiry.created_at >= _utc(created_from))
+    if created_to is not None:
+        query = query.filter(Inquiry.created_at < _utc(created_to))
+    return query
+
+
 # 管理端点：询价列表（仅管理员）
 @router.get("/inquiries", response_model=list[InquiryResponse])
 def get_inquiries(
+    response: Response,
+    status_filter: InquiryStatus | None = Query(None, alias="status", description="按状态筛选"),
+    service_id: int | None = Query(None, description="按服务筛选"),
+    created_from: datetime | None = Query(None, description="创建时间不早于（含）"),
+    created_to: datetime | None = Query(None, description="创建时间早于（不含）"),
+    limit: int | None = Query(None, ge=1, le=500, description="每页数量；为空时流式返回全部"),
+    cursor: str | None = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    format: ListFormat = Query("json", description="ndjson 时逐行流式导出"),
     current_user: User = Depends(get_admin_user),  # 仅管理员可查看
     db: Session = Depends(get_db)
 ):
-    inquiries = db.query(Inquiry).order_by(Inquiry.created_at.desc()).all()
-    return inquiries
+    def build_query(session: Session):
+        # 响应包含关联的服务，随查询一起 JOIN 读取
+        query = session.query(Inquiry).options(joinedload(Inquiry.service))
+        if status_filter is not None:
+            query = query.filter(Inquiry.status == status_filter)
+        return _filter_inquiries(query, service_id, created_from, created_to)
+
+    return keyset_list(db, build_query, InquiryResponse, response, limit, cursor, format)
+
+
+@router.get("/inquiries/stats", response_model=InquiryStatusCounts)
+def get_inquiry_stats(
+    service_id: int | None = Query(None, description="按服务筛选"),
+    created_from: datetime | None = Query(None, description="创建时间不早于（含）"),
+    created_to: datetime | None = Query(None, description="创建时间早于（不含）"),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """各状态的询价数（一次 GROUP BY 查询），筛选条件同询价列表"""
+    query = db.query(Inquiry.status, func.count()).filter(Inquiry.status.isnot(None)).group_by(Inquiry.status)
+    counts = dict(_filter_inquiries(query, service_id, created_from, created_to).all())
+    by_status = {name: counts.pop(name, 0) for name in get_args(InquiryStatus)}
+    # 不在已知状态中的（例如历史数据）也原样返回
+    by_status.update(counts)
+    return {"total": sum(by_status.values()), "by_status": by_status}
 
 
 @router.put("/inquiries/{inquiry_id}", response_model=InquiryResponse)
@@ -111,7 +178,7 @@ def create_order(
     try:
         order = Order(
             **order_data.dict(),
-            order_no=generate_order_no(),
+            order_no=order_numbers.generate(),
             client_id=current_user.id
         )
         db.add(order)
@@ -202,11 +269,33 @@ def create_service(
 
 
 @router.get("/{slug}", response_model=ServiceResponse)
-def get_service(slug: str, db: Session = Depends(get_db)):
+def get_service(slug: str, request: Request, response: Response, db: Session = Depends(get_db)):
     service = db.query(Service).filter(Service.slug == slug, Service.active == True).first()
     if not service:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="服务不存在")
-    return service
+    # 服务没有 updated_at，按内容生成 ETag
+    return conditional_response(request, response, row_etag(service)) or service
+
+
+@router.put("/order", response_model=ReorderResponse)
+def reorder_services(
+    data: ReorderRequest,
+    current_user: User = Depends(get_admin_user),  # 仅管理员可排序
+    db: Session = Depends(get_db)
+):
+    """按 ids 的顺序调整已上架服务的排序：只改写相对顺序变化的条目，一条 UPDATE 语句"""
+    try:
+        # 删除的服务只是下架（active=False），不在管理端列表中，也不参与排序
+        result = reordering.reorder(db, Service, "service", data.ids, scope=Service.active.is_(True))
+        db.commit()
+        return result
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to reorder services")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="排序失败，请稍后重试")
 
 
 @router.put("/{slug}", response_model=ServiceResponse)
@@ -1,5 +1,5 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Body
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
@@ -8,6 +8,7 @@ from app.models.models import User
 from app.schemas.user import UserResponse, UserUpdate
 from app.core.security import get_current_user, get_password_hash
 from app.api.deps import get_admin_user
+from app.lib.listing import ListFormat, keyset_list
 
 logger = logging.getLogger(__name__)
 
@@ -16,23 +17,27 @@ router = APIRouter(prefix="/users", tags=["用户管理"])
 
 @router.get("", response_model=list[UserResponse])
 def get_users(
+    response: Response,
     search: str = None,
+    limit: int | None = Query(None, ge=1, le=500, description="每页数量；为空时流式返回全部"),
+    cursor: str | None = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    format: ListFormat = Query("json", description="ndjson 时逐行流式导出"),
     current_user: User = Depends(get_admin_user),  # 仅管理员可访问
     db: Session = Depends(get_db)
 ):
-    """获取用户列表（仅管理员）"""
-    query = db.query(User)
-
-    if search:
-        query = query.filter(
-            or_(
-                User.name.contains(search),
-                User.email.contains(search)
+    """获取用户列表（仅管理员），按注册时间倒序"""
+    def build_query(session: Session):
+        query = session.query(User)
+        if search:
+            query = query.filter(
+                or_(
+                    User.name.contains(search),
+                    User.email.contains(search)
+                )
             )
-        )
+        return query
 
-    users = query.order_by(User.created_at.desc()).all()
-    return users
+    return keyset_list(db, build_query, UserResponse, response, limit, cursor, format)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
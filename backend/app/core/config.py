@@ -11,12 +11,57 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./portfolio.db"
     FRONTEND_URL: str = "http://localhost:3000"
 
-    # Email configuration
-    SMTP_HOST: str = "smtp.example.com"
+    # Email configuration（SMTP_HOST 为空时不发送邮件）
+    SMTP_HOST: str = ""
     SMTP_PORT: int = 587
     SMTP_USER: str = "your-email@example.com"
     SMTP_PASSWORD: str = "your-email-password"
     FROM_EMAIL: str = "your-email@example.com"
+    # 连接与收发的超时（秒）
+    SMTP_TIMEOUT: float = 10
+
+    # 计数器校准间隔（秒），0 表示不启动后台校准
+    COUNTER_RECONCILE_INTERVAL: int = 600
+    # 话题浏览量写回：间隔（秒）与每个 worker 缓冲的最大次数，决定崩溃时的最大丢失量
+    VIEW_FLUSH_INTERVAL: int = 5
+    VIEW_BUFFER_MAX_PENDING: int = 1000
+    # 话题活跃度（评论数、最后活跃时间、热度分）后台重算间隔（秒），0 表示不启动
+    TOPIC_ACTIVITY_RECOMPUTE_INTERVAL: int = 300
+    # 评论实时推送：每个 worker 读取新增评论的间隔（秒），决定跨 worker 推送的最大延迟
+    COMMENT_STREAM_POLL_INTERVAL: float = 1.0
+    # 近似重复检测：off 关闭，flag 只记录日志，reject 拒绝发布
+    NEAR_DUPLICATE_ACTION: str = "flag"
+    # 估计相似度（Jaccard）阈值、每个 worker 索引的近期内容条数（上限，内存按实际条数占用）、
+    # 快照路径与保存间隔（秒）
+    NEAR_DUPLICATE_THRESHOLD: float = 0.7
+    NEAR_DUPLICATE_CAPACITY: int = 200_000
+    NEAR_DUPLICATE_INDEX_PATH: str = "data/near_duplicates.npz"
+    NEAR_DUPLICATE_SAVE_INTERVAL: int = 600
+    # 站内搜索：索引段目录（各 worker 共享），检查是否需要重建的间隔（秒，0 表示不启动），
+    # 段生成后累计的变更超过此数量时重建
+    SEARCH_INDEX_DIR: str = "data/search"
+    SEARCH_INDEX_COMPACT_INTERVAL: int = 300
+    SEARCH_INDEX_REBUILD_CHANGES: int = 1000
+    # 上传的原图目录与对应的 URL 前缀（由 nginx 直接提供），派生版本生成在其中的 derived/ 下；
+    # 派生版本的宽度（像素，超过原图宽度的跳过）、格式（avif / webp）与生成进程数
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL: str = "/media/"
+    IMAGE_WIDTHS: list[int] = [320, 640, 960, 1280, 1920]
+    IMAGE_FORMATS: list[str] = ["avif", "webp"]
+    IMAGE_WORKERS: int = 2
+    # 单个上传文件的大小上限（字节），nginx 的 client_max_body_size 需不小于此值
+    MEDIA_UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    # 项目、作品集、服务列表的快照文件（各 worker 共享映射），检查快照是否过期的间隔（秒，0 表示不启动）
+    CATALOG_SNAPSHOT_PATH: str = "data/catalog.snap"
+    CATALOG_SNAPSHOT_CHECK_INTERVAL: int = 30
+    # 订单号生成器 worker id 的租约时长（秒），每三分之一时长续期一次
+    ORDER_WORKER_LEASE_SECONDS: int = 300
+    # 询价与联系表单的本地持久化队列（同一主机的各 worker 共享），写入数据库的间隔（秒，0 表示不消费）与每批条数
+    INTAKE_QUEUE_PATH: str = "data/intake.db"
+    INTAKE_DRAIN_INTERVAL: float = 1
+    INTAKE_BATCH_SIZE: int = 200
+    # 联系表单通知邮件的本地队列，由单独的后台任务发送（间隔同 INTAKE_DRAIN_INTERVAL），不阻塞写入数据库
+    INTAKE_NOTIFY_QUEUE_PATH: str = "data/intake-notify.db"
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
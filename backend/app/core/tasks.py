@@ -0,0 +1,41 @@
+# 后台周期任务（随应用生命周期启动/停止，每个 worker 进程各自运行）
+import asyncio
+import logging
+from typing import Callable, Coroutine
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+_tasks: list[asyncio.Task] = []
+
+
+async def _run_periodic(name: str, interval: float, func: Callable[[], None]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(func)
+        except Exception:
+            logger.exception(f"后台任务执行失败: {name}")
+
+
+def start_periodic(name: str, interval: float, func: Callable[[], None]) -> None:
+    """注册周期任务，interval <= 0 时不启动；func 为同步函数，在线程池中执行"""
+    if interval <= 0:
+        return
+    _tasks.append(asyncio.create_task(_run_periodic(name, interval, func), name=name))
+    logger.info(f"后台任务已启动: {name}（间隔 {interval}s）")
+
+
+def start(name: str, coroutine: Coroutine) -> None:
+    """注册常驻任务（协程自行循环）"""
+    _tasks.append(asyncio.create_task(coroutine, name=name))
+    logger.info(f"后台任务已启动: {name}")
+
+
+async def stop_all() -> None:
+    """取消全部周期任务"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,68 @@
+# Alembic 迁移使用的辅助函数
+#
+# 表由启动时的 Base.metadata.create_all 创建（新库直接得到完整的表结构），但 create_all 不修改已有的表：
+# 已有部署新增的列与索引由 alembic/versions 下的迁移补上。表不存在（尚未启动过）或列、索引已存在
+# （由 create_all 建出）时跳过，因此迁移在首次启动前后执行均可。
+import sqlalchemy as sa
+from alembic import op
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def create_missing_tables() -> None:
+    """建出缺少的表（同启动时的 create_all）：迁移中通过 ORM 回填时，flush 事件会写入变更日志等新表"""
+    from app.models.models import Base
+
+    Base.metadata.create_all(op.get_bind())
+
+
+def add_columns(table: str, *columns: sa.Column) -> list[str]:
+    """补上缺少的列，返回实际新增的列名（表不存在时为空）"""
+    inspector = _inspector()
+    if not inspector.has_table(table):
+        return []
+    existing = {column["name"] for column in inspector.get_columns(table)}
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    added = []
+    for column in columns:
+        if column.name not in existing:
+            if sqlite and column.foreign_keys:
+                # SQLite 不支持 ALTER 添加约束（默认也不检查外键）：只加列
+                column = sa.Column(column.name, column.type, nullable=column.nullable)
+            op.add_column(table, column)
+            added.append(column.name)
+    return added
+
+
+def create_indexes(table: str, indexes: dict[str, list[str]], unique: bool = False) -> None:
+    """创建缺少的索引：{索引名: 列名列表}"""
+    inspector = _inspector()
+    if not inspector.has_table(table):
+        return
+    existing = {index["name"] for index in inspector.get_indexes(table)}
+    for name, columns in indexes.items():
+        if name not in existing:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def drop_indexes(table: str, names: list[str]) -> None:
+    inspector = _inspector()
+    if not inspector.has_table(table):
+        return
+    existing = {index["name"] for index in inspector.get_indexes(table)}
+    for name in names:
+        if name in existing:
+            op.drop_index(name, table_name=table)
+
+
+def drop_columns(table: str, names: list[str]) -> None:
+    inspector = _inspector()
+    if not inspector.has_table(table):
+        return
+    existing = {column["name"] for column in inspector.get_columns(table)}
+    with op.batch_alter_table(table) as batch:
+        for name in names:
+            if name in existing:
+                batch.drop_column(name)
@@ -0,0 +1,105 @@
+# 本地持久化队列：独立的 SQLite 文件（WAL，synchronous=FULL），与业务数据库的写锁互不影响
+#
+# 同一主机上的各 worker 共享同一个文件。每条消息有唯一的 key（重复 put 同一 key 时忽略），
+# 消费者取出一批、处理完成后 ack 删除；处理失败的 retry 推迟到之后再取。
+# ack 之前进程崩溃的消息会被再次取出（至少一次），消费者需按 key 做幂等处理。
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_available ON messages (available_at, id);
+"""
+
+
+@dataclass
+class Message:
+    id: int
+    key: str
+    kind: str
+    payload: dict
+    enqueued_at: float
+    attempts: int
+
+
+class DurableQueue:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # 每个线程一个连接；fork 出的子进程不沿用父进程的连接
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid() and self._local.path == self.path:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SCHEMA)
+        self._local.conn, self._local.pid, self._local.path = conn, os.getpid(), self.path
+        return conn
+
+    def put(self, key: str, kind: str, payload: dict, now: Optional[float] = None) -> bool:
+        """写入并落盘后返回；key 已在队列中时返回 False"""
+        now = time.time() if now is None else now
+        cursor = self._connection().execute(
+            "INSERT OR IGNORE INTO messages (key, kind, payload, enqueued_at, available_at) VALUES (?, ?, ?, ?, ?)",
+            (key, kind, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        return cursor.rowcount == 1
+
+    def take(self, limit: int, now: Optional[float] = None) -> list[Message]:
+        """按写入顺序取出可处理的消息（不删除）"""
+        now = time.time() if now is None else now
+        rows = self._connection().execute(
+            "SELECT id, key, kind, payload, enqueued_at, attempts FROM messages "
+            "WHERE available_at <= ? ORDER BY id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        return [Message(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5]) for row in rows]
+
+    def ack(self, ids: list[int]) -> None:
+        if ids:
+            self._connection().execute(
+                f"DELETE FROM messages WHERE id IN ({','.join('?' * len(ids))})", ids
+            )
+
+    def retry(self, message_id: int, delay: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._connection().execute(
+            "UPDATE messages SET attempts = attempts + 1, available_at = ? WHERE id = ?", (now + delay, message_id)
+        )
+
+    def stats(self, now: Optional[float] = None) -> dict:
+        """{"depth": 消息数, "oldest_age": 最早一条已等待的秒数, "retrying": 处理失败待重试的消息数}"""
+        now = time.time() if now is None else now
+        depth, oldest, retrying = self._connection().execute(
+            "SELECT COUNT(*), MIN(enqueued_at), COALESCE(SUM(attempts > 0), 0) FROM messages"
+        ).fetchone()
+        return {
+            "depth": depth,
+            "oldest_age": round(max(now - oldest, 0.0), 3) if oldest is not None else 0.0,
+            "retrying": retrying,
+        }
+
+    def close(self) -> None:
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
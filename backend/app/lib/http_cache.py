@@ -0,0 +1,77 @@
+# HTTP 条件请求：ETag / Last-Modified 与 304 响应
+#
+# 详情接口在查到数据行后、序列化之前调用 conditional_response()：
+# 客户端（或 nginx 缓存回源校验）携带的版本未变化时直接返回 304，不再构造响应体。
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# 要求客户端每次使用前回源校验（命中时只有 304 的开销）
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """由版本信息（如 id + updated_at）生成强 ETag"""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def row_etag(row: Any) -> str:
+    """没有 updated_at 的数据行：按全部列的值生成 ETag"""
+    return make_etag(*(getattr(row, column.key) for column in row.__table__.columns))
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较（nginx gzip 会把强 ETag 改为 W/ 前缀）"""
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP 日期精确到秒
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _as_utc(value: datetime) -> datetime:
+    """数据库中的时间为 naive UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    写入缓存校验头；请求的版本未变化时返回 304 响应，否则返回 None 由路由正常序列化
+    按 RFC 9110，同时携带 If-None-Match 时忽略 If-Modified-Since
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        last_modified = _as_utc(last_modified)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and last_modified is not None:
+        fresh = _not_modified_since(if_modified_since, last_modified)
+    else:
+        fresh = False
+    if fresh:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
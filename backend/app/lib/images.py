@@ -0,0 +1,170 @@
+# 图片派生版本：响应式宽度的 AVIF / WebP 与低清占位图（LQIP）
+#
+# 派生文件按原图内容寻址：<缓存目录>/<摘要前两位>/<摘要>/<宽度>.<格式>，摘要为 PIPELINE_VERSION + 原图字节的 SHA-256，
+# 同一张图被多处引用或换了路径也只生成一次；编码参数变化时提升 PIPELINE_VERSION 即可整体换新。
+# 目录内的 manifest.json 在全部文件写完后最后写入，它存在即表示该图已生成完成。
+# generate() 是进程池中执行的任务（只依赖参数，不读取应用配置）；同一张图的生成用文件锁串行化，
+# 已存在的文件不再重新编码，因此多个进程、多个 worker 同时请求同一张图时每个派生文件也只编码一次。
+import base64
+import fcntl
+import hashlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from PIL import Image, ImageOps, features
+
+PIPELINE_VERSION = 1
+MANIFEST = "manifest.json"
+
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+# 编码参数：AVIF 同等观感下体积更小但编码更慢
+ENCODE_OPTIONS = {
+    "avif": {"quality": 55, "speed": 6},
+    "webp": {"quality": 80, "method": 4},
+}
+PLACEHOLDER_WIDTH = 16
+# 允许上传的原图类型 -> 扩展名；以文件头识别，不信任客户端声明（不接受 SVG：可内嵌脚本）
+UPLOAD_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp", "image/avif": "avif"}
+SNIFF_BYTES = 12
+# 解码前拒绝超大图片（防止解压炸弹耗尽内存）
+MAX_PIXELS = 50_000_000
+
+
+def supported(fmt: str) -> bool:
+    """当前 Pillow 能否编码该格式（AVIF 需要 Pillow 11.3+ 的官方 wheel 或带 libavif 编译）"""
+    return fmt in MIME_TYPES and bool(features.check(fmt))
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """按文件头（前 SNIFF_BYTES 字节）识别图片类型，返回 MIME 类型；不是允许的类型时返回 None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return None
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(b"%d:" % PIPELINE_VERSION + data).hexdigest()
+
+
+def derived_dir(cache_dir: Path, digest: str) -> Path:
+    return Path(cache_dir) / digest[:2] / digest
+
+
+def plan_widths(original_width: int, widths: Iterable[int]) -> list[int]:
+    """不超过原图宽度的目标宽度（升序）；原图比所有目标都窄时只生成原图宽度"""
+    planned = sorted({width for width in widths if 0 < width <= original_width})
+    return planned or [original_width]
+
+
+def _load(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    if image.width * image.height > MAX_PIXELS:
+        raise ValueError(f"图片像素过多: {image.width}x{image.height}")
+    # 按 EXIF 方向旋转（手机照片），之后的宽高即显示宽高
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def resize(image: Image.Image, width: int) -> Image.Image:
+    if width >= image.width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    # reducing_gap：先按整数倍快速缩小再精细重采样，大图缩小时快很多且画质几乎不变
+    return image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **ENCODE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def placeholder(image: Image.Image) -> str:
+    """极小的模糊预览图（data URI，约 100~300 字节），前端在正式图片加载前拉伸显示"""
+    small = resize(image, PLACEHOLDER_WIDTH)
+    buffer = io.BytesIO()
+    small.save(buffer, format="WEBP", quality=30)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_manifest(directory: Path) -> Optional[dict]:
+    try:
+        return json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def is_complete(manifest: Optional[dict], widths: list[int], formats: list[str]) -> bool:
+    """manifest 是否包含当前配置的全部宽度与格式（配置变化后需要补充生成）"""
+    if manifest is None:
+        return False
+    planned = plan_widths(manifest["width"], widths)
+    return all(planned == [width for width, _ in manifest["files"].get(fmt, [])] for fmt in formats)
+
+
+def generate(source: str, cache_dir: str, widths: list[int], formats: list[str]) -> tuple[str, dict]:
+    """生成原图的派生版本（已有的文件跳过），返回 (内容摘要, manifest)
+
+    manifest: {"width", "height", "placeholder", "files": {格式: [[宽度, 相对缓存目录的路径], ...]}}
+    """
+    data = Path(source).read_bytes()
+    digest = content_digest(data)
+    directory = derived_dir(Path(cache_dir), digest)
+    manifest = read_manifest(directory)
+    if is_complete(manifest, widths, formats):
+        return digest, manifest
+
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "a") as lock_file:
+        # 其他进程正在生成同一张图时在此等待，拿到锁后它写好的文件直接复用
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        manifest = read_manifest(directory)
+        if is_complete(manifest, widths, formats):
+            return digest, manifest
+
+        image = _load(data)
+        planned = plan_widths(image.width, widths)
+        relative = directory.relative_to(cache_dir).as_posix()
+        files = {fmt: [] for fmt in formats}
+        # 从大到小依次缩放：每次以上一级结果为输入，缩放开销随宽度递减
+        current = image
+        for width in reversed(planned):
+            current = resize(current, width)
+            for fmt in formats:
+                name = f"{width}.{fmt}"
+                path = directory / name
+                if not path.exists():
+                    _write_atomic(path, encode(current, fmt))
+                files[fmt].insert(0, [width, f"{relative}/{name}"])
+        manifest = {
+            "width": image.width,
+            "height": image.height,
+            "placeholder": placeholder(current),
+            "files": files,
+        }
+        _write_atomic(directory / MANIFEST, json.dumps(manifest).encode("utf-8"))
+        return digest, manifest
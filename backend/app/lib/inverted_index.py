@@ -0,0 +1,243 @@
+# 倒排索引：只读段文件（内存映射）+ 内存增量，BM25 评分
+#
+# 段为一个目录下的若干 .npy 文件，以 mmap 方式打开：多个 worker 进程打开同一个段时共享操作系统页缓存，
+# 不需要各自在内存中持有一份。段内：
+#   terms          词项哈希（uint64，升序）
+#   offsets        每个词项的倒排表在 postings_* 中的起止位置
+#   postings_doc   文档序号（uint32，每个词项内升序）
+#   postings_tf    加权词频（uint16）
+#   doc_keys / doc_lengths   文档序号 -> 调用方的文档键（int64）/ 加权长度
+#   sorted_keys / key_order  升序的文档键及对应的文档序号，用于由文档键查找序号
+# 段生成后不再修改；之后的新增、修改、删除记在 MemoryIndex 中，并把段内的旧版本标记为删除。
+import hashlib
+import json
+import os
+from collections import Counter
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.lib.text import index_tokens, tokenize
+
+# 2: CJK 另加单字词项（单字查询可命中）
+VERSION = 2
+K1 = 1.2
+B = 0.75
+_MAX_TF = np.iinfo(np.uint16).max
+_ARRAYS = ("terms", "offsets", "postings_doc", "postings_tf", "doc_keys", "doc_lengths", "sorted_keys", "key_order")
+
+
+@lru_cache(maxsize=1 << 17)  # 常用词项（CJK 二元组）反复出现，缓存后建段快数倍
+def term_hash(token: str) -> int:
+    """词项的 64 位哈希（跨进程稳定）"""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def analyze(fields: Iterable[tuple[Optional[str], int]]) -> tuple[dict[int, int], int]:
+    """按 (文本, 权重) 分词，返回 (词项哈希 -> 加权词频, 加权长度)"""
+    frequencies: Counter = Counter()
+    length = 0
+    for text, weight in fields:
+        tokens = index_tokens(text or "")
+        length += len(tokens) * weight
+        for token in tokens:
+            frequencies[token] += weight
+    return {term_hash(token): count for token, count in frequencies.items()}, length
+
+
+def query_terms(query: str) -> list[int]:
+    return list(dict.fromkeys(term_hash(token) for token in tokenize(query)))
+
+
+class SegmentWriter:
+    """按文档逐个写入，write() 时排序生成段文件"""
+
+    def __init__(self):
+        self._terms: list[np.ndarray] = []
+        self._tfs: list[np.ndarray] = []
+        self._keys: list[int] = []
+        self._lengths: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: int, frequencies: dict[int, int], length: int) -> None:
+        self._terms.append(np.fromiter(frequencies.keys(), dtype=np.uint64, count=len(frequencies)))
+        tfs = np.fromiter(frequencies.values(), dtype=np.int64, count=len(frequencies))
+        self._tfs.append(np.minimum(tfs, _MAX_TF).astype(np.uint16))
+        self._keys.append(key)
+        self._lengths.append(length)
+
+    def write(self, directory: str, **meta) -> None:
+        os.makedirs(directory, exist_ok=True)
+        counts = np.fromiter((len(terms) for terms in self._terms), dtype=np.int64, count=len(self._terms))
+        terms = np.concatenate(self._terms) if self._terms else np.empty(0, dtype=np.uint64)
+        tfs = np.concatenate(self._tfs) if self._tfs else np.empty(0, dtype=np.uint16)
+        docs = np.repeat(np.arange(len(self._keys), dtype=np.uint32), counts)
+        # 按文档序号写入，稳定排序后每个词项内的文档序号保持升序
+        order = np.argsort(terms, kind="stable")
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+        del order
+        unique_terms, starts = np.unique(terms, return_index=True)
+        doc_keys = np.asarray(self._keys, dtype=np.int64)
+        key_order = np.argsort(doc_keys, kind="stable")
+        arrays = {
+            "terms": unique_terms,
+            "offsets": np.append(starts, len(terms)).astype(np.int64),
+            "postings_doc": docs,
+            "postings_tf": tfs,
+            "doc_keys": doc_keys,
+            "doc_lengths": np.asarray(self._lengths, dtype=np.uint32),
+            "sorted_keys": doc_keys[key_order],
+            "key_order": key_order.astype(np.uint32),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": VERSION,
+                "num_docs": len(self._keys),
+                "total_length": int(sum(self._lengths)),
+                **meta,
+            }, f)
+
+
+class Segment:
+    """只读段（mmap）"""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != VERSION:
+            raise ValueError(f"段版本不兼容: {directory}")
+        self.directory = directory
+        for name in _ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+        self.num_docs = self.meta["num_docs"]
+        self.total_length = self.meta["total_length"]
+
+    def postings(self, term: int) -> tuple[np.ndarray, np.ndarray]:
+        """词项的 (文档序号, 词频)，不存在时为空数组"""
+        term = np.uint64(term)
+        position = int(self.terms.searchsorted(term))
+        if position >= len(self.terms) or self.terms[position] != term:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint16)
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return self.postings_doc[start:end], self.postings_tf[start:end]
+
+    def docno(self, key: int) -> Optional[int]:
+        """文档键对应的序号"""
+        if self.num_docs == 0:
+            return None
+        position = int(self.sorted_keys.searchsorted(np.int64(key)))
+        if position < self.num_docs and self.sorted_keys[position] == key:
+            return int(self.key_order[position])
+        return None
+
+
+class MemoryIndex:
+    """段之后变更的文档（每个 worker 一份，规模为段生成后的变更量）"""
+
+    def __init__(self):
+        self.docs: dict[int, tuple[dict[int, int], int]] = {}
+        self.postings: dict[int, set[int]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, key: int, frequencies: dict[int, int], length: int) -> None:
+        self.remove(key)
+        self.docs[key] = (frequencies, length)
+        self.total_length += length
+        for term in frequencies:
+            self.postings.setdefault(term, set()).add(key)
+
+    def remove(self, key: int) -> None:
+        old = self.docs.pop(key, None)
+        if old is None:
+            return
+        frequencies, length = old
+        self.total_length -= length
+        for term in frequencies:
+            keys = self.postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[term]
+
+
+@dataclass
+class Matches:
+    keys: np.ndarray  # int64 文档键
+    scores: np.ndarray  # float64
+
+
+def _bm25(tf: np.ndarray, lengths: np.ndarray, idf: float, avgdl: float) -> np.ndarray:
+    tf = tf.astype(np.float64)
+    return idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths / avgdl))
+
+
+def search(
+    segment: Optional[Segment],
+    memory: MemoryIndex,
+    deleted: np.ndarray,
+    terms: list[int],
+) -> Matches:
+    """
+    包含全部词项的文档及 BM25 分数（未排序）
+    deleted 为段内已删除或已被新版本取代的文档序号（升序）
+    文档频率与平均长度按段与增量合计（段内已删除文档仍计入，误差随下次重建消除）
+    """
+    empty = Matches(np.empty(0, dtype=np.int64), np.empty(0))
+    if not terms:
+        return empty
+    base_postings = [segment.postings(term) for term in terms] if segment else [(np.empty(0),) * 2] * len(terms)
+    num_docs = (segment.num_docs - len(deleted) if segment else 0) + len(memory)
+    if num_docs <= 0:
+        return empty
+    total_length = (segment.total_length if segment else 0) + memory.total_length
+    avgdl = max(total_length / num_docs, 1.0)
+    idf = {}
+    for term, (docs, _) in zip(terms, base_postings):
+        df = len(docs) + len(memory.postings.get(term, ()))
+        idf[term] = float(np.log(1 + (num_docs - df + 0.5) / (df + 0.5)))
+
+    keys, scores = [], []
+    if segment is not None and all(len(docs) for docs, _ in base_postings):
+        # 从最短的倒排表开始求交集
+        ordered = sorted(zip(terms, base_postings), key=lambda item: len(item[1][0]))
+        candidates = np.asarray(ordered[0][1][0])
+        for _, (docs, _) in ordered[1:]:
+            candidates = np.intersect1d(candidates, docs, assume_unique=True)
+            if not len(candidates):
+                break
+        if len(deleted) and len(candidates):
+            candidates = candidates[~np.isin(candidates, deleted, assume_unique=True)]
+        if len(candidates):
+            lengths = segment.doc_lengths[candidates].astype(np.float64)
+            total = np.zeros(len(candidates))
+            for term, (docs, tfs) in ordered:
+                positions = np.searchsorted(docs, candidates)
+                total += _bm25(tfs[positions], lengths, idf[term], avgdl)
+            keys.append(segment.doc_keys[candidates])
+            scores.append(total)
+
+    postings = [memory.postings.get(term) for term in terms]
+    if all(postings):
+        matched = set.intersection(*postings)
+        if matched:
+            matched_keys = np.fromiter(matched, dtype=np.int64, count=len(matched))
+            lengths = np.array([memory.docs[key][1] for key in matched_keys], dtype=np.float64)
+            total = np.zeros(len(matched_keys))
+            for term in terms:
+                tf = np.array([memory.docs[key][0][term] for key in matched_keys])
+                total += _bm25(tf, lengths, idf[term], avgdl)
+            keys.append(matched_keys)
+            scores.append(total)
+
+    if not keys:
+        return empty
+    return Matches(np.concatenate(keys), np.concatenate(scores))
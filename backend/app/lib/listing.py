@@ -0,0 +1,108 @@
+# 管理端列表：游标分页与流式导出
+#
+# 列表统一按 (created_at, id) 倒序：
+# - 指定 limit 时返回一页，还有下一页时在响应头 X-Next-Cursor 中返回游标；
+# - 未指定 limit 时以 JSON 数组流式返回全部数据；
+# - format=ndjson 时流式输出，每行一个 JSON 对象；指定 limit 时最多输出 limit 行，同样返回 X-Next-Cursor。
+# 流式响应在响应体发送期间使用独立会话，按 yield_per 分批读取（服务端游标），内存占用与总行数无关。
+import logging
+from datetime import datetime
+from typing import Callable, Iterator, Literal, Optional
+
+from fastapi import HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+
+from app.lib.pagination import decode_cursor, encode_cursor, seek_after
+
+logger = logging.getLogger(__name__)
+
+# 流式读取与写出的批大小
+STREAM_BATCH_SIZE = 500
+
+ListFormat = Literal["json", "ndjson"]
+
+
+def _serialize(
+    bind,
+    build_query: Callable[[Session], Query],
+    schema: type[BaseModel],
+    ndjson: bool,
+    batch_size: int,
+) -> Iterator[str]:
+    # 请求的数据库会话在开始发送响应体前就已关闭，这里单独打开一个
+    with Session(bind=bind) as db:
+        buffer = [] if ndjson else ["["]
+        separator = "" if ndjson else ","
+        first = True
+        try:
+            for row in build_query(db).yield_per(batch_size):
+                item = schema.model_validate(row).model_dump_json()
+                buffer.append(item + "\n" if ndjson else (item if first else separator + item))
+                first = False
+                if len(buffer) >= batch_size:
+                    yield "".join(buffer)
+                    buffer.clear()
+        except Exception:
+            # 响应头已发出，只能中断输出（客户端得到不完整的响应体）
+            logger.exception("Failed to stream list")
+            raise
+        if not ndjson:
+            buffer.append("]")
+        if buffer:
+            yield "".join(buffer)
+
+
+def keyset_list(
+    db: Session,
+    build_query: Callable[[Session], Query],
+    schema: type[BaseModel],
+    response: Response,
+    limit: Optional[int],
+    cursor: Optional[str],
+    format: ListFormat = "json",
+    batch_size: int = STREAM_BATCH_SIZE,
+):
+    """
+    build_query(db) 返回带筛选条件、未排序的查询，模型需有 created_at 与 id
+    返回一页 ORM 对象（由路由的 response_model 序列化）或 StreamingResponse
+    """
+    model = build_query(db).column_descriptions[0]["entity"]
+    after = None
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor, datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的游标")
+        after = seek_after(model.created_at, model.id, created_at, last_id)
+
+    def ordered(session: Session) -> Query:
+        query = build_query(session)
+        if after is not None:
+            query = query.filter(after)
+        return query.order_by(model.created_at.desc(), model.id.desc())
+
+    if format == "ndjson" or limit is None:
+        ndjson = format == "ndjson"
+        headers = {}
+        if limit is not None:
+            # 响应头先于响应体发出：先按索引定位本页最后一行，得到下一页的游标
+            last = ordered(db).with_entities(model.created_at, model.id).offset(limit - 1).first()
+            if last is not None:
+                headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
+        def streamed(session: Session) -> Query:
+            query = ordered(session)
+            return query.limit(limit) if limit is not None else query
+
+        return StreamingResponse(
+            _serialize(db.get_bind(), streamed, schema, ndjson, batch_size),
+            media_type="application/x-ndjson" if ndjson else "application/json",
+            headers=headers,
+        )
+
+    rows = ordered(db).limit(limit).all()
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
@@ -0,0 +1,237 @@
+# MinHash 签名与 LSH 索引（近似重复检测）
+#
+# 文本按 app.lib.text.tokenize 分词（CJK 二元组、拉丁单词），相邻 SHINGLE_SIZE 个词组成 shingle；
+# 对 shingle 集合计算 NUM_PERM 个 MinHash（NumPy 向量化的 multiply-shift 哈希）。
+# 签名分为 BANDS 段，每段 ROWS 个值哈希为一个桶键：两段文本的 Jaccard 相似度为 s 时，
+# 至少一段桶键相同的概率为 1 - (1 - s^ROWS)^BANDS，只需比较同桶的候选，无需遍历全部条目。
+# 条目只保留每个 MinHash 的低 8 位（b-bit MinHash），候选的相似度由低位相同的比例校正估计。
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.lib.text import tokenize
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2
+# shingle 数少于此值的短文本不参与检测（“谢谢”“+1”之类本身就大量重复）
+MIN_SHINGLES = 8
+# 单个桶最多取最近的条目数，避免常见内容形成的大桶拖慢查询
+MAX_BUCKET = 64
+# 新条目累计到此数量时归并进排序数组（同时限制待归并字典的大小）
+MERGE_BATCH = 8192
+# 条目数组的初始槽位数，写满后按倍数扩容直到 capacity
+INITIAL_SLOTS = 1024
+# 签名参数的版本，变化后旧的索引快照作废
+VERSION = 1
+
+_rng = np.random.default_rng(0x6D696E68)  # 固定种子：各进程与快照中的签名一致
+_PERM_A = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(0, 2**63, ROWS, dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+_SHINGLE_MIX = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(32)
+_LOW_BITS = 1 / 256  # 不相同的两个值低 8 位相同的概率
+
+
+@dataclass
+class Signature:
+    bits: np.ndarray  # (NUM_PERM,) uint8：MinHash 低 8 位
+    band_keys: np.ndarray  # (BANDS,) uint32
+
+
+def shingles(text: str) -> np.ndarray:
+    """文本的 shingle 哈希集合（uint64，已去重）"""
+    tokens = tokenize(text)
+    if len(tokens) < SHINGLE_SIZE:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint64, count=len(tokens))
+    windows = sliding_window_view(hashes, SHINGLE_SIZE)
+    combined = windows[:, 0].copy()
+    for column in range(1, SHINGLE_SIZE):
+        combined = combined * _SHINGLE_MIX + windows[:, column]
+    return np.unique(combined)
+
+
+def signature(text: str) -> Optional[Signature]:
+    """计算 MinHash 签名，文本过短时返回 None"""
+    values = shingles(text)
+    if len(values) < MIN_SHINGLES:
+        return None
+    # 折叠为 32 位后做 multiply-shift：(a * x + b) >> 32，在 uint64 上按模 2^64 运算
+    folded = (values ^ (values >> _SHIFT)) & np.uint64(0xFFFFFFFF)
+    hashed = (_PERM_A[:, None] * folded[None, :] + _PERM_B[:, None]) >> _SHIFT
+    minhash = hashed.min(axis=1)
+    band_keys = ((minhash.reshape(BANDS, ROWS) * _BAND_MIX).sum(axis=1) >> _SHIFT).astype(np.uint32)
+    return Signature(bits=(minhash & np.uint64(0xFF)).astype(np.uint8), band_keys=band_keys)
+
+
+def estimate_similarity(bits: np.ndarray, other: np.ndarray) -> np.ndarray:
+    """由 b-bit 签名估计 Jaccard 相似度，other 可为多行"""
+    matches = (other == bits).mean(axis=-1)
+    return np.clip((matches - _LOW_BITS) / (1 - _LOW_BITS), 0.0, 1.0)
+
+
+@dataclass
+class Match:
+    ref: int
+    similarity: float
+
+
+class MinHashIndex:
+    """
+    固定容量的环形索引：写满后新条目覆盖最早的条目，只检测近期内容
+    条目数组按实际条目数扩容（每条约 520 字节，含排序数组），不预先按 capacity 分配
+    桶键存于按段排序的数组（二分查找），新条目先进入字典，累计到一定数量后归并进排序数组
+    线程安全；ref 为调用方定义的整数引用
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0  # 累计写入条目数，第 n 个条目位于槽位 n % capacity
+            self._merged = 0  # 已归并进排序数组的条目数
+            slots = min(self.capacity, INITIAL_SLOTS)
+            self._bits = np.zeros((slots, NUM_PERM), dtype=np.uint8)
+            self._band_keys = np.zeros((slots, BANDS), dtype=np.uint32)
+            self._refs = np.zeros(slots, dtype=np.int64)
+            self._sorted_keys = np.empty((BANDS, 0), dtype=np.uint32)
+            self._sorted_slots = np.empty((BANDS, 0), dtype=np.uint32)
+            self._pending: dict[tuple[int, int], list[int]] = {}
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def _reserve(self, size: int) -> None:
+        """保证条目数组至少有 size 个槽位（不超过 capacity）：未写满时槽位即写入序号，直接复制"""
+        current = len(self._refs)
+        if size <= current:
+            return
+        slots = min(self.capacity, max(size, current * 2))
+        for name in ("_bits", "_band_keys", "_refs"):
+            old = getattr(self, name)
+            grown = np.zeros((slots, *old.shape[1:]), dtype=old.dtype)
+            grown[:current] = old
+            setattr(self, name, grown)
+
+    def add(self, sig: Signature, ref: int) -> None:
+        with self._lock:
+            slot = self.count % self.capacity
+            self._reserve(slot + 1)
+            self._bits[slot] = sig.bits
+            self._band_keys[slot] = sig.band_keys
+            self._refs[slot] = ref
+            for band, key in enumerate(sig.band_keys.tolist()):
+                self._pending.setdefault((band, key), []).append(slot)
+            self.count += 1
+            if self.count - self._merged >= MERGE_BATCH:
+                self._merge()
+
+    def _merge(self) -> None:
+        new = np.arange(self._merged, self.count)
+        if len(new) > self.capacity:
+            new = new[-self.capacity:]
+        new_slots = (new % self.capacity).astype(np.uint32)
+        keys = self._sorted_keys
+        slots = self._sorted_slots
+        # 槽位已被覆盖的旧条目（桶键不再一致）或与新条目槽位相同的旧条目一并移除
+        overwritten = np.zeros(len(self._refs), dtype=bool)
+        overwritten[new_slots] = True
+        merged_keys = np.empty((BANDS, 0), dtype=np.uint32)
+        merged_slots = np.empty((BANDS, 0), dtype=np.uint32)
+        for band in range(BANDS):
+            keep = ~overwritten[slots[band]]
+            band_keys = np.concatenate([keys[band][keep], self._band_keys[new_slots, band]])
+            band_slots = np.concatenate([slots[band][keep], new_slots])
+            # 两段各自有序，稳定排序为线性归并；相同桶键内保持写入先后
+            order = np.argsort(band_keys, kind="stable")
+            if band == 0:
+                merged_keys = np.empty((BANDS, len(order)), dtype=np.uint32)
+                merged_slots = np.empty((BANDS, len(order)), dtype=np.uint32)
+            merged_keys[band] = band_keys[order]
+            merged_slots[band] = band_slots[order]
+        self._sorted_keys = merged_keys
+        self._sorted_slots = merged_slots
+        self._pending.clear()
+        self._merged = self.count
+
+    def _candidates(self, sig: Signature) -> np.ndarray:
+        found = []
+        # 用 np.uint32 标量查找：Python int 会让 searchsorted 先把整行转换为 int64
+        for band, key in enumerate(sig.band_keys):
+            row = self._sorted_keys[band]
+            high = int(row.searchsorted(key, side="right"))
+            low = int(row.searchsorted(key, side="left"))
+            if high > low:
+                found.append(self._sorted_slots[band][max(low, high - MAX_BUCKET):high])
+            pending = self._pending.get((band, int(key)))
+            if pending:
+                found.append(np.asarray(pending[-MAX_BUCKET:], dtype=np.uint32))
+        if not found:
+            return np.empty(0, dtype=np.uint32)
+        slots = np.unique(np.concatenate(found))
+        # 排除已被覆盖、桶键全部不再匹配的槽位
+        valid = (self._band_keys[slots] == sig.band_keys).any(axis=1)
+        return slots[valid]
+
+    def query(self, sig: Signature, threshold: float) -> Optional[Match]:
+        """相似度不低于 threshold 的最相似条目"""
+        with self._lock:
+            slots = self._candidates(sig)
+            if len(slots) == 0:
+                return None
+            similarity = estimate_similarity(sig.bits, self._bits[slots])
+            best = int(np.argmax(similarity))
+            if similarity[best] < threshold:
+                return None
+            return Match(ref=int(self._refs[slots[best]]), similarity=float(similarity[best]))
+
+    def save(self, path: str, **meta: int) -> None:
+        """写入快照（先写临时文件再原子替换），meta 为调用方的附加整数信息"""
+        with self._lock:
+            live = min(self.count, self.capacity)
+            # 按写入先后导出存活条目，载入时按顺序重放
+            order = (np.arange(self.count - live, self.count) % self.capacity) if live else np.empty(0, dtype=np.int64)
+            arrays = {
+                "bits": self._bits[order],
+                "band_keys": self._band_keys[order],
+                "refs": self._refs[order],
+            }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, version=VERSION, **{f"meta_{key}": value for key, value in meta.items()}, **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> Optional[dict[str, int]]:
+        """载入快照，返回保存时的 meta；文件不存在或版本不符时返回 None（索引保持为空）"""
+        self.reset()
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if int(data["version"]) != VERSION:
+                return None
+            bits, band_keys, refs = data["bits"], data["band_keys"], data["refs"]
+            meta = {key[len("meta_"):]: int(data[key]) for key in data.files if key.startswith("meta_")}
+        keep = min(len(refs), self.capacity)
+        with self._lock:
+            self._reserve(keep)
+            if keep:
+                self._bits[:keep] = bits[-keep:]
+                self._band_keys[:keep] = band_keys[-keep:]
+                self._refs[:keep] = refs[-keep:]
+            self.count = keep
+            self._merge()
+        return meta
@@ -0,0 +1,56 @@
+# 游标（keyset）分页工具
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(*values) -> str:
+    """将排序键编码为不透明游标（URL 安全的 base64）"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> list:
+    """解码游标并按 types 转换每个排序键，格式不合法时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("无效的游标") from e
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError("无效的游标")
+
+    values = []
+    for value, type_ in zip(payload, types):
+        if type_ is datetime:
+            if not isinstance(value, str):
+                raise ValueError("无效的游标")
+            values.append(datetime.fromisoformat(value))
+        elif type_ in (int, float):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError("无效的游标")
+            values.append(type_(value))
+        else:
+            if not isinstance(value, type_):
+                raise ValueError("无效的游标")
+            values.append(value)
+    return values
+
+
+def seek_after(key_column, id_column, key_value, id_value, descending: bool = True):
+    """
+    构造 keyset 条件：位于 (key_value, id_value) 之后的行
+    冗余的 key <=/>= 条件让数据库可以直接在 key 索引上定位起点
+    """
+    if descending:
+        return and_(
+            key_column <= key_value,
+            or_(key_column < key_value, and_(key_column == key_value, id_column < id_value)),
+        )
+    return and_(
+        key_column >= key_value,
+        or_(key_column > key_value, and_(key_column == key_value, id_column > id_value)),
+    )
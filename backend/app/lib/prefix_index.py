@@ -0,0 +1,131 @@
+# 前缀索引（输入联想）：有序数组 + 二分查找
+#
+# 每个条目以若干规范化的键登记：完整文本，以及从文本中每个空白分隔的词开始的后缀
+# （“从零开始 React 实战”输入 “react” 也能命中）。键保存在有序列表中，
+# 前缀查询用 bisect 定位区间，在整个区间上取权重最高的前 N 个（堆）；增删为有序列表上的插入/删除
+# （内存移动，条目数在十万级以内足够快）。一两个字符的前缀区间很大，其前 TOP_K 名在首次查询时算出并缓存，
+# 增删以该前缀开头的键时失效。
+import bisect
+import heapq
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Hashable, Optional
+
+# 缓存前 TOP_K 名的前缀长度上限；TOP_K 不小于接口允许的最大条数
+SHORT_PREFIX = 2
+TOP_K = 20
+
+
+def normalize(text: str) -> str:
+    """全角转半角、大小写折叠、合并空白"""
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+
+def keys_for(text: str) -> list[str]:
+    """条目登记的键：完整文本及从每个词开始的后缀（去重）"""
+    words = normalize(text).split(" ")
+    return list(dict.fromkeys(" ".join(words[i:]) for i in range(len(words)) if words[i]))
+
+
+@dataclass
+class Entry:
+    ref: Hashable  # 调用方定义的条目标识
+    text: str
+    weight: float = 1.0
+    data: dict = field(default_factory=dict)
+
+
+class PrefixIndex:
+    """线程安全；同一 ref 重复 add 时替换旧条目"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys: list[tuple[str, int]] = []  # (键, 序号)，序号使同键条目可区分
+            self._entries: dict[int, Entry] = {}
+            self._by_ref: dict[Hashable, tuple[int, list[str]]] = {}
+            self._top: dict[str, list[Entry]] = {}  # 短前缀 -> 前 TOP_K 名
+            self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._by_ref)
+
+    def add(self, entry: Entry) -> None:
+        with self._lock:
+            self._remove(entry.ref)
+            serial = self._next
+            self._next += 1
+            keys = keys_for(entry.text)
+            for key in keys:
+                bisect.insort(self._keys, (key, serial))
+                self._invalidate(key)
+            self._entries[serial] = entry
+            self._by_ref[entry.ref] = (serial, keys)
+
+    def remove(self, ref: Hashable) -> None:
+        with self._lock:
+            self._remove(ref)
+
+    def _remove(self, ref: Hashable) -> None:
+        old = self._by_ref.pop(ref, None)
+        if old is None:
+            return
+        serial, keys = old
+        for key in keys:
+            self._invalidate(key)
+            position = bisect.bisect_left(self._keys, (key, serial))
+            if position < len(self._keys) and self._keys[position] == (key, serial):
+                del self._keys[position]
+        del self._entries[serial]
+
+    def _invalidate(self, key: str) -> None:
+        for length in range(1, SHORT_PREFIX + 1):
+            self._top.pop(key[:length], None)
+
+    def load(self, entries: list[Entry]) -> None:
+        """整体替换（一次排序，比逐条 add 快）"""
+        keys = []
+        entries_by_serial = {}
+        by_ref = {}
+        for serial, entry in enumerate(entries):
+            entry_keys = keys_for(entry.text)
+            keys.extend((key, serial) for key in entry_keys)
+            entries_by_serial[serial] = entry
+            by_ref[entry.ref] = (serial, entry_keys)
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = entries_by_serial
+            self._by_ref = by_ref
+            self._top = {}
+            self._next = len(entries)
+
+    def get(self, ref: Hashable) -> Optional[Entry]:
+        with self._lock:
+            item = self._by_ref.get(ref)
+            return self._entries[item[0]] if item else None
+
+    def query(self, prefix: str, limit: int) -> list[Entry]:
+        """以 prefix 开头的条目，按权重降序、文本长度升序"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        cacheable = len(prefix) <= SHORT_PREFIX and limit <= TOP_K
+        with self._lock:
+            top = self._top.get(prefix) if cacheable else None
+            if top is None:
+                start = bisect.bisect_left(self._keys, (prefix,))
+                # 前缀区间的上界：在 prefix 之后追加最大码点
+                end = bisect.bisect_left(self._keys, (prefix + "\U0010ffff",), start)
+                serials = dict.fromkeys(serial for _, serial in self._keys[start:end])
+                top = heapq.nsmallest(
+                    TOP_K if cacheable else limit, (self._entries[serial] for serial in serials),
+                    key=lambda entry: (-entry.weight, len(entry.text)),
+                )
+                if cacheable:
+                    self._top[prefix] = top
+        return top[:limit]
@@ -0,0 +1,74 @@
+# 只读快照文件：一个文件内保存多段预先编码好的字节，各 worker 以 mmap 映射后按名称读取
+#
+# 布局：MAGIC | 头部长度（uint32，小端）| 头部 JSON | 各段数据
+# 头部 JSON：{"meta": 调用方的元数据, "parts": {名称: [相对数据区的偏移, 长度]}}
+# 写入时先写临时文件再原子替换；已映射旧文件的进程继续读取旧内容，直到发现文件变化后重新映射。
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+MAGIC = b"SNAP0001"
+_LENGTH = struct.Struct("<I")
+
+
+def write(path: Path, meta: dict, parts: dict[str, bytes]) -> None:
+    path = Path(path)
+    offsets = {}
+    position = 0
+    for name, data in parts.items():
+        offsets[name] = [position, len(data)]
+        position += len(data)
+    header = json.dumps({"meta": meta, "parts": offsets}, ensure_ascii=False).encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_LENGTH.pack(len(header)))
+            f.write(header)
+            for data in parts.values():
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def identity(st: os.stat_result) -> tuple:
+    """文件是否被替换的判断依据"""
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class MappedSnapshot:
+    """映射一个快照文件；不主动关闭，最后一个引用释放时映射随之释放（其他线程可能仍在读取）"""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self.identity = identity(os.fstat(f.fileno()))
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"快照文件格式不正确: {path}")
+        start = len(MAGIC) + _LENGTH.size
+        (length,) = _LENGTH.unpack_from(self._map, len(MAGIC))
+        header = json.loads(self._map[start:start + length])
+        self.meta: dict = header["meta"]
+        self._base = start + length
+        self._parts: dict[str, list[int]] = header["parts"]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._parts
+
+    def read(self, name: str) -> Optional[bytes]:
+        """读取一段（从页缓存复制到新的 bytes，同一文件的页在各 worker 间共享）"""
+        item = self._parts.get(name)
+        if item is None:
+            return None
+        offset, length = item
+        return self._map[self._base + offset:self._base + offset + length]
@@ -0,0 +1,103 @@
+# Snowflake 风格的 64 位 id：毫秒时间戳（41 位，自 EPOCH_MS 起）| worker id（10 位）| 毫秒内序号（12 位）
+#
+# 同一 worker id 同一时刻只由一个生成器使用（由调用方保证，见 app.services.order_numbers 的租约）。
+# 生成器只在 [not_before_ms, valid_until_ms) 内分配时间戳：接手一个 worker id 时从上一个持有者的租约到期时间开始，
+# 自己的租约到期后拒绝分配，因此先后持有同一 worker id 的进程分配的 id 不会重叠，与各主机的时钟偏差无关。
+# 时钟回拨或一毫秒内序号用尽时沿用/推进上一次的时间戳，id 始终严格递增，不需要等待。
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKERS = 1 << WORKER_BITS
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford Base32（不含 I、L、O、U，避免人工抄写时混淆）；63 位 id 固定编码为 13 位，字符串顺序与数值顺序一致
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ENCODED_LENGTH = 13
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+_DECODE.update({"I": 1, "L": 1, "O": 0})
+
+
+class LeaseExpired(RuntimeError):
+    """生成器持有 worker id 的期限已过，需续期后才能继续分配"""
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+class Snowflake:
+    def __init__(
+        self,
+        worker_id: int,
+        not_before_ms: int = 0,
+        valid_until_ms: Optional[int] = None,
+        clock: Callable[[], int] = now_ms,
+    ):
+        if not 0 <= worker_id < MAX_WORKERS:
+            raise ValueError(f"worker id 超出范围: {worker_id}")
+        self.worker_id = worker_id
+        self.valid_until_ms = valid_until_ms
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ms = max(not_before_ms, EPOCH_MS)
+        self._sequence = -1
+
+    @property
+    def last_ms(self) -> int:
+        """已分配的 id 中最大的时间戳（尚未分配时为起始时间）"""
+        return self._ms
+
+    def extend(self, valid_until_ms: int) -> None:
+        """租约续期"""
+        with self._lock:
+            self.valid_until_ms = max(self.valid_until_ms or 0, valid_until_ms)
+
+    def next_id(self) -> int:
+        with self._lock:
+            now = self._clock()
+            if now > self._ms:
+                ms, sequence = now, 0
+            elif self._sequence < MAX_SEQUENCE:
+                ms, sequence = self._ms, self._sequence + 1
+            else:
+                # 本毫秒的序号用尽（或时钟回拨后用尽），借用下一毫秒
+                ms, sequence = self._ms + 1, 0
+            if self.valid_until_ms is not None and ms >= self.valid_until_ms:
+                raise LeaseExpired(f"worker id {self.worker_id} 的租约已过期")
+            self._ms, self._sequence = ms, sequence
+        return ((ms - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | sequence
+
+
+def parts(value: int) -> tuple[int, int, int]:
+    """id -> (毫秒时间戳, worker id, 序号)"""
+    return (
+        (value >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS,
+        (value >> SEQUENCE_BITS) & (MAX_WORKERS - 1),
+        value & MAX_SEQUENCE,
+    )
+
+
+def timestamp(value: int) -> datetime:
+    return datetime.fromtimestamp(parts(value)[0] / 1000, tz=timezone.utc)
+
+
+_SHIFTS = range(5 * (ENCODED_LENGTH - 1), -1, -5)
+
+
+def encode(value: int) -> str:
+    return "".join([ALPHABET[(value >> shift) & 31] for shift in _SHIFTS])
+
+
+def decode(text: str) -> int:
+    """encode 的逆运算，不区分大小写，I/L 视为 1、O 视为 0；字符不合法时抛出 ValueError"""
+    value = 0
+    for char in text.upper():
+        if char not in _DECODE:
+            raise ValueError(f"无效的字符: {char}")
+        value = value * 32 + _DECODE[char]
+    return value
@@ -0,0 +1,60 @@
+# 文本处理工具（CJK 感知）
+import re
+
+# 中日韩文字：统一表意文字（含扩展 A、兼容区）、日文假名、韩文音节
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+
+# 连续的 CJK 字符为一段；其余按“字母数字”切分为单词（不含下划线）
+_SEGMENT_RE = re.compile(rf"([{_CJK}]+)|([^\W_{_CJK}]+)")
+
+
+def split_segments(text: str) -> list[tuple[str, bool]]:
+    """将文本切分为 (片段, 是否为 CJK) 列表，拉丁单词统一转为小写"""
+    segments = []
+    for match in _SEGMENT_RE.finditer(text or ""):
+        cjk, word = match.groups()
+        if cjk:
+            segments.append((cjk, True))
+        else:
+            segments.append((word.lower(), False))
+    return segments
+
+
+def cjk_bigrams(run: str) -> list[str]:
+    """CJK 连续片段切分为重叠二元组，单字片段保留原字"""
+    if len(run) < 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text: str) -> list[str]:
+    """分词：CJK 使用二元组，拉丁文字按单词（小写）"""
+    tokens = []
+    for segment, is_cjk in split_segments(text):
+        if is_cjk:
+            tokens.extend(cjk_bigrams(segment))
+        else:
+            tokens.append(segment)
+    return tokens
+
+
+def index_tokens(text: str) -> list[str]:
+    """建索引用的分词：在 tokenize 的基础上，两字及以上的 CJK 片段在二元组之后再追加各个单字，
+    单字查询（按 tokenize 即为该字）也能命中；单字排在该段二元组之后，不影响二元组短语的相邻位置"""
+    tokens = []
+    for segment, is_cjk in split_segments(text):
+        if is_cjk:
+            tokens.extend(cjk_bigrams(segment))
+            if len(segment) > 1:
+                tokens.extend(segment)
+        else:
+            tokens.append(segment)
+    return tokens
+
+
+def count_words(text: str) -> int:
+    """统计字数：每个 CJK 字符计 1，拉丁文字按单词计"""
+    total = 0
+    for segment, is_cjk in split_segments(text):
+        total += len(segment) if is_cjk else 1
+    return total
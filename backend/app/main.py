@@ -5,26 +5,152 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.middleware import SlowAPIMiddleware
 from app.core.config import settings
 from app.core.logging_config import setup_logging
 from app.core.limiter import limiter
+from app.core import tasks
 from app.db.base import create_tables
-from app.api.routes import auth, blog, forum, projects, portfolio, services, contact, users
+from app.db.session import SessionLocal
+from app.api.routes import auth, blog, forum, projects, portfolio, services, contact, users, search, home, media
+from app.services import (
+    catalog_snapshots, comment_events, counters, homepage, image_variants, intake, near_duplicates, order_numbers,
+    site_search, suggest, topic_activity, view_buffer,
+)
 
 # 配置日志
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
+def reconcile_counters():
+    """定期用 COUNT 校准计数器"""
+    with SessionLocal() as db:
+        counters.reconcile(db)
+
+
+def flush_topic_views():
+    """把当前 worker 缓冲的话题浏览量写回数据库"""
+    with SessionLocal() as db:
+        view_buffer.flush(db)
+
+
+def recompute_topic_activity():
+    """定期重算话题评论数、最后活跃时间与热度分"""
+    with SessionLocal() as db:
+        topic_activity.recompute(db)
+
+
+def load_near_duplicates():
+    """载入近似重复索引快照"""
+    with SessionLocal() as db:
+        near_duplicates.load(db, settings.NEAR_DUPLICATE_INDEX_PATH)
+
+
+def sync_near_duplicates():
+    """补读新增内容到近似重复索引"""
+    with SessionLocal() as db:
+        near_duplicates.sync(db)
+
+
+def save_near_duplicates():
+    """补读新增内容并保存近似重复索引快照"""
+    sync_near_duplicates()
+    near_duplicates.save(settings.NEAR_DUPLICATE_INDEX_PATH)
+
+
+def maintain_site_search():
+    """没有索引段或段之后的变更过多时重建站内搜索索引"""
+    with SessionLocal() as db:
+        site_search.index.maintain(db, settings.SEARCH_INDEX_REBUILD_CHANGES)
+
+
+def maintain_catalog_snapshots():
+    """没有目录快照或快照过期时重建（与请求使用同一个会话工厂的连接）"""
+    with SessionLocal() as db:
+        catalog_snapshots.snapshots.maintain(db.get_bind())
+
+
+def renew_order_worker():
+    """续期订单号生成器的 worker id 租约（尚未领取时领取）"""
+    with SessionLocal() as db:
+        order_numbers.order_numbers.renew(db)
+
+
+def drain_intake():
+    """把本机队列中的询价与联系表单写入数据库"""
+    with SessionLocal() as db:
+        intake.drain(db)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_tables()
     logger.info("数据库表创建完成")
+    tasks.start_periodic("drain-intake", settings.INTAKE_DRAIN_INTERVAL, drain_intake)
+    if settings.SMTP_HOST:
+        tasks.start_periodic("send-contact-notifications", settings.INTAKE_DRAIN_INTERVAL, intake.send_notifications)
+    tasks.start_periodic("reconcile-counters", settings.COUNTER_RECONCILE_INTERVAL, reconcile_counters)
+    tasks.start_periodic("flush-topic-views", settings.VIEW_FLUSH_INTERVAL, flush_topic_views)
+    tasks.start_periodic(
+        "recompute-topic-activity", settings.TOPIC_ACTIVITY_RECOMPUTE_INTERVAL, recompute_topic_activity
+    )
+    tasks.start("comment-feed", comment_events.feed.run(SessionLocal, settings.COMMENT_STREAM_POLL_INTERVAL))
+    if settings.NEAR_DUPLICATE_ACTION != "off":
+        load_near_duplicates()
+        # 快照之后（或没有快照时近期）的内容在后台补读，不阻塞启动
+        tasks.start("sync-near-duplicates", run_in_threadpool(sync_near_duplicates))
+        tasks.start_periodic("save-near-duplicates", settings.NEAR_DUPLICATE_SAVE_INTERVAL, save_near_duplicates)
+    site_search.index.reset()
+    suggest.suggester.reset()
+    homepage.reset()
+    image_variants.derivatives.reset()
+    catalog_snapshots.snapshots.reset()
+    try:
+        with SessionLocal() as db:
+            order_numbers.order_numbers.start(db)
+    except Exception:
+        # 领取之前创建订单会失败，续期任务会重试
+        logger.exception("领取订单号 worker id 失败")
+    tasks.start_periodic("renew-order-worker", settings.ORDER_WORKER_LEASE_SECONDS / 3, renew_order_worker)
+    # 启动时同步检查，之后的列表请求都能直接读取快照
+    try:
+        maintain_catalog_snapshots()
+    except Exception:
+        logger.exception("建立目录快照失败")
+    tasks.start_periodic(
+        "maintain-catalog-snapshots", settings.CATALOG_SNAPSHOT_CHECK_INTERVAL, maintain_catalog_snapshots
+    )
+    # 没有索引段时在后台建立，完成之前只能搜到变更日志中记录的内容
+    tasks.start("build-site-search", run_in_threadpool(maintain_site_search))
+    tasks.start_periodic("compact-site-search", settings.SEARCH_INDEX_COMPACT_INTERVAL, maintain_site_search)
     logger.info("API 服务启动成功")
     yield
+    await tasks.stop_all()
+    image_variants.derivatives.shutdown()
+    try:
+        with SessionLocal() as db:
+            order_numbers.order_numbers.stop(db)
+    except Exception:
+        logger.exception("释放订单号 worker id 失败")
+    try:
+        flush_topic_views()
+    except Exception:
+        logger.exception("关闭前写回浏览量失败")
+    if settings.INTAKE_DRAIN_INTERVAL > 0:
+        # 未写入的提交留在队列文件中，下次启动后继续写入
+        try:
+            drain_intake()
+        except Exception:
+            logger.exception("关闭前写入表单提交失败")
+    if settings.NEAR_DUPLICATE_ACTION != "off":
+        try:
+            near_duplicates.save(settings.NEAR_DUPLICATE_INDEX_PATH)
+        except Exception:
+            logger.exception("关闭前保存近似重复索引失败")
     logger.info("API 服务关闭")
 
 
@@ -47,6 +173,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -113,6 +240,9 @@ app.include_router(portfolio.router, prefix="/api")
 app.include_router(services.router, prefix="/api")
 app.include_router(contact.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(home.router, prefix="/api")
+app.include_router(media.router, prefix="/api")
 
 
 @app.get("/")
@@ -132,4 +262,5 @@ def health_check_detailed():
         "status": "healthy",
         "version": "1.0.0",
         "timestamp": datetime.now(timezone.utc).isoformat(),
+        "intake_queue": intake.stats(),
     }
@@ -0,0 +1,168 @@
+# 后台维护命令
+#
+# 用法（在 backend 目录下执行）:
+#   python -m app.manage rebuild-search-index
+#   python -m app.manage reconcile-counters
+#   python -m app.manage render-posts [--force] [--workers N]
+#   python -m app.manage recompute-topic-activity
+#   python -m app.manage backfill-comment-paths
+#   python -m app.manage rebuild-site-search
+#   python -m app.manage backfill-project-tags
+#   python -m app.manage generate-image-variants
+#   python -m app.manage rebuild-catalog-snapshot
+import argparse
+import logging
+
+from app.core.logging_config import setup_logging
+from app.db.base import create_tables
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_search_index(args: argparse.Namespace) -> None:
+    """重建文章全文索引"""
+    from app.services import post_search
+
+    with SessionLocal() as db:
+        count = post_search.rebuild_index(db, batch_size=args.batch_size)
+    print(f"已重建 {count} 篇文章的全文索引")
+
+
+def reconcile_counters(args: argparse.Namespace) -> None:
+    """用 COUNT 校准全部计数器"""
+    from app.services import counters
+
+    with SessionLocal() as db:
+        fixed = counters.reconcile(db)
+    print(f"计数校准完成，修正 {fixed} 个计数")
+
+
+def render_posts(args: argparse.Namespace) -> None:
+    """回填/重渲染文章 HTML（多进程）"""
+    from app.services import markdown_render
+
+    with SessionLocal() as db:
+        count = markdown_render.rerender_posts(
+            db, force=args.force, workers=args.workers, batch_size=args.batch_size
+        )
+    print(f"已渲染 {count} 篇文章")
+
+
+def recompute_topic_activity(args: argparse.Namespace) -> None:
+    """重算话题评论数、最后活跃时间与热度分"""
+    from app.services import topic_activity
+
+    with SessionLocal() as db:
+        count = topic_activity.recompute(db)
+    print(f"已更新 {count} 个话题的活跃度")
+
+
+def backfill_comment_paths(args: argparse.Namespace) -> None:
+    """为旧评论补全楼中楼层级字段"""
+    from app.services import comment_threads
+
+    with SessionLocal() as db:
+        count = comment_threads.backfill_paths(db)
+    print(f"已补全 {count} 条评论的层级字段")
+
+
+def rebuild_site_search(args: argparse.Namespace) -> None:
+    """重建站内搜索索引段"""
+    from app.services import site_search
+
+    with SessionLocal() as db:
+        count = site_search.index.rebuild(db, batch_size=args.batch_size)
+    if count is None:
+        print("其他进程正在重建站内搜索索引")
+    else:
+        print(f"已重建站内搜索索引，共 {count} 个文档")
+
+
+def backfill_project_tags(args: argparse.Namespace) -> None:
+    """由项目的 tech_stack 重建技术栈标签关联并校准项目数"""
+    from app.services import project_tags
+
+    with SessionLocal() as db:
+        count = project_tags.backfill(db, batch_size=args.batch_size)
+    print(f"已为 {count} 个项目重建技术栈标签")
+
+
+def generate_image_variants(args: argparse.Namespace) -> None:
+    """为文章封面、项目封面与作品图中的本地图片预先生成派生版本（已生成的跳过）"""
+    from app.models.models import Portfolio, Post, Project
+    from app.services import image_variants
+
+    with SessionLocal() as db:
+        urls = {
+            url
+            for column in (Post.cover_image, Project.cover_image, Portfolio.image_url)
+            for (url,) in db.query(column).filter(column.isnot(None)).distinct()
+        }
+    derivatives = image_variants.derivatives
+    try:
+        for url in urls:
+            derivatives.variants(url)
+        print(f"共 {len(urls)} 个图片地址，提交生成 {derivatives.pending()} 张")
+        derivatives.wait()
+        ready = sum(derivatives.variants(url) is not None for url in urls)
+    finally:
+        derivatives.shutdown()
+    print(f"已有派生版本的图片 {ready} 张（外部链接、缺失或无法处理的原图不计）")
+    rebuild_catalog_snapshot(args)
+
+
+def rebuild_catalog_snapshot(args: argparse.Namespace) -> None:
+    """重建项目、作品集、服务列表的快照"""
+    from app.db.session import engine
+    from app.services import catalog_snapshots
+
+    version = catalog_snapshots.snapshots.rebuild(engine)
+    print(f"已重建目录快照（版本 {version}）: {catalog_snapshots.snapshots.path}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description="后台维护命令")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    cmd = subparsers.add_parser("rebuild-search-index", help="重建文章全文索引")
+    cmd.add_argument("--batch-size", type=int, default=500)
+    cmd.set_defaults(func=rebuild_search_index)
+
+    cmd = subparsers.add_parser("reconcile-counters", help="校准列表计数器")
+    cmd.set_defaults(func=reconcile_counters)
+
+    cmd = subparsers.add_parser("render-posts", help="回填或重渲染文章 HTML")
+    cmd.add_argument("--force", action="store_true", help="忽略内容哈希，全部重渲染（渲染配置变更后使用）")
+    cmd.add_argument("--workers", type=int, default=None, help="进程数，默认为 CPU 核数")
+    cmd.add_argument("--batch-size", type=int, default=200)
+    cmd.set_defaults(func=render_posts)
+
+    cmd = subparsers.add_parser("recompute-topic-activity", help="重算话题活跃度与热度分")
+    cmd.set_defaults(func=recompute_topic_activity)
+
+    cmd = subparsers.add_parser("backfill-comment-paths", help="为旧评论补全楼中楼层级字段")
+    cmd.set_defaults(func=backfill_comment_paths)
+
+    cmd = subparsers.add_parser("rebuild-site-search", help="重建站内搜索索引段")
+    cmd.add_argument("--batch-size", type=int, default=1000)
+    cmd.set_defaults(func=rebuild_site_search)
+
+    cmd = subparsers.add_parser("backfill-project-tags", help="由项目的技术栈重建标签关联与项目数")
+    cmd.add_argument("--batch-size", type=int, default=500)
+    cmd.set_defaults(func=backfill_project_tags)
+
+    cmd = subparsers.add_parser("generate-image-variants", help="预先生成本地图片的派生版本")
+    cmd.set_defaults(func=generate_image_variants)
+
+    cmd = subparsers.add_parser("rebuild-catalog-snapshot", help="重建项目、作品集、服务列表的快照")
+    cmd.set_defaults(func=rebuild_catalog_snapshot)
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    create_tables()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
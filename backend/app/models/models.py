@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON, Index
+from sqlalchemy import BigInteger, Column, Integer, Float, String, Text, DateTime, ForeignKey, Boolean, JSON, Index, DDL, event
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime, timedelta
 
@@ -26,6 +26,7 @@ class User(Base):
 
     __table_args__ = (
         Index("idx_users_role", "role"),
+        Index("idx_users_created_at", "created_at"),
     )
 
     posts = relationship("Post", back_populates="author")
@@ -46,6 +47,13 @@ class Post(Base):
     cover_image = Column(String, nullable=True)
     published = Column(Boolean, default=False)
     author_id = Column(Integer, ForeignKey("users.id"))
+    # 写入时预渲染的结果（见 app/services/markdown_render.py）
+    content_html = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    toc = Column(JSON, nullable=True)
+    word_count = Column(Integer, default=0)
+    reading_time = Column(Integer, default=1)
+    auto_excerpt = Column(Text, nullable=True)  # excerpt 为空时列表使用的自动摘要
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -53,6 +61,8 @@ class Post(Base):
         Index("idx_posts_published", "published"),
         Index("idx_posts_author_id", "author_id"),
         Index("idx_posts_created_at", "created_at"),
+        # 公开列表按发布状态过滤后按时间倒序，复合索引可直接定位游标位置
+        Index("idx_posts_published_created_at", "published", "created_at"),
     )
 
     author = relationship("User", back_populates="posts")
@@ -66,6 +76,10 @@ class Topic(Base):
     content = Column(Text)
     author_id = Column(Integer, ForeignKey("users.id"))
     views = Column(Integer, default=0)
+    # 活跃度冗余字段（见 app/services/topic_activity.py）
+    comment_count = Column(Integer, default=0)
+    last_activity_at = Column(DateTime, default=datetime.utcnow)
+    hot_score = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -73,6 +87,10 @@ class Topic(Base):
         Index("idx_topics_author_id", "author_id"),
         Index("idx_topics_created_at", "created_at"),
         Index("idx_topics_views", "views"),
+        # 各排序方式按 (排序键, id) 游标分页
+        Index("idx_topics_last_activity_at", "last_activity_at", "id"),
+        Index("idx_topics_hot_score", "hot_score", "id"),
+        Index("idx_topics_comment_count", "comment_count", "id"),
     )
 
     author = relationship("User", back_populates="topics")
@@ -87,6 +105,11 @@ class Comment(Base):
     author_id = Column(Integer, ForeignKey("users.id"))
     topic_id = Column(Integer, ForeignKey("topics.id"), nullable=True)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=True)
+    # 楼中楼：物化路径（见 app/services/comment_threads.py）
+    parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
+    thread_id = Column(Integer, nullable=True)  # 所属顶层评论 id（顶层评论为自身 id）
+    depth = Column(Integer, default=0)
+    path = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     __table_args__ = (
@@ -94,6 +117,13 @@ class Comment(Base):
         Index("idx_comments_topic_id", "topic_id"),
         Index("idx_comments_post_id", "post_id"),
         Index("idx_comments_created_at", "created_at"),
+        # 话题评论按时间分页（正序/倒序均走此索引）
+        Index("idx_comments_topic_created_at", "topic_id", "created_at"),
+        # 顶层评论分页
+        Index("idx_comments_topic_depth_created_at", "topic_id", "depth", "created_at"),
+        # 子树读取：路径前缀范围查询；按楼取前 N 条回复
+        Index("idx_comments_path", "path"),
+        Index("idx_comments_thread_path", "thread_id", "path"),
     )
 
     author = relationship("User", back_populates="comments")
@@ -128,6 +158,33 @@ class Project(Base):
     author = relationship("User", back_populates="projects")
 
 
+class Tag(Base):
+    """技术栈标签（由 Project.tech_stack 规范化而来，项目数为冗余计数）"""
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String(100), unique=True, nullable=False)  # 规范化后的名称（小写、合并空白）
+    name = Column(String(100), nullable=False)  # 首次出现时的写法
+    project_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("idx_tags_project_count", "project_count"),
+    )
+
+
+class ProjectTag(Base):
+    """项目与技术栈标签的关联"""
+    __tablename__ = "project_tags"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
+
+    __table_args__ = (
+        # 按标签查项目（主键为 project_id, tag_id，按项目查标签）
+        Index("idx_project_tags_tag_project", "tag_id", "project_id"),
+    )
+
+
 class Portfolio(Base):
     __tablename__ = "portfolio"
 
@@ -186,13 +243,18 @@ class Inquiry(Base):
     description = Column(Text)
     status = Column(String, default="pending")
     notes = Column(Text, nullable=True)
+    intake_key = Column(String(80), nullable=True)  # 表单提交的幂等键（见 app.services.intake），唯一
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
-        Index("idx_inquiries_status", "status"),
-        Index("idx_inquiries_service_id", "service_id"),
         Index("idx_inquiries_created_at", "created_at"),
+        # 唯一索引而不是列约束：已有部署由迁移建出同名索引（SQLite 不能 ALTER 添加约束）
+        Index("idx_inquiries_intake_key", "intake_key", unique=True),
+        # 管理端收件箱按状态/服务筛选后按时间倒序分页，复合索引可直接定位游标位置；
+        # 按状态计数只需扫描 status 索引
+        Index("idx_inquiries_status_created_at", "status", "created_at"),
+        Index("idx_inquiries_service_created_at", "service_id", "created_at"),
     )
 
     service = relationship("Service")
@@ -227,5 +289,51 @@ class Order(Base):
     service = relationship("Service")
 
 
+class Counter(Base):
+    """计数器（列表总数等，由写入路由在同一事务中维护，定期校准）"""
+    __tablename__ = "counters"
+
+    key = Column(String, primary_key=True)
+    value = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SearchChange(Base):
+    """站内搜索变更日志（与业务写入在同一事务中记录，各 worker 据此更新内存中的增量索引）"""
+    __tablename__ = "search_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    doc_type = Column(String(20), nullable=False)
+    doc_id = Column(Integer, nullable=False)
+
+
+class WorkerLease(Base):
+    """订单号生成器的 worker id 租约（各进程启动时领取并定期续期，worker id 从 0 起连续分配）"""
+    __tablename__ = "worker_leases"
+
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, nullable=False)  # 主机名:进程号:随机串
+    expires_at = Column(BigInteger, nullable=False)  # 毫秒时间戳；持有者只分配此时间之前的 id
+
+
 # 修复关系
 Post.comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
+
+
+# 文章全文检索索引（内容由 app.services.post_search 维护）
+# SQLite: FTS5 虚拟表，rowid 即文章ID；PostgreSQL: tsvector + GIN 索引
+event.listen(Base.metadata, "after_create", DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, body, tokenize='unicode61')"
+).execute_if(dialect="sqlite"))
+event.listen(Base.metadata, "before_drop", DDL(
+    "DROP TABLE IF EXISTS posts_fts"
+).execute_if(dialect="sqlite"))
+event.listen(Base.metadata, "after_create", DDL(
+    "CREATE TABLE IF NOT EXISTS post_search ("
+    "post_id INTEGER PRIMARY KEY REFERENCES posts(id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL); "
+    "CREATE INDEX IF NOT EXISTS idx_post_search_document ON post_search USING GIN (document)"
+).execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "before_drop", DDL(
+    "DROP TABLE IF EXISTS post_search"
+).execute_if(dialect="postgresql"))
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.portfolio import PortfolioResponse
+from app.schemas.post import PostSummary
+from app.schemas.project import ProjectResponse
+from app.schemas.service import ServiceResponse
+
+
+class HomeResponse(BaseModel):
+    featured_projects: List[ProjectResponse]
+    latest_posts: List[PostSummary]
+    portfolio: List[PortfolioResponse]
+    services: List[ServiceResponse]
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class ImageSource(BaseModel):
+    type: str = Field(..., description="MIME 类型，如 image/avif")
+    srcset: str = Field(..., description="各宽度的派生图片，可直接用于 <source srcset>")
+
+
+class ImageVariants(BaseModel):
+    """本地原图的派生版本；生成完成之前（或外部图片）为 null，此时使用原图。由路由填入（见 app.services.image_variants）"""
+    width: int = Field(..., description="原图宽度（已按 EXIF 方向校正）")
+    height: int = Field(..., description="原图高度")
+    placeholder: str = Field(..., description="低清占位图（data URI）")
+    sources: List[ImageSource] = Field(default_factory=list, description="按推荐顺序排列的格式")
+
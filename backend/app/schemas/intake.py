@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+
+class IntakeAccepted(BaseModel):
+    """表单提交已写入队列（稍后写入数据库）"""
+    key: str = Field(..., description="幂等键；重试时放在 Idempotency-Key 请求头中可避免重复提交")
+    message: str
+
+
+class IntakeQueueStats(BaseModel):
+    depth: int = Field(..., description="队列中尚未写入数据库的提交数")
+    oldest_age: float = Field(..., description="最早一条已等待的秒数")
+    retrying: int = Field(..., description="写入失败、等待重试的提交数")
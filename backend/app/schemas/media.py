@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class MediaUploadResponse(BaseModel):
+    url: str = Field(..., description="图片地址，可填入 cover_image / image_url；由内容决定，相同文件地址相同")
+    sha256: str = Field(..., description="文件内容的 SHA-256")
+    size: int = Field(..., description="文件大小（字节）")
+    content_type: str = Field(..., description="按文件头识别的类型")
+    width: int
+    height: int
+    deduplicated: bool = Field(..., description="是否已存在相同的文件（本次未重复保存）")
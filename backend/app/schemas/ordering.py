@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List
+
+
+class ReorderRequest(BaseModel):
+    """拖拽排序后的完整顺序"""
+    ids: List[int] = Field(..., min_length=1, max_length=5000, description="集合中全部条目的 id，按新顺序排列")
+
+    @field_validator("ids")
+    @classmethod
+    def validate_unique(cls, v):
+        if len(set(v)) != len(v):
+            raise ValueError("id 列表中有重复")
+        return v
+
+
+class ReorderResponse(BaseModel):
+    updated: int = Field(..., description="排序值被改写的条目数")
+    rebalanced: bool = Field(..., description="是否整体重新编号（排名间隔用尽时）")
@@ -2,6 +2,11 @@ from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from datetime import datetime
 from typing import Optional
 
+from app.schemas.image import ImageVariants
+
+# 有效的作品集分类列表
+VALID_CATEGORIES = {"design", "photography", "illustration", "ui-ux", "3d", "video", "other"}
+
 
 class PortfolioBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=100, description="作品标题")
@@ -28,5 +33,6 @@ class PortfolioUpdate(BaseModel):
 class PortfolioResponse(PortfolioBase):
     id: int
     created_at: datetime
+    image_variants: Optional[ImageVariants] = Field(None, description="作品图的响应式版本与占位图")
 
     model_config = ConfigDict(from_attributes=True)
@@ -1,8 +1,10 @@
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List, Dict, Union
 import re
 
+from app.schemas.image import ImageVariants
+
 
 class PostBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=200, description="文章标题")
@@ -38,12 +40,36 @@ class PostResponse(PostBase):
     author_id: int
     created_at: datetime
     updated_at: datetime
+    cover_image_variants: Optional[ImageVariants] = Field(None, description="封面图的响应式版本与占位图")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PostDetailResponse(PostResponse):
+    content_html: str = Field(..., description="预渲染并过滤后的 HTML")
+    toc: List[Dict[str, Any]] = Field(default_factory=list, description="目录（level/id/name/children）")
+    word_count: int = Field(0, description="字数（中文按字、英文按词）")
+    reading_time: int = Field(1, description="预计阅读分钟数")
+
+
+class PostSummary(BaseModel):
+    """列表摘要视图：不含正文"""
+    id: int
+    title: str
+    slug: str
+    excerpt: Optional[str] = None
+    cover_image: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    cover_image_variants: Optional[ImageVariants] = Field(None, description="封面图的响应式版本与占位图")
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class PostListResponse(BaseModel):
-    posts: List[PostResponse]
+    posts: List[Union[PostResponse, PostSummary]]
     total: int
     page: int
     limit: int
+    highlights: Optional[Dict[str, str]] = Field(None, description="搜索命中片段（按 slug）")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多数据时为空")
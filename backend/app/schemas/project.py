@@ -2,6 +2,8 @@ from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional, List
 
+from app.schemas.image import ImageVariants
+
 
 class ProjectBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100, description="项目名称")
@@ -37,6 +39,7 @@ class ProjectResponse(ProjectBase):
     author_id: int
     created_at: datetime
     updated_at: datetime
+    cover_image_variants: Optional[ImageVariants] = Field(None, description="封面图的响应式版本与占位图")
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -44,3 +47,9 @@ class ProjectResponse(ProjectBase):
 class ProjectListResponse(BaseModel):
     projects: List[ProjectResponse]
     total: int
+
+
+class TechFacet(BaseModel):
+    name: str = Field(..., description="技术名称（首次出现时的写法）")
+    slug: str = Field(..., description="规范化名称，可用于 tech 筛选参数")
+    count: int = Field(..., description="使用该技术的项目数")
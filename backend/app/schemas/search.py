@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+
+SearchType = Literal["post", "topic", "comment", "project", "portfolio", "service"]
+
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: int
+    title: Optional[str] = Field(None, description="标题；评论为空")
+    snippet: str = Field(..., description="命中片段")
+    score: float = Field(..., description="BM25 相关度")
+    slug: Optional[str] = Field(None, description="文章、项目、服务的 slug")
+    topic_id: Optional[int] = Field(None, description="评论所属话题")
+    post_id: Optional[int] = Field(None, description="评论所属文章")
+
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int = Field(..., description="当前类型筛选下的命中总数")
+    facets: Dict[str, int] = Field(..., description="各类型命中数（不受类型筛选影响）")
+    results: List[SearchHit]
+
+
+class SuggestItem(BaseModel):
+    type: Literal["post", "project", "tech", "category"]
+    text: str
+    id: Optional[int] = Field(None, description="文章、项目的 id")
+    slug: Optional[str] = Field(None, description="文章、项目的 slug")
+    count: Optional[int] = Field(None, description="技术栈、分类的使用次数")
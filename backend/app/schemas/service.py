@@ -1,6 +1,9 @@
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Literal, Optional, List
+
+# 询价状态：新提交的为 pending
+InquiryStatus = Literal["pending", "contacted", "in_progress", "completed", "cancelled"]
 
 
 class ServiceBase(BaseModel):
@@ -77,6 +80,11 @@ class InquiryResponse(InquiryBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class InquiryStatusCounts(BaseModel):
+    total: int
+    by_status: dict[str, int] = Field(..., description="各状态的询价数（没有询价的状态为 0）")
+
+
 class OrderBase(BaseModel):
     service_id: int = Field(..., description="服务ID")
     total_amount: int = Field(..., ge=0, description="订单金额")
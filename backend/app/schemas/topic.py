@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from datetime import datetime
 from typing import Optional, List
 
@@ -21,6 +21,8 @@ class TopicResponse(TopicBase):
     id: int
     author_id: int
     views: int
+    comment_count: int = Field(0, description="评论数")
+    last_activity_at: Optional[datetime] = Field(None, description="最后活跃时间（最新评论或发布时间）")
     created_at: datetime
     updated_at: datetime
 
@@ -32,6 +34,7 @@ class TopicListResponse(BaseModel):
     total: int
     page: int
     limit: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多数据时为空")
 
 
 class CommentBase(BaseModel):
@@ -39,7 +42,7 @@ class CommentBase(BaseModel):
 
 
 class CommentCreate(CommentBase):
-    pass
+    parent_id: Optional[int] = Field(None, description="回复的评论ID，为空时为顶层评论")
 
 
 class CommentResponse(CommentBase):
@@ -47,7 +50,38 @@ class CommentResponse(CommentBase):
     author_id: int
     topic_id: Optional[int] = None
     post_id: Optional[int] = None
+    parent_id: Optional[int] = None
+    depth: int = 0
     created_at: datetime
     likes: int = 0
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CommentThreadResponse(CommentResponse):
+    """嵌套评论：replies 为按展示顺序排列的子回复"""
+    replies: List["CommentThreadResponse"] = Field(default_factory=list)
+    reply_count: Optional[int] = Field(None, description="楼内回复总数（仅顶层评论）")
+
+
+class BulkDeleteRequest(BaseModel):
+    """批量删除条件：各条件同时满足，至少指定一个"""
+    ids: Optional[List[int]] = Field(None, max_length=10000, description="ID 列表")
+    author_id: Optional[int] = Field(None, description="作者ID")
+    created_after: Optional[datetime] = Field(None, description="创建时间不早于")
+    created_before: Optional[datetime] = Field(None, description="创建时间早于")
+    search: Optional[str] = Field(None, min_length=1, max_length=200, description="内容包含的关键词")
+    dry_run: bool = Field(False, description="只统计将被删除的数量，不执行删除")
+
+    @model_validator(mode="after")
+    def require_filter(self):
+        if not (self.ids or self.author_id is not None or self.created_after or self.created_before or self.search):
+            raise ValueError("至少需要指定一个筛选条件")
+        return self
+
+
+class BulkDeleteResponse(BaseModel):
+    matched: int = Field(..., description="匹配条件的记录数")
+    topics_deleted: int = Field(0, description="删除（dry_run 时为将删除）的话题数")
+    comments_deleted: int = Field(0, description="删除（dry_run 时为将删除）的评论数，含级联删除")
+    dry_run: bool
@@ -0,0 +1,222 @@
+# 公开目录快照：项目、作品集、服务列表
+#
+# 这三类列表只在管理员编辑时变化。每次变化后把各列表序列化成 JSON（另存一份 gzip）写入一个快照文件
+# （app.lib.snapshot_file），各 worker 映射同一个文件：读取时只需一次 stat 判断文件是否被替换，
+# 不打开数据库会话、不构造 ORM 对象、不做 pydantic 校验。
+#
+# 重建时机：
+# - 提交的事务中有项目、作品、服务的增删改（ORM flush 事件，或绕过 ORM 的写入调用 mark_changed）时，
+#   在提交后由该 worker 立即重建；
+# - 启动时及每 CATALOG_SNAPSHOT_CHECK_INTERVAL 秒检查一次：快照的版本（这三类内容只增不减的版本号之和，
+#   见 app.services.counters.versions）与数据库不一致（其他主机、管理命令的写入），或本 worker 有图片派生版本生成完成
+#   （image_variants 的 revision 变化，构建时尚未生成的图片在快照中为 null），则重建。
+import fcntl
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.lib import snapshot_file
+from app.lib.http_cache import conditional_response, make_etag
+from app.models.models import Portfolio, Project, Service
+from app.schemas.portfolio import VALID_CATEGORIES, PortfolioResponse
+from app.schemas.project import ProjectResponse
+from app.schemas.service import ServiceResponse
+from app.services import counters, image_variants, site_search  # noqa: F401  导入 site_search 时注册变更日志的 flush 事件
+
+logger = logging.getLogger(__name__)
+
+_KINDS = ("project", "portfolio", "service")
+_MODELS = (Project, Portfolio, Service)
+_LIST = TypeAdapter(list)
+
+
+def version(db: Session) -> int:
+    return counters.versions(db, _KINDS)
+
+
+def _projects(db: Session) -> dict[str, list]:
+    projects = db.query(Project).order_by(Project.sort_order.asc(), Project.created_at.desc()).all()
+    items = [image_variants.to_response(ProjectResponse, project) for project in projects]
+    return {"projects": items, "projects/featured": [item for item in items if item.featured]}
+
+
+def _portfolio(db: Session) -> dict[str, list]:
+    items = db.query(Portfolio).order_by(Portfolio.sort_order.asc(), Portfolio.created_at.desc()).all()
+    items = [image_variants.to_response(PortfolioResponse, item) for item in items]
+    catalogs = {"portfolio": items}
+    for category in VALID_CATEGORIES:
+        catalogs[f"portfolio/{category}"] = [item for item in items if item.category == category]
+    return catalogs
+
+
+def _services(db: Session) -> dict[str, list]:
+    services = db.query(Service).filter(Service.active == True).order_by(Service.sort_order.asc()).all()
+    return {"services": [ServiceResponse.model_validate(service) for service in services]}
+
+
+_BUILDERS: tuple[Callable[[Session], dict[str, list]], ...] = (_projects, _portfolio, _services)
+
+
+class Part:
+    """一个列表的两种编码；正文按需从映射中读取"""
+
+    def __init__(self, mapped: snapshot_file.MappedSnapshot, name: str, etag: str):
+        self._mapped = mapped
+        self.name = name
+        self.etag = etag
+
+    def body(self, compressed: bool) -> bytes:
+        return self._mapped.read(f"{self.name}.gz" if compressed else self.name)
+
+
+class CatalogSnapshots:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._mapped: Optional[snapshot_file.MappedSnapshot] = None
+            self._revision = image_variants.derivatives.revision
+
+    def _current(self) -> Optional[snapshot_file.MappedSnapshot]:
+        try:
+            current = snapshot_file.identity(os.stat(self.path))
+        except FileNotFoundError:
+            return None
+        mapped = self._mapped
+        if mapped is not None and mapped.identity == current:
+            return mapped
+        with self._lock:
+            if self._mapped is None or self._mapped.identity != current:
+                try:
+                    self._mapped = snapshot_file.MappedSnapshot(self.path)
+                except (OSError, ValueError):
+                    logger.exception("读取目录快照失败")
+                    return None
+            return self._mapped
+
+    def get(self, name: str) -> Optional[Part]:
+        """快照中的列表；还没有快照时返回 None（调用方查询数据库）"""
+        mapped = self._current()
+        if mapped is None or name not in mapped:
+            return None
+        return Part(mapped, name, mapped.meta["etags"][name])
+
+    def meta(self) -> Optional[dict]:
+        mapped = self._current()
+        return mapped.meta if mapped is not None else None
+
+    def rebuild(self, bind) -> int:
+        """从数据库重建快照并替换文件，返回快照版本；失败时删除快照，列表改为查询数据库"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as lock_file:
+            # 多个 worker 同时重建时依次进行，后完成的读到的一定是更新的数据
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            revision = image_variants.derivatives.revision
+            try:
+                current, parts, etags = self._build(bind)
+            except Exception:
+                self.path.unlink(missing_ok=True)
+                raise
+            # 字段名不沿用旧快照的 version（当时为变更日志 id，可能与新的版本号相同），旧快照一律重建
+            meta = {"content_version": current, "etags": etags, "built_at": datetime.now(timezone.utc).isoformat()}
+            snapshot_file.write(self.path, meta, parts)
+            self._revision = revision
+        logger.info(f"目录快照已重建，版本 {current}")
+        return current
+
+    @staticmethod
+    def _build(bind) -> tuple[int, dict[str, bytes], dict[str, str]]:
+        with Session(bind=bind) as db:
+            current = version(db)
+            catalogs = {}
+            for builder in _BUILDERS:
+                catalogs.update(builder(db))
+        parts = {}
+        etags = {}
+        for name, items in catalogs.items():
+            body = _LIST.dump_json(items)
+            parts[name] = body
+            parts[f"{name}.gz"] = gzip.compress(body, compresslevel=6, mtime=0)
+            etags[name] = make_etag(hashlib.sha256(body).hexdigest())
+        return current, parts, etags
+
+    def maintain(self, bind) -> bool:
+        """没有快照、版本与数据库不一致或本 worker 有派生图片生成完成时重建，返回是否重建"""
+        meta = self.meta()
+        if meta is not None and image_variants.derivatives.revision == self._revision:
+            with Session(bind=bind) as db:
+                if version(db) == meta.get("content_version"):
+                    return False
+        self.rebuild(bind)
+        return True
+
+
+snapshots = CatalogSnapshots(settings.CATALOG_SNAPSHOT_PATH)
+
+
+def _accepts_gzip(header: str) -> bool:
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() == "gzip":
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def respond(request: Request, part: Part) -> Response:
+    """返回快照中的列表：支持 If-None-Match，客户端接受 gzip 时直接返回预先压缩的正文"""
+    response = Response(media_type="application/json", headers={"Vary": "Accept-Encoding"})
+    not_modified = conditional_response(request, response, part.etag)
+    if not_modified is not None:
+        return not_modified
+    compressed = _accepts_gzip(request.headers.get("accept-encoding", ""))
+    response.body = part.body(compressed)
+    response.headers["Content-Length"] = str(len(response.body))
+    if compressed:
+        response.headers["Content-Encoding"] = "gzip"
+    response.status_code = status.HTTP_200_OK
+    return response
+
+
+def mark_changed(db: Session) -> None:
+    """绕过 ORM 修改了项目、作品或服务时调用，提交后重建快照"""
+    db.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed(session: Session, flush_context) -> None:
+    if any(isinstance(obj, _MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _rebuild_after_commit(session: Session) -> None:
+    # 释放 SAVEPOINT 时也会触发，此时外层事务尚未提交
+    if session.in_nested_transaction():
+        return
+    if session.info.pop("catalog_changed", False):
+        try:
+            snapshots.rebuild(session.get_bind())
+        except Exception:
+            # 写入已提交，快照由定期检查补上
+            logger.exception("重建目录快照失败")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop("catalog_changed", None)
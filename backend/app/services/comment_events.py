@@ -0,0 +1,217 @@
+# 话题评论实时推送（Server-Sent Events）
+#
+# 每个 worker 进程内有一个 CommentBroker，把事件分发给本进程的 SSE 连接；
+# CommentFeed 在每个 worker 中按间隔读取 comments 表里新增的行（主键范围查询）并发布到 broker，
+# 因此任意 worker 上提交的评论都会推送到所有 worker 的订阅者，不依赖额外的消息服务。
+# 本进程内提交评论后调用 notify() 立即触发一次读取。评论 id 即事件 id，用于 Last-Event-ID 续传。
+#
+# id 在插入时分配，提交顺序却不一定相同：较小的 id 可能在较大的 id 已被读到之后才提交。
+# 读取时跳过的 id 记为空缺，之后每次读取一并查询，读到即补发；超过 GAP_TIMEOUT 仍未出现的
+# （事务回滚、已删除）不再等待。补上的 id 在 GAP_TIMEOUT 内记为晚到，backlog() 续传时
+# 一并返回小于 after_id 的晚到评论（客户端可能已经有了，按 id 去重）。
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.models import Comment
+from app.schemas.topic import CommentResponse
+
+logger = logging.getLogger(__name__)
+
+# 单次续传/读取的最大条数
+BACKLOG_LIMIT = 500
+# 没有新事件时发送注释行保持连接（秒）
+HEARTBEAT_INTERVAL = 15
+# 空缺的 id 等待补发的时长（秒），应大于最长的写事务
+GAP_TIMEOUT = 60
+# 同时等待的空缺 id 上限（序列跳号等造成的大段空缺只保留靠后的部分）
+MAX_GAPS = 1000
+
+
+def event_payload(comment: Comment) -> dict:
+    return CommentResponse.model_validate(comment).model_dump(mode="json")
+
+
+def format_event(event: dict) -> str:
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event['id']}\nevent: comment\ndata: {data}\n\n"
+
+
+class Subscription:
+    def __init__(self, topic_id: int, loop: asyncio.AbstractEventLoop):
+        self.topic_id = topic_id
+        self.loop = loop
+        self.queue: asyncio.Queue[dict] = asyncio.Queue()
+
+
+class CommentBroker:
+    """进程内发布/订阅（测试可替换为自己的实例）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[Subscription]] = {}
+
+    def subscribe(self, topic_id: int) -> Subscription:
+        """在事件循环中调用"""
+        subscription = Subscription(topic_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(topic_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic_id]
+
+    def publish(self, topic_id: int, event: dict) -> int:
+        """发布事件（线程安全），返回收到事件的订阅者数量"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, event)
+        return len(subscribers)
+
+
+broker = CommentBroker()
+
+
+class CommentFeed:
+    """读取新增评论并发布到 broker（每个 worker 一个）"""
+
+    def __init__(self, target: CommentBroker):
+        self.broker = target
+        self.last_id: int | None = None
+        self._gaps: dict[int, float] = {}  # 尚未读到的 id -> 发现时间
+        self._late: dict[int, float] = {}  # 晚于更大的 id 提交的 id -> 读到的时间
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+
+    def poll(self, db: Session) -> int:
+        """读取上次之后新增（含之前空缺、刚提交）的评论并发布，返回发布的条数"""
+        if self.last_id is None:
+            self.last_id = db.query(func.max(Comment.id)).scalar() or 0
+            self._gaps = {}
+            self._late = {}
+            return 0
+        now = time.monotonic()
+        self._gaps = {gap: seen for gap, seen in self._gaps.items() if now - seen < GAP_TIMEOUT}
+        self._late = {late: seen for late, seen in self._late.items() if now - seen < GAP_TIMEOUT}
+        # 不按 topic_id 过滤：其他评论也要读到，否则它们的 id 会一直被当作空缺
+        condition = Comment.id > self.last_id
+        if self._gaps:
+            condition = or_(condition, Comment.id.in_(list(self._gaps)))
+        comments = db.query(Comment).filter(condition).order_by(Comment.id).limit(BACKLOG_LIMIT).all()
+
+        published = 0
+        for comment in comments:
+            if self._gaps.pop(comment.id, None) is not None:
+                self._late[comment.id] = now
+            elif comment.id > self.last_id:
+                missing = range(max(self.last_id + 1, comment.id - MAX_GAPS), comment.id)
+                self._gaps.update(dict.fromkeys(missing, now))
+                self.last_id = comment.id
+            if comment.topic_id is not None:
+                self.broker.publish(comment.topic_id, event_payload(comment))
+                published += 1
+        if len(self._gaps) > MAX_GAPS:
+            self._gaps = dict(sorted(self._gaps.items())[-MAX_GAPS:])
+        return published
+
+    def late_ids(self, after_id: int) -> list[int]:
+        """最近晚到的、不大于 after_id 的评论 id（可在任意线程调用）"""
+        return [late for late in dict(self._late) if late <= after_id]
+
+    def notify(self) -> None:
+        """本进程提交了新评论：尽快读取一次（可在任意线程调用）"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def run(self, session_factory: Callable[[], Session], interval: float) -> None:
+        self.last_id = None
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+        def poll_once() -> None:
+            with session_factory() as db:
+                self.poll(db)
+
+        while True:
+            try:
+                await run_in_threadpool(poll_once)
+            except Exception:
+                logger.exception("读取新增评论失败")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+feed = CommentFeed(broker)
+
+
+def backlog(
+    db: Session, topic_id: int, after_id: int, limit: int = BACKLOG_LIMIT, source: CommentFeed | None = None
+) -> list[Comment]:
+    """话题中 id 大于 after_id 的评论，以及最近晚到的 id 较小的评论（按 id 正序）"""
+    condition = Comment.id > after_id
+    late = (source or feed).late_ids(after_id)
+    if late:
+        condition = or_(condition, Comment.id.in_(late))
+    return db.query(Comment) \
+        .filter(Comment.topic_id == topic_id, condition) \
+        .order_by(Comment.id) \
+        .limit(limit) \
+        .all()
+
+
+async def stream(
+    subscription: Subscription,
+    replay: list[dict],
+    last_id: int,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    target: CommentBroker | None = None,
+) -> AsyncIterator[str]:
+    """
+    SSE 事件流：先补发 replay（订阅之后读取的历史事件），再转发实时事件
+    订阅先于读取历史，两者重叠的事件按 id 去重。晚提交的评论 id 可能小于已发送的：
+    只丢弃比已发送的最大 id（初始为 last_id）小 MAX_GAPS 以上的事件，去重集合也只保留这个窗口内的 id
+    """
+    target = target or broker
+    high = last_id
+    sent: set[int] = set()
+
+    def fresh(event_id: int) -> bool:
+        nonlocal high, sent
+        if event_id <= high - MAX_GAPS or event_id in sent:
+            return False
+        sent.add(event_id)
+        high = max(high, event_id)
+        if len(sent) > MAX_GAPS:
+            sent = {sent_id for sent_id in sent if sent_id > high - MAX_GAPS}
+        return True
+
+    try:
+        for event in replay:
+            if fresh(event["id"]):
+                yield format_event(event)
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if fresh(event["id"]):
+                yield format_event(event)
+    finally:
+        target.unsubscribe(subscription)
@@ -0,0 +1,123 @@
+# 楼中楼评论：物化路径存储
+#
+# 每条评论的 path 为从顶层评论到自身的 id 序列（定宽十进制，以 / 结尾），
+# 例如 0000000012/0000000034/。任意子树都是一段连续的 path 区间，
+# 用一次索引范围查询即可取出，按 path 排序即为深度优先的展示顺序，无需逐层递归查询。
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Comment
+
+# 最大嵌套层级（顶层为 0），回复更深层的评论时挂到同一层
+MAX_DEPTH = 8
+SEGMENT_WIDTH = 10
+_SEPARATOR = "/"
+
+
+def _segment(comment_id: int) -> str:
+    return f"{comment_id:0{SEGMENT_WIDTH}d}{_SEPARATOR}"
+
+
+def subtree_bounds(path: str) -> tuple[str, str]:
+    """子树（含自身）的 path 区间 [lower, upper)"""
+    # 路径只含数字和 /，把结尾的 / 换成排在其后的字符即得到区间上界
+    return path, path[:-1] + chr(ord(_SEPARATOR) + 1)
+
+
+def ancestor_ids(path: str | None) -> list[int]:
+    """路径中的祖先评论 id（由顶层到父评论，不含自身）"""
+    if not path:
+        return []
+    return [int(segment) for segment in path.split(_SEPARATOR)[:-2]]
+
+
+def attach(db: Session, comment: Comment, parent: Comment | None = None) -> Comment:
+    """写入评论并填充层级字段（在当前事务中，由调用方提交）"""
+    if parent is not None and parent.depth >= MAX_DEPTH:
+        parent = db.get(Comment, parent.parent_id)
+    db.add(comment)
+    db.flush()  # 路径包含自身 id
+    if parent is None:
+        comment.parent_id = None
+        comment.thread_id = comment.id
+        comment.depth = 0
+        comment.path = _segment(comment.id)
+    else:
+        comment.parent_id = parent.id
+        comment.thread_id = parent.thread_id
+        comment.depth = parent.depth + 1
+        comment.path = parent.path + _segment(comment.id)
+    db.flush()
+    return comment
+
+
+def subtree_query(db: Session, comment: Comment, max_depth: int | None = None, include_self: bool = True):
+    """子树查询（按 path 排序），max_depth 为相对 comment 的最大层数"""
+    lower, upper = subtree_bounds(comment.path)
+    query = db.query(Comment).filter(
+        Comment.path >= lower if include_self else Comment.path > lower,
+        Comment.path < upper,
+    )
+    if max_depth is not None:
+        query = query.filter(Comment.depth <= comment.depth + max_depth)
+    return query.order_by(Comment.path)
+
+
+def first_replies(db: Session, thread_ids: list[int], per_thread: int) -> list[Comment]:
+    """每个楼按展示顺序取前 per_thread 条回复（一次查询，按 path 排序）"""
+    if not thread_ids or per_thread <= 0:
+        return []
+    ranked = select(
+        Comment.id,
+        func.row_number().over(partition_by=Comment.thread_id, order_by=Comment.path).label("position"),
+    ).where(Comment.thread_id.in_(thread_ids), Comment.depth > 0).subquery()
+    return db.query(Comment) \
+        .join(ranked, Comment.id == ranked.c.id) \
+        .filter(ranked.c.position <= per_thread) \
+        .order_by(Comment.path) \
+        .all()
+
+
+def reply_counts(db: Session, thread_ids: list[int]) -> dict[int, int]:
+    """每个楼的回复总数"""
+    if not thread_ids:
+        return {}
+    rows = db.query(Comment.thread_id, func.count(Comment.id)) \
+        .filter(Comment.thread_id.in_(thread_ids), Comment.depth > 0) \
+        .group_by(Comment.thread_id)
+    return dict(rows)
+
+
+def build_tree(comments: list[Comment], to_node) -> list[dict]:
+    """
+    按 path 排序的评论组装为嵌套结构，to_node 把评论转换为 dict
+    父评论不在列表中的评论作为根节点返回
+    """
+    nodes: dict[int, dict] = {}
+    roots = []
+    for comment in comments:
+        node = {**to_node(comment), "replies": []}
+        nodes[comment.id] = node
+        parent = nodes.get(comment.parent_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent["replies"].append(node)
+    return roots
+
+
+def backfill_paths(db: Session, batch_size: int = 1000) -> int:
+    """为没有路径的旧评论补全层级字段（旧评论均为顶层评论），返回处理数量"""
+    total = 0
+    while True:
+        comments = db.query(Comment).filter(Comment.path.is_(None)).order_by(Comment.id).limit(batch_size).all()
+        if not comments:
+            break
+        for comment in comments:
+            comment.parent_id = None
+            comment.thread_id = comment.id
+            comment.depth = 0
+            comment.path = _segment(comment.id)
+        db.commit()
+        total += len(comments)
+    return total
@@ -0,0 +1,150 @@
+# 计数器：用维护的行数代替列表接口上的 COUNT(*)
+#
+# 写入路由在业务事务内调用 increment()，与数据变更一起提交或回滚；
+# 计数行不存在时按实际数据现算并写入，reconcile() 定期用 COUNT 校准所有计数：
+# 每类计数一条 UPDATE counters SET value = (SELECT COUNT(*) ...)，读与写在同一语句内，
+# 不会用先读出的旧值覆盖校准期间其他事务提交的 increment()（各 worker 同时校准也无妨）。
+# 另外为首页缓存、目录快照维护各类内容的版本号（version.<类型>）：只增不减，不参与校准。
+import logging
+from typing import Iterable
+
+from sqlalchemy import func, not_, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import Counter, Portfolio, Post, Topic
+
+logger = logging.getLogger(__name__)
+
+PUBLISHED_POSTS = "posts.published"
+TOPICS = "topics"
+_PORTFOLIO_CATEGORY_PREFIX = "portfolio.category."
+_VERSION_PREFIX = "version."
+# 维护版本号的内容类型（首页与目录快照使用的）；话题、评论写入频繁且无人使用，不维护
+VERSIONED_KINDS = ("post", "project", "portfolio", "service")
+
+
+def portfolio_category_key(category: str) -> str:
+    return f"{_PORTFOLIO_CATEGORY_PREFIX}{category}"
+
+
+def _count(db: Session, key: str) -> int:
+    """按实际数据计算某个计数"""
+    if key == PUBLISHED_POSTS:
+        return db.query(func.count(Post.id)).filter(Post.published == True).scalar()
+    if key == TOPICS:
+        return db.query(func.count(Topic.id)).scalar()
+    if key.startswith(_PORTFOLIO_CATEGORY_PREFIX):
+        category = key[len(_PORTFOLIO_CATEGORY_PREFIX):]
+        return db.query(func.count(Portfolio.id)).filter(Portfolio.category == category).scalar()
+    raise KeyError(f"未知的计数器: {key}")
+
+
+def _reconciled() -> list[tuple]:
+    """校准用：[(计数行条件, 实际值的标量子查询)]；分类计数按计数行的键关联到分类"""
+    category = func.substr(Counter.key, len(_PORTFOLIO_CATEGORY_PREFIX) + 1)
+    return [
+        (Counter.key == PUBLISHED_POSTS,
+         select(func.count(Post.id)).where(Post.published == True).scalar_subquery()),
+        (Counter.key == TOPICS, select(func.count(Topic.id)).scalar_subquery()),
+        (Counter.key.startswith(_PORTFOLIO_CATEGORY_PREFIX, autoescape=True),
+         select(func.count(Portfolio.id)).where(Portfolio.category == category).scalar_subquery()),
+    ]
+
+
+def _insert(db: Session, key: str, value: int) -> bool:
+    """插入计数行；并发插入同一个键时返回 False"""
+    try:
+        with db.begin_nested():
+            db.add(Counter(key=key, value=value))
+        return True
+    except IntegrityError:
+        return False
+
+
+def get(db: Session, key: str) -> int:
+    """读取计数，不存在时现算并写入"""
+    value = db.query(Counter.value).filter(Counter.key == key).scalar()
+    if value is None:
+        value = _count(db, key)
+        if _insert(db, key, value):
+            db.commit()
+    return value
+
+
+def get_many(db: Session, keys: list[str]) -> dict[str, int]:
+    """批量读取计数，缺失的键逐个现算"""
+    values = dict(db.query(Counter.key, Counter.value).filter(Counter.key.in_(keys))) if keys else {}
+    missing = [key for key in keys if key not in values]
+    for key in missing:
+        values[key] = get(db, key)
+    return values
+
+
+def increment(db: Session, key: str, delta: int = 1) -> None:
+    """
+    在当前事务中调整计数（由调用方提交）
+    计数行不存在时，按已 flush 的数据现算，结果已包含本次变更
+    """
+    if delta == 0:
+        return
+    result = db.execute(
+        update(Counter).where(Counter.key == key).values(value=Counter.value + delta),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount:
+        return
+    db.flush()
+    if not _insert(db, key, _count(db, key)):
+        db.execute(
+            update(Counter).where(Counter.key == key).values(value=Counter.value + delta),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def version_key(kind: str) -> str:
+    return f"{_VERSION_PREFIX}{kind}"
+
+
+def bump_versions(connection, kinds: Iterable[str]) -> None:
+    """各类内容的版本号加一（在当前事务中，与变更一起提交）；一条 upsert 语句，行不存在时插入"""
+    keys = sorted({version_key(kind) for kind in kinds if kind in VERSIONED_KINDS})
+    if not keys:
+        return
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(Counter).values([{"key": key, "value": 1} for key in keys])
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[Counter.key], set_={"value": Counter.value + 1, "updated_at": func.now()},
+    ))
+
+
+def versions(db: Session, kinds: Iterable[str]) -> int:
+    """各类内容版本号之和：任一类有写入后增大，不会回落到之前的值"""
+    keys = [version_key(kind) for kind in kinds]
+    return db.query(func.coalesce(func.sum(Counter.value), 0)).filter(Counter.key.in_(keys)).scalar()
+
+
+def reconcile(db: Session) -> int:
+    """用实际数据校准全部计数，返回被修正的计数个数"""
+    fixed = 0
+    conditions = []
+    for condition, actual in _reconciled():
+        conditions.append(condition)
+        result = db.execute(
+            update(Counter).where(condition, Counter.value != actual).values(value=actual),
+            execution_options={"synchronize_session": False},
+        )
+        fixed += result.rowcount
+    # 已废弃的计数键（如改为冗余列的话题评论数）
+    db.query(Counter) \
+        .filter(not_(or_(*conditions)), not_(Counter.key.startswith(_VERSION_PREFIX, autoescape=True))) \
+        .delete(synchronize_session=False)
+    stored = {key for (key,) in db.query(Counter.key).filter(Counter.key.in_([PUBLISHED_POSTS, TOPICS]))}
+    for key in (PUBLISHED_POSTS, TOPICS):
+        if key not in stored:
+            _insert(db, key, _count(db, key))
+    db.commit()
+    if fixed:
+        logger.warning(f"计数校准：修正了 {fixed} 个计数")
+    return fixed
@@ -0,0 +1,97 @@
+# 首页聚合数据：精选项目、最新文章、作品集、在售服务
+#
+# 四组查询各用一个独立会话在线程池中并发执行，组合后的响应体（JSON 字节）缓存在 worker 内存中。
+# 缓存版本为这四类内容的版本号之和（counters 表中只增不减的 version.<类型>，与变更日志一起由 ORM flush 事件递增，
+# 见 app.services.site_search）：任一 worker 写入后版本变化，各 worker 在下一次请求时重新生成。
+# 构建时尚未生成派生版本的图片会提交生成，本 worker 的生成任务完成后（image_variants 的 revision 变化）也重新生成。
+import asyncio
+import hashlib
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
+
+from app.lib.http_cache import make_etag
+from app.models.models import Portfolio, Post, Project, Service
+from app.schemas.home import HomeResponse
+from app.schemas.portfolio import PortfolioResponse
+from app.schemas.post import PostSummary
+from app.schemas.project import ProjectResponse
+from app.schemas.service import ServiceResponse
+from app.services import counters, image_variants, site_search  # noqa: F401  导入 site_search 时注册变更日志的 flush 事件
+
+LATEST_POSTS = 6
+PORTFOLIO_ITEMS = 12
+_SOURCES = ("post", "project", "portfolio", "service")
+
+_cache: Optional[tuple[tuple[int, int], bytes, str]] = None  # ((内容版本, 图片版本), 响应体, ETag)
+
+
+def version(db: Session) -> int:
+    return counters.versions(db, _SOURCES)
+
+
+def featured_projects(db: Session) -> list:
+    projects = db.query(Project).filter(Project.featured == True) \
+        .order_by(Project.sort_order.asc(), Project.created_at.desc()).all()
+    return [image_variants.to_response(ProjectResponse, project) for project in projects]
+
+
+def latest_posts(db: Session) -> list:
+    posts = db.query(Post).filter(Post.published == True) \
+        .options(load_only(Post.id, Post.title, Post.slug, Post.excerpt, Post.auto_excerpt,
+                           Post.cover_image, Post.created_at, Post.updated_at)) \
+        .order_by(Post.created_at.desc(), Post.id.desc()) \
+        .limit(LATEST_POSTS).all()
+    return [image_variants.to_response(PostSummary, post, excerpt=post.excerpt or post.auto_excerpt) for post in posts]
+
+
+def portfolio_items(db: Session) -> list:
+    items = db.query(Portfolio).order_by(Portfolio.sort_order.asc(), Portfolio.created_at.desc()) \
+        .limit(PORTFOLIO_ITEMS).all()
+    return [image_variants.to_response(PortfolioResponse, item) for item in items]
+
+
+def active_services(db: Session) -> list:
+    services = db.query(Service).filter(Service.active == True).order_by(Service.sort_order.asc()).all()
+    return [ServiceResponse.model_validate(service) for service in services]
+
+
+_SECTIONS: dict[str, Callable[[Session], list]] = {
+    "featured_projects": featured_projects,
+    "latest_posts": latest_posts,
+    "portfolio": portfolio_items,
+    "services": active_services,
+}
+
+
+def _read(bind, section: Callable[[Session], list]) -> list:
+    # 每组查询一个会话：同一会话（连接）不能被多个线程同时使用
+    with Session(bind=bind) as db:
+        return section(db)
+
+
+async def build(bind) -> bytes:
+    """并发执行各组查询，返回序列化后的响应体"""
+    results = await asyncio.gather(*(run_in_threadpool(_read, bind, section) for section in _SECTIONS.values()))
+    return HomeResponse(**dict(zip(_SECTIONS, results))).model_dump_json().encode("utf-8")
+
+
+async def get(db: Session) -> tuple[bytes, str]:
+    """返回 (响应体, ETag)；版本未变化时直接使用缓存"""
+    global _cache
+    current = (await run_in_threadpool(version, db), image_variants.derivatives.revision)
+    cached = _cache
+    if cached is not None and cached[0] == current:
+        return cached[1], cached[2]
+    # 先读版本再读数据：期间有写入时缓存的内容只会比版本新，下一次请求会重新生成
+    body = await build(db.get_bind())
+    # ETag 按内容计算：各 worker 的缓存内容相同时 ETag 也相同
+    etag = make_etag(hashlib.sha256(body).hexdigest())
+    _cache = (current, body, etag)
+    return body, etag
+
+
+def reset() -> None:
+    global _cache
+    _cache = None
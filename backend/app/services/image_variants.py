@@ -0,0 +1,188 @@
+# 本地图片的派生版本（封面图、作品图）
+#
+# 只处理 MEDIA_URL 下的本地原图，外部链接原样返回。路由与快照构建时用 to_response 把派生版本填入响应模型：
+# 已生成的直接返回 srcset 与占位图；尚未生成的提交到进程池后返回 None（本次响应只有原图），
+# 不在请求中等待编码。响应模型本身不读文件、不提交任务。生成与缓存目录的布局见 app.lib.images。
+#
+# 原图路径到内容摘要的对应关系记录在 <缓存目录>/sources/ 下（附原图的 mtime 与大小，原图被替换后失效），
+# 各 worker 启动后读取它即可复用其他 worker 生成的结果；进程内再用字典缓存，命中时每张图只需一次 stat。
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.lib import images
+from app.schemas.image import ImageVariants as VariantsSchema
+
+logger = logging.getLogger(__name__)
+
+# 响应模型中的原图字段 -> 派生版本字段
+IMAGE_FIELDS = {"cover_image": "cover_image_variants", "image_url": "image_variants"}
+
+
+class ImageVariants:
+    def __init__(self, media_root: str, media_url: str, widths: list[int], formats: list[str], workers: int):
+        self.media_root = Path(media_root)
+        self.media_url = media_url.rstrip("/") + "/"
+        self.cache_dir = self.media_root / "derived"
+        self.widths = list(widths)
+        self.formats = [fmt for fmt in formats if images.supported(fmt)]
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._known: dict[str, tuple[tuple[int, int], Optional[dict]]] = {}  # 相对路径 -> (原图版本, 派生版本)
+            self._pending: dict[str, Future] = {}
+            # 本 worker 每完成一次生成加一，缓存了序列化结果的调用方据此判断是否需要重新生成
+            self.revision = 0
+
+    def _relative(self, url: Optional[str]) -> Optional[str]:
+        """URL 对应的原图相对路径；不是本地原图（外部链接、派生文件、越出目录）时返回 None"""
+        if not url or not url.startswith(self.media_url):
+            return None
+        path = PurePosixPath(url[len(self.media_url):].split("?", 1)[0])
+        if path.is_absolute() or ".." in path.parts or not path.parts or path.parts[0] == "derived":
+            return None
+        return path.as_posix()
+
+    def _record_path(self, relative: str) -> Path:
+        return self.cache_dir / "sources" / (hashlib.sha256(relative.encode("utf-8")).hexdigest() + ".json")
+
+    def variants(self, url: Optional[str]) -> Optional[dict]:
+        """响应中的派生版本：{"width", "height", "placeholder", "sources": [{"type", "srcset"}]}；尚未生成时为 None"""
+        relative = self._relative(url)
+        if relative is None:
+            return None
+        try:
+            stat = (self.media_root / relative).stat()
+        except OSError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        known = self._known.get(relative)
+        if known is not None and known[0] == version:
+            return known[1]
+
+        result = self._from_record(relative, version)
+        if result is not None:
+            self._known[relative] = (version, result)
+            return result
+        self._schedule(relative, version)
+        return None
+
+    def _from_record(self, relative: str, version: tuple[int, int]) -> Optional[dict]:
+        try:
+            record = json.loads(self._record_path(relative).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if (record.get("mtime_ns"), record.get("size")) != version:
+            return None
+        manifest = images.read_manifest(images.derived_dir(self.cache_dir, record["digest"]))
+        if not images.is_complete(manifest, self.widths, self.formats):
+            return None
+        return self._describe(manifest)
+
+    def _describe(self, manifest: dict) -> dict:
+        base = self.media_url + "derived/"
+        return {
+            "width": manifest["width"],
+            "height": manifest["height"],
+            "placeholder": manifest["placeholder"],
+            "sources": [
+                {
+                    "type": images.MIME_TYPES[fmt],
+                    "srcset": ", ".join(f"{base}{path} {width}w" for width, path in manifest["files"][fmt]),
+                }
+                for fmt in self.formats
+            ],
+        }
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # forkserver：不从带有线程的 worker 进程直接 fork
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("forkserver"))
+        return self._pool
+
+    def _schedule(self, relative: str, version: tuple[int, int]) -> None:
+        with self._lock:
+            if relative in self._pending:
+                return
+            source = str(self.media_root / relative)
+            try:
+                future = self._executor().submit(
+                    images.generate, source, str(self.cache_dir), self.widths, self.formats
+                )
+            except Exception:
+                # 进程池异常退出（如子进程被 OOM 杀掉）后无法再提交，丢弃它，下一次请求时重建
+                logger.exception("提交图片生成任务失败")
+                self._pool = None
+                return
+            self._pending[relative] = future
+        future.add_done_callback(lambda done: self._finished(relative, version, done))
+
+    def _finished(self, relative: str, version: tuple[int, int], future: Future) -> None:
+        try:
+            digest, manifest = future.result()
+            record = self._record_path(relative)
+            record.parent.mkdir(parents=True, exist_ok=True)
+            tmp = record.with_name(f".{record.name}.{os.getpid()}")
+            tmp.write_text(json.dumps({"mtime_ns": version[0], "size": version[1], "digest": digest}), encoding="utf-8")
+            os.replace(tmp, record)
+            self._known[relative] = (version, self._describe(manifest))
+        except Exception:
+            # 原图无法处理（损坏、格式不支持等）：原图被替换之前不再重试
+            logger.exception(f"生成图片派生版本失败: {relative}")
+            self._known[relative] = (version, None)
+        finally:
+            with self._lock:
+                self._pending.pop(relative, None)
+                self.revision += 1
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的生成任务（含完成回调）全部结束，返回是否在超时前结束（管理命令与测试使用）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+derivatives = ImageVariants(
+    settings.MEDIA_ROOT, settings.MEDIA_URL, settings.IMAGE_WIDTHS, settings.IMAGE_FORMATS, settings.IMAGE_WORKERS
+)
+
+
+def variants_for(url: Optional[str]) -> Optional[VariantsSchema]:
+    """已生成时返回派生版本，否则（在后台提交生成后）返回 None"""
+    result = derivatives.variants(url)
+    return VariantsSchema.model_validate(result) if result else None
+
+
+def to_response(schema: type[BaseModel], obj, **update) -> BaseModel:
+    """ORM 对象转换为响应模型，并填入图片的派生版本"""
+    response = schema.model_validate(obj)
+    for url_field, field in IMAGE_FIELDS.items():
+        if field in schema.model_fields and field not in update:
+            update[field] = variants_for(getattr(response, url_field))
+    return response.model_copy(update=update)
@@ -0,0 +1,195 @@
+# 询价与联系表单的写入缓冲（write-behind）
+#
+# 公开表单的提交只写入本机的持久化队列（app.lib.durable_queue，独立的 SQLite 文件）后立即返回 202，
+# 不争用业务数据库的写锁。后台任务每 INTAKE_DRAIN_INTERVAL 秒把队列中的提交按批（INTAKE_BATCH_SIZE 条一个事务）
+# 写入 inquiries 表，同一主机上同一时刻只有一个 worker 消费（文件锁）。
+#
+# 至少一次：写入数据库并提交后才从队列删除，提交之后、删除之前崩溃的批次会再次写入；
+# 每条提交带幂等键（客户端的 Idempotency-Key，或服务端生成），写入 inquiries.intake_key（唯一），已存在的跳过。
+# 数据库被锁或不可用时整批留在队列中，下次再写入；其他错误（包括缺少列等表结构错误）时逐条重试，
+# 仍失败的按指数退避推迟，留在队列中不丢弃（队列监控中计为 retrying）。
+# 联系表单写入后（配置了 SMTP 时）把通知邮件放入另一个本地队列，由单独的后台任务 send_notifications 发送，
+# SMTP 慢或不可用时不影响写入数据库；发送失败按指数退避重试，MAX_NOTIFY_ATTEMPTS 次后放弃。
+import fcntl
+import logging
+import smtplib
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Iterator, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.lib.durable_queue import DurableQueue, Message
+from app.models.models import Inquiry
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("inquiry", "contact")
+# 联系表单写入 inquiries 时的项目类型
+CONTACT_PROJECT_TYPE = "联系表单"
+MAX_RETRY_DELAY = 300
+MAX_NOTIFY_ATTEMPTS = 5
+# 数据库被锁或连接不可用的错误信息片段（小写）：与具体的提交无关，整批稍后重试
+TRANSIENT_ERRORS = (
+    "database is locked", "database is busy", "unable to open database", "could not connect",
+    "connection refused", "server closed the connection", "connection timed out", "lock wait timeout",
+)
+
+queue = DurableQueue(settings.INTAKE_QUEUE_PATH)
+notifications = DurableQueue(settings.INTAKE_NOTIFY_QUEUE_PATH)
+
+
+def submit(kind: str, payload: dict, key: Optional[str] = None) -> str:
+    """写入队列（已落盘）并返回幂等键；同一幂等键重复提交时只保留第一次"""
+    if kind not in KINDS:
+        raise ValueError(f"未知的提交类型: {kind}")
+    key = key or uuid.uuid4().hex
+    queue.put(f"{kind}:{key}", kind, payload)
+    return key
+
+
+def _row(message: Message) -> dict:
+    # 记录提交的时间而不是写入数据库的时间
+    created_at = datetime.fromtimestamp(message.enqueued_at, tz=timezone.utc).replace(tzinfo=None)
+    payload = message.payload
+    if message.kind == "contact":
+        values = {
+            "client_name": payload["name"],
+            "client_email": payload["email"],
+            "project_type": CONTACT_PROJECT_TYPE,
+            "description": f"主题: {payload['subject']}\n\n{payload['message']}",
+        }
+    else:
+        values = dict(payload)
+    return {**values, "status": "pending", "intake_key": message.key, "created_at": created_at,
+            "updated_at": created_at}
+
+
+def _insert(db: Session, messages: list[Message]) -> list[Message]:
+    """在一个事务中写入并提交，返回实际写入的（此前未写入过的）提交"""
+    keys = [message.key for message in messages]
+    existing = {key for (key,) in db.query(Inquiry.intake_key).filter(Inquiry.intake_key.in_(keys))}
+    fresh = [message for message in messages if message.key not in existing]
+    if fresh:
+        db.execute(insert(Inquiry), [_row(message) for message in fresh])
+    db.commit()
+    return fresh
+
+
+def _notify_contact(payload: dict) -> None:
+    msg = MIMEMultipart()
+    msg["From"] = settings.FROM_EMAIL
+    msg["To"] = settings.FROM_EMAIL
+    msg["Subject"] = f"来自 {payload['name']} 的联系 - {payload['subject']}"
+
+    body = f"""
+    姓名: {payload['name']}
+    邮箱: {payload['email']}
+    主题: {payload['subject']}
+
+    消息内容:
+    {payload['message']}
+    """
+    msg.attach(MIMEText(body, "plain", "utf-8"))
+
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT) as server:
+        server.starttls()
+        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        server.send_message(msg)
+
+
+def _is_transient(exc: OperationalError) -> bool:
+    """数据库被锁或不可用（而不是表结构等错误）"""
+    if exc.connection_invalidated:
+        return True
+    message = str(exc.orig).lower()
+    return any(marker in message for marker in TRANSIENT_ERRORS)
+
+
+@contextmanager
+def _consumer_lock(consumed: DurableQueue) -> Iterator[bool]:
+    """本机同一时刻只有一个消费者；已被其他 worker 持有时返回 False"""
+    path = consumed.path.with_name(consumed.path.name + ".lock")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+
+
+def drain(db: Session, batch_size: Optional[int] = None) -> int:
+    """把队列中可处理的提交写入 inquiries，返回写入的条数"""
+    batch_size = batch_size or settings.INTAKE_BATCH_SIZE
+    delivered = 0
+    with _consumer_lock(queue) as acquired:
+        if not acquired:
+            return 0
+        while True:
+            messages = queue.take(batch_size)
+            if not messages:
+                break
+            try:
+                fresh = _insert(db, messages)
+                done = messages
+            except Exception as exc:
+                db.rollback()
+                if isinstance(exc, OperationalError) and _is_transient(exc):
+                    # 数据库被锁或不可用，与具体的提交无关：留在队列中，下次再写入
+                    logger.warning("写入询价时数据库不可用，稍后重试", exc_info=True)
+                    break
+                logger.exception("批量写入询价失败，改为逐条写入")
+                fresh, done = [], []
+                for message in messages:
+                    try:
+                        fresh += _insert(db, [message])
+                        done.append(message)
+                    except Exception:
+                        db.rollback()
+                        delay = min(2 ** message.attempts, MAX_RETRY_DELAY)
+                        logger.exception(f"写入提交 {message.key} 失败（第 {message.attempts + 1} 次），{delay}s 后重试")
+                        queue.retry(message.id, delay)
+            if settings.SMTP_HOST:
+                # 只通知首次写入的提交，重复投递不会重复发送（提交之后、放入通知队列之前崩溃时这条通知丢失）
+                for message in fresh:
+                    if message.kind == "contact":
+                        notifications.put(message.key, message.kind, message.payload)
+            queue.ack([message.id for message in done])
+            delivered += len(fresh)
+            if len(messages) < batch_size:
+                break
+    return delivered
+
+
+def send_notifications(limit: int = 20) -> int:
+    """发送队列中的联系表单通知邮件，返回发送成功的封数"""
+    sent = 0
+    with _consumer_lock(notifications) as acquired:
+        if not acquired:
+            return 0
+        for message in notifications.take(limit):
+            try:
+                _notify_contact(message.payload)
+                sent += 1
+            except Exception:
+                if message.attempts + 1 < MAX_NOTIFY_ATTEMPTS:
+                    delay = min(2 ** message.attempts * 30, MAX_RETRY_DELAY)
+                    logger.warning(f"发送联系表单通知邮件失败: {message.key}，{delay}s 后重试", exc_info=True)
+                    notifications.retry(message.id, delay)
+                    continue
+                logger.exception(f"发送联系表单通知邮件失败 {MAX_NOTIFY_ATTEMPTS} 次，放弃: {message.key}")
+            notifications.ack([message.id])
+    return sent
+
+
+def stats() -> dict:
+    """队列深度等监控指标（本机）"""
+    return queue.stats()
@@ -0,0 +1,217 @@
+# 文章 Markdown 渲染：写入时渲染一次并存库，详情接口直接返回存储结果
+#
+# 渲染结果按 content_hash（渲染器版本 + 原文）判断是否过期；
+# 修改渲染配置时提升 RENDERER_VERSION，再执行批量重渲染命令。
+import hashlib
+import html
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+import markdown
+from markdown.extensions.toc import slugify_unicode
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.lib.text import split_segments
+from app.models.models import Post
+
+logger = logging.getLogger(__name__)
+
+RENDERER_VERSION = "2"
+
+MARKDOWN_EXTENSIONS = ["extra", "sane_lists", "toc"]
+MARKDOWN_EXTENSION_CONFIGS = {"toc": {"slugify": slugify_unicode}}
+
+# 阅读速度：中文按字、英文按词
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+# 自动摘要长度（字符）
+AUTO_EXCERPT_LENGTH = 160
+
+# 允许保留的标签及其属性（id/class 对所有标签开放，供目录锚点、代码高亮和脚注使用）
+ALLOWED_TAGS = {
+    "a": {"href", "title"},
+    "abbr": {"title"},
+    "blockquote": set(), "br": set(), "code": set(), "dd": set(), "del": set(), "div": set(),
+    "dl": set(), "dt": set(), "em": set(), "hr": set(), "li": set(), "ol": set(), "p": set(),
+    "pre": set(), "s": set(), "span": set(), "strong": set(), "sub": set(), "sup": set(),
+    "table": set(), "tbody": set(), "thead": set(), "tr": set(), "ul": set(),
+    "th": {"align", "colspan", "rowspan"},
+    "td": {"align", "colspan", "rowspan"},
+    "h1": set(), "h2": set(), "h3": set(), "h4": set(), "h5": set(), "h6": set(),
+    "img": {"src", "alt", "title"},
+}
+GLOBAL_ATTRIBUTES = {"id", "class"}
+URL_ATTRIBUTES = {"href", "src"}
+ALLOWED_SCHEMES = {"", "http", "https", "mailto"}
+VOID_TAGS = {"br", "hr", "img"}
+# 这些标签连同内容一起丢弃
+DROP_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed", "template"}
+
+
+class _Sanitizer(HTMLParser):
+    """白名单 HTML 过滤，同时收集纯文本（用于字数统计）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.text: list[str] = []
+        self.open_tags: list[str] = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_TAGS[tag] | GLOBAL_ATTRIBUTES
+        rendered = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and urlparse(value.strip()).scheme.lower() not in ALLOWED_SCHEMES:
+                continue
+            rendered.append(f' {name}="{html.escape(value, quote=True)}"')
+        if tag in VOID_TAGS:
+            self.parts.append(f"<{tag}{''.join(rendered)} />")
+        else:
+            self.parts.append(f"<{tag}{''.join(rendered)}>")
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # 补齐未闭合的内层标签
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.parts.append(f"</{current}>")
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.parts.append(html.escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.parts.append(f"</{self.open_tags.pop()}>")
+
+
+def sanitize_html(raw_html: str) -> tuple[str, str]:
+    """过滤 HTML，返回 (安全的 HTML, 纯文本)"""
+    sanitizer = _Sanitizer()
+    sanitizer.feed(raw_html)
+    sanitizer.close()
+    return "".join(sanitizer.parts), "".join(sanitizer.text)
+
+
+def content_hash(content: str) -> str:
+    """渲染结果的版本标识：渲染器版本 + 原文"""
+    return hashlib.sha256(f"{RENDERER_VERSION}\n{content or ''}".encode("utf-8")).hexdigest()
+
+
+def reading_stats(plain_text: str) -> tuple[int, int]:
+    """返回 (字数, 阅读分钟数)，中文逐字计数，其余按单词计数"""
+    cjk_chars = 0
+    words = 0
+    for segment, is_cjk in split_segments(plain_text):
+        if is_cjk:
+            cjk_chars += len(segment)
+        else:
+            words += 1
+    minutes = math.ceil(cjk_chars / CJK_CHARS_PER_MINUTE + words / WORDS_PER_MINUTE)
+    return cjk_chars + words, max(minutes, 1)
+
+
+def make_excerpt(plain_text: str, length: int = AUTO_EXCERPT_LENGTH) -> str:
+    """从正文纯文本截取摘要（合并空白，超长时截断并加省略号）"""
+    text = " ".join(plain_text.split())
+    if len(text) <= length:
+        return text
+    return text[:length].rstrip() + "…"
+
+
+def _toc_entries(tokens: list[dict]) -> list[dict]:
+    return [
+        {"level": t["level"], "id": t["id"], "name": t["name"], "children": _toc_entries(t["children"])}
+        for t in tokens
+    ]
+
+
+def render_markdown(content: str) -> dict:
+    """渲染 Markdown，返回可直接写入 Post 的字段"""
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, extension_configs=MARKDOWN_EXTENSION_CONFIGS)
+    safe_html, plain_text = sanitize_html(md.convert(content or ""))
+    word_count, reading_time = reading_stats(plain_text)
+    return {
+        "content_html": safe_html,
+        "content_hash": content_hash(content),
+        "toc": _toc_entries(md.toc_tokens),
+        "word_count": word_count,
+        "reading_time": reading_time,
+        "auto_excerpt": make_excerpt(plain_text),
+    }
+
+
+def render_post(post: Post) -> bool:
+    """内容或渲染器有变化时重新渲染文章，返回是否重新渲染"""
+    if post.content_html is not None and post.content_hash == content_hash(post.content):
+        return False
+    for key, value in render_markdown(post.content).items():
+        setattr(post, key, value)
+    return True
+
+
+def _render_row(row: tuple[int, str]) -> dict:
+    post_id, content = row
+    return {"id": post_id, **render_markdown(content)}
+
+
+def rerender_posts(db: Session, force: bool = False, workers: int | None = None, batch_size: int = 200) -> int:
+    """
+    批量重渲染文章（多进程），返回重渲染的数量
+    默认只处理未渲染或渲染结果过期的文章；force=True 时全部重渲染
+    """
+    workers = workers or os.cpu_count() or 1
+    rendered = 0
+    last_id = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            rows = db.query(Post.id, Post.content, Post.content_hash) \
+                .filter(Post.id > last_id) \
+                .order_by(Post.id) \
+                .limit(batch_size) \
+                .all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            stale = [(post_id, content) for post_id, content, stored_hash in rows
+                     if force or stored_hash != content_hash(content)]
+            if not stale:
+                continue
+            chunksize = max(len(stale) // (workers * 4), 1)
+            results = list(pool.map(_render_row, stale, chunksize=chunksize))
+            db.execute(update(Post), results)
+            db.commit()
+            rendered += len(results)
+            logger.info(f"已渲染 {rendered} 篇文章")
+    return rendered
@@ -0,0 +1,189 @@
+# 媒体上传：流式写入磁盘并按内容去重
+#
+# 直接用 python-multipart 的流式解析器处理请求体，不经过 UploadFile（它会先把整个文件缓存到内存或临时文件，
+# 之后还要再复制一遍）。每收到一块数据就写入 MEDIA_ROOT/uploads/.tmp 下的临时文件并更新 SHA-256，
+# 内存占用与文件大小无关。Content-Length 或实际写入超过大小限制、文件头不是允许的图片类型时立即中止，
+# 不再读取剩余的请求体。
+# 写完后以内容摘要命名为 uploads/<摘要前两位>/<摘要>.<扩展名>：相同的文件只保存一份，URL 只由内容决定，
+# 可以直接填入文章、项目的 cover_image 或作品的 image_url（派生版本见 app.services.image_variants）。
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.lib import images
+
+FIELD_NAME = "file"
+# 请求体中除文件内容外的 multipart 边界与头部等开销上限
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadRejected(ValueError):
+    """上传不符合要求，status_code 为应返回的 HTTP 状态码"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+
+
+class _Receiver:
+    """multipart 解析回调：把名为 file 的文件字段写入临时文件，其他字段忽略"""
+
+    def __init__(self, tmp_dir: Path, max_bytes: int):
+        self.tmp_dir = tmp_dir
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.content_type: Optional[str] = None  # 按文件头识别的类型
+        self.tmp_path: Optional[str] = None
+        self.done = False
+        self._file = None
+        self._head = b""
+        self._headers: dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def _part_begin(self) -> None:
+        self._headers = {}
+
+    def _header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def _headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._in_file = options.get(b"name") == FIELD_NAME.encode() and b"filename" in options
+        if not self._in_file:
+            return
+        if self.done or self._file is not None:
+            raise UploadRejected(400, "一次只能上传一个文件")
+        claimed, _ = parse_options_header(self._headers.get(b"content-type", b"application/octet-stream"))
+        if claimed.decode("latin-1").lower() not in (*images.UPLOAD_TYPES, "application/octet-stream"):
+            raise UploadRejected(415, f"不支持的文件类型，支持: {', '.join(images.UPLOAD_TYPES)}")
+        fd, self.tmp_path = tempfile.mkstemp(dir=self.tmp_dir, prefix="upload-")
+        self._file = os.fdopen(fd, "wb")
+
+    def _part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_file:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadRejected(413, f"文件超过 {self.max_bytes // (1024 * 1024)}MB")
+        if self.content_type is None:
+            self._head += chunk
+            if len(self._head) >= images.SNIFF_BYTES:
+                self._check_type()
+        self.digest.update(chunk)
+        self._file.write(chunk)
+
+    def _part_end(self) -> None:
+        if not self._in_file:
+            return
+        if self.content_type is None:
+            self._check_type()
+        self._file.close()
+        self._in_file = False
+        self.done = True
+
+    def _check_type(self) -> None:
+        self.content_type = images.sniff(self._head)
+        if self.content_type is None:
+            raise UploadRejected(415, f"文件内容不是支持的图片格式，支持: {', '.join(images.UPLOAD_TYPES)}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if self.tmp_path is not None and os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+
+def _store(receiver: _Receiver, root: Path, url_prefix: str) -> dict:
+    """校验图片尺寸，按内容摘要移动到最终位置（已存在相同文件时丢弃本次上传）"""
+    try:
+        with Image.open(receiver.tmp_path) as image:
+            width, height = image.size
+    except Exception as e:
+        raise UploadRejected(400, "无法识别的图片文件") from e
+    if width * height > images.MAX_PIXELS:
+        raise UploadRejected(413, f"图片像素过多: {width}x{height}")
+
+    sha256 = receiver.digest.hexdigest()
+    relative = f"uploads/{sha256[:2]}/{sha256}.{images.UPLOAD_TYPES[receiver.content_type]}"
+    target = root / relative
+    deduplicated = target.exists()
+    if not deduplicated:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(receiver.tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件只有属主可读，nginx 需要读取
+        os.chmod(receiver.tmp_path, 0o644)
+        # 同一文件并发上传时后完成的覆盖先完成的，内容相同
+        os.replace(receiver.tmp_path, target)
+    return {
+        "url": url_prefix.rstrip("/") + "/" + relative,
+        "sha256": sha256,
+        "size": receiver.size,
+        "content_type": receiver.content_type,
+        "width": width,
+        "height": height,
+        "deduplicated": deduplicated,
+    }
+
+
+async def receive(chunks: AsyncIterator[bytes], content_type: str, content_length: Optional[str]) -> dict:
+    """解析 multipart 请求体并保存其中的图片，返回 {url, sha256, size, content_type, width, height, deduplicated}"""
+    max_bytes = settings.MEDIA_UPLOAD_MAX_BYTES
+    mime, options = parse_options_header(content_type or "")
+    boundary = options.get(b"boundary")
+    if mime != b"multipart/form-data" or not boundary:
+        raise UploadRejected(400, "请使用 multipart/form-data 上传，文件字段名为 file")
+    limit = max_bytes + FORM_OVERHEAD
+    # 声明的长度已超限时不读取请求体
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise UploadRejected(413, f"文件超过 {max_bytes // (1024 * 1024)}MB")
+
+    root = Path(settings.MEDIA_ROOT)
+    tmp_dir = root / "uploads" / ".tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    receiver = _Receiver(tmp_dir, max_bytes)
+    parser = MultipartParser(boundary, receiver.callbacks())
+    try:
+        received = 0
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > limit:
+                raise UploadRejected(413, f"文件超过 {max_bytes // (1024 * 1024)}MB")
+            if chunk:
+                # 解析与写盘在线程池中执行，不阻塞事件循环
+                await run_in_threadpool(parser.write, chunk)
+        parser.finalize()
+        if not receiver.done:
+            raise UploadRejected(400, "请求中没有名为 file 的文件")
+        return await run_in_threadpool(_store, receiver, root, settings.MEDIA_URL)
+    finally:
+        receiver.close()
@@ -0,0 +1,121 @@
+# 论坛批量清理（管理端）
+#
+# 按 id 列表或筛选条件（作者、时间范围、关键词）批量删除话题/评论。
+# 只按主键顺序分批读取匹配的 id，每批在一个事务中执行 DELETE ... WHERE id IN (...)，
+# 话题的评论（Topic.comments 没有级联）和评论的全部回复都显式一并删除。
+# dry_run 时只统计将被删除的数量，不做修改；matched 在删除前用同一个筛选条件一次计数，预览与实际执行一致。
+from collections import Counter
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Comment, Topic
+from app.schemas.topic import BulkDeleteRequest
+from app.services import comment_threads, counters, site_search, topic_activity
+
+CHUNK_SIZE = 500
+
+
+def _filters(model, criteria: BulkDeleteRequest) -> list:
+    conditions = []
+    if criteria.ids:
+        conditions.append(model.id.in_(criteria.ids))
+    if criteria.author_id is not None:
+        conditions.append(model.author_id == criteria.author_id)
+    if criteria.created_after is not None:
+        conditions.append(model.created_at >= criteria.created_after)
+    if criteria.created_before is not None:
+        conditions.append(model.created_at < criteria.created_before)
+    if criteria.search:
+        if model is Topic:
+            conditions.append(Topic.title.contains(criteria.search) | Topic.content.contains(criteria.search))
+        else:
+            conditions.append(model.content.contains(criteria.search))
+    return conditions
+
+
+def delete_topics(db: Session, criteria: BulkDeleteRequest, chunk_size: int = CHUNK_SIZE) -> dict:
+    """批量删除匹配的话题及其评论，返回数量统计"""
+    conditions = _filters(Topic, criteria)
+    result = {"matched": 0, "topics_deleted": 0, "comments_deleted": 0, "dry_run": criteria.dry_run}
+    last_id = 0
+    while True:
+        ids = db.scalars(
+            select(Topic.id).where(*conditions, Topic.id > last_id).order_by(Topic.id).limit(chunk_size)
+        ).all()
+        if not ids:
+            break
+        last_id = ids[-1]
+        result["matched"] += len(ids)
+        if criteria.dry_run:
+            result["topics_deleted"] += len(ids)
+            result["comments_deleted"] += db.query(func.count(Comment.id)) \
+                .filter(Comment.topic_id.in_(ids)).scalar()
+            continue
+        # Core DELETE 不触发 ORM 事件，显式记录站内搜索的变更
+        site_search.record(db, "comment", db.scalars(select(Comment.id).where(Comment.topic_id.in_(ids))).all())
+        site_search.record(db, "topic", ids)
+        result["comments_deleted"] += db.execute(
+            delete(Comment).where(Comment.topic_id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        removed = db.execute(
+            delete(Topic).where(Topic.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        counters.increment(db, counters.TOPICS, -removed)
+        db.commit()
+        result["topics_deleted"] += removed
+    return result
+
+
+def _subtree_ids(db: Session, roots: list) -> list[tuple[int, int | None]]:
+    """roots（互不包含）及其全部回复的 (id, topic_id)"""
+    rows = [(root.id, root.topic_id) for root in roots if root.path is None]
+    threaded = [root for root in roots if root.path is not None]
+    if not threaded:
+        return rows
+    # 按楼取出候选评论，再按路径前缀筛出子树，避免拼接大量区间条件
+    candidates = db.query(Comment.id, Comment.topic_id, Comment.path) \
+        .filter(Comment.thread_id.in_({root.thread_id for root in threaded}))
+    prefixes = tuple(root.path for root in threaded)
+    rows.extend((row.id, row.topic_id) for row in candidates if row.path and row.path.startswith(prefixes))
+    return rows
+
+
+def delete_comments(db: Session, criteria: BulkDeleteRequest, chunk_size: int = CHUNK_SIZE) -> dict:
+    """批量删除匹配的评论及其全部回复，并更新所属话题的活跃度，返回数量统计"""
+    conditions = _filters(Comment, criteria)
+    # 实际执行时，匹配的回复可能已随前一批祖先的子树删除，不会再被分批读到：匹配数在删除前统计
+    matched = db.query(func.count(Comment.id)).filter(*conditions).scalar()
+    result = {"matched": matched, "topics_deleted": 0, "comments_deleted": 0, "dry_run": criteria.dry_run}
+    # 已处理的匹配评论；按 id 正序遍历时祖先先于回复出现，祖先已匹配的回复随祖先的子树计入
+    seen: set[int] = set()
+    last_id = 0
+    while True:
+        chunk = db.query(Comment.id, Comment.topic_id, Comment.thread_id, Comment.path) \
+            .filter(*conditions, Comment.id > last_id) \
+            .order_by(Comment.id) \
+            .limit(chunk_size) \
+            .all()
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        roots = []
+        for comment in chunk:
+            seen.add(comment.id)
+            if not any(ancestor in seen for ancestor in comment_threads.ancestor_ids(comment.path)):
+                roots.append(comment)
+        rows = _subtree_ids(db, roots)
+        result["comments_deleted"] += len(rows)
+        if criteria.dry_run or not rows:
+            continue
+        for start in range(0, len(rows), chunk_size):
+            ids = [comment_id for comment_id, _ in rows[start:start + chunk_size]]
+            db.execute(delete(Comment).where(Comment.id.in_(ids)), execution_options={"synchronize_session": False})
+            site_search.record(db, "comment", ids)
+        db.flush()
+        for topic_id, count in Counter(topic_id for _, topic_id in rows if topic_id is not None).items():
+            topic_activity.comment_removed(db, topic_id, count)
+        db.commit()
+    return result
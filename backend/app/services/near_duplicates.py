@@ -0,0 +1,123 @@
+# 近似重复内容检测（灌水/刷屏）
+#
+# 每个 worker 在内存中维护近期话题与评论的 MinHash LSH 索引（app.lib.minhash），
+# 按主键范围读取新增的行加入索引，因此其他 worker 写入的内容同样会被检测到。
+# 索引定期及关闭时保存快照，重启后载入快照并补读之后的新增内容。
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.lib import minhash
+from app.models.models import Comment, Topic
+
+logger = logging.getLogger(__name__)
+
+# 索引条目引用：id * 2 + 类型
+_KINDS = ("topic", "comment")
+
+index = minhash.MinHashIndex(settings.NEAR_DUPLICATE_CAPACITY)
+# 各类型已加入索引的最大 id
+last_ids = {kind: 0 for kind in _KINDS}
+_sync_lock = threading.Lock()
+
+
+def _ref(kind: str, row_id: int) -> int:
+    return row_id * len(_KINDS) + _KINDS.index(kind)
+
+
+def describe(ref: int) -> tuple[str, int]:
+    """索引引用 -> (类型, id)"""
+    return _KINDS[ref % len(_KINDS)], ref // len(_KINDS)
+
+
+def topic_text(title: str, content: str) -> str:
+    return f"{title}\n{content}"
+
+
+def _sources(db: Session):
+    yield "topic", Topic, db.query(Topic.id, Topic.title, Topic.content)
+    yield "comment", Comment, db.query(Comment.id, Comment.content)
+
+
+def sync(db: Session, batch_size: int = 1000, wait: bool = True) -> int:
+    """
+    把上次之后新增的话题与评论加入索引，返回加入的条数
+    wait=False 时若其他线程正在同步（如启动时的全量补读）则直接返回
+    """
+    if not _sync_lock.acquire(blocking=wait):
+        return 0
+    added = 0
+    try:
+        for kind, model, query in _sources(db):
+            while True:
+                rows = query.filter(model.id > last_ids[kind]).order_by(model.id).limit(batch_size).all()
+                if not rows:
+                    break
+                for row in rows:
+                    text = topic_text(row.title, row.content) if kind == "topic" else row.content
+                    sig = minhash.signature(text)
+                    if sig is not None:
+                        index.add(sig, _ref(kind, row.id))
+                        added += 1
+                last_ids[kind] = rows[-1].id
+    finally:
+        _sync_lock.release()
+    return added
+
+
+def find(db: Session, text: str) -> Optional[tuple[str, int, float]]:
+    """与近期内容的近似重复：(类型, id, 估计相似度)，没有时返回 None"""
+    sig = minhash.signature(text)
+    if sig is None:
+        return None
+    sync(db, wait=False)
+    match = index.query(sig, settings.NEAR_DUPLICATE_THRESHOLD)
+    if match is None:
+        return None
+    kind, row_id = describe(match.ref)
+    return kind, row_id, match.similarity
+
+
+def screen(db: Session, text: str, author_id: int) -> bool:
+    """检查待发布的内容，返回是否应拒绝（NEAR_DUPLICATE_ACTION 为 reject 且命中）"""
+    if settings.NEAR_DUPLICATE_ACTION == "off":
+        return False
+    try:
+        duplicate = find(db, text)
+    except Exception:
+        # 检测失败不影响发布
+        logger.exception("近似重复检测失败")
+        return False
+    if duplicate is None:
+        return False
+    kind, row_id, similarity = duplicate
+    logger.warning(f"用户 {author_id} 提交的内容与 {kind} {row_id} 近似重复（相似度 {similarity:.2f}）")
+    return settings.NEAR_DUPLICATE_ACTION == "reject"
+
+
+def load(db: Session, path: str) -> None:
+    """启动时载入快照；快照比数据库新（数据库已重建）时丢弃，从近期数据重建"""
+    for kind in _KINDS:
+        last_ids[kind] = 0
+    meta = index.load(path)
+    if meta is not None:
+        current = {kind: db.query(func.max(model.id)).scalar() or 0 for kind, model, _ in _sources(db)}
+        if all(meta.get(f"last_{kind}_id", 0) <= current[kind] for kind in _KINDS):
+            for kind in _KINDS:
+                last_ids[kind] = meta.get(f"last_{kind}_id", 0)
+            logger.info(f"近似重复索引已载入：{len(index)} 条")
+            return
+        index.reset()
+    # 没有可用快照：只需索引最近 capacity 条内容
+    for kind, model, _ in _sources(db):
+        start = db.query(model.id).order_by(model.id.desc()).offset(index.capacity).limit(1).scalar()
+        last_ids[kind] = start or 0
+
+
+def save(path: str) -> None:
+    with _sync_lock:
+        index.save(path, **{f"last_{kind}_id": last_ids[kind] for kind in _KINDS})
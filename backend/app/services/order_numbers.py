@@ -0,0 +1,150 @@
+# 订单号：ORD-<UTC 日期>-<13 位 Base32 的 Snowflake id>，例如 ORD-20261018-0ABC3DEF4GH5J
+#
+# 生成时不访问数据库。每个进程（gunicorn worker，可分布在多台主机上）启动时从 worker_leases 表领取一个 worker id：
+# 取租约已过期的最小 id（比较并交换 expires_at），没有则追加一个新 id；之后每 ORDER_WORKER_LEASE_SECONDS / 3 秒续期，
+# 关闭时把租约到期时间设为已分配的最后一个时间戳之后，重启的进程可以立即接手。
+# 接手的进程只分配上一个持有者租约到期之后的时间戳，续期失败的进程在租约到期后停止分配，因此订单号不会重复。
+# 订单号按生成时间递增，字符串顺序与生成顺序一致。
+import logging
+import os
+import secrets
+import socket
+import threading
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.lib import snowflake
+from app.models.models import WorkerLease
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "ORD"
+
+
+_DAY_MS = 86_400_000
+_day_prefix = (-1, "")  # (自 Unix 纪元的天数, "ORD-YYYYMMDD-")
+
+
+def format_order_no(value: int) -> str:
+    global _day_prefix
+    day = snowflake.parts(value)[0] // _DAY_MS
+    if day != _day_prefix[0]:
+        _day_prefix = (day, f"{PREFIX}-{snowflake.timestamp(value):%Y%m%d}-")
+    return _day_prefix[1] + snowflake.encode(value)
+
+
+def parse_order_no(order_no: str) -> tuple[int, int, int]:
+    """订单号 -> (毫秒时间戳, worker id, 序号)；格式不正确时抛出 ValueError"""
+    prefix, _, rest = order_no.partition("-")
+    _, _, encoded = rest.partition("-")
+    if prefix != PREFIX or len(encoded) != snowflake.ENCODED_LENGTH:
+        raise ValueError(f"无效的订单号: {order_no}")
+    return snowflake.parts(snowflake.decode(encoded))
+
+
+def claim(db: Session, owner: str, now_ms: int, lease_ms: int) -> tuple[int, int]:
+    """领取一个 worker id 并提交，返回 (worker id, 上一个持有者的租约到期时间)"""
+    while True:
+        row = db.execute(
+            select(WorkerLease.worker_id, WorkerLease.expires_at)
+            .where(WorkerLease.expires_at <= now_ms)
+            .order_by(WorkerLease.worker_id)
+            .limit(1)
+        ).first()
+        if row is not None:
+            worker_id, previous = row
+            result = db.execute(
+                update(WorkerLease)
+                .where(WorkerLease.worker_id == worker_id, WorkerLease.expires_at == previous)
+                .values(owner=owner, expires_at=now_ms + lease_ms)
+            )
+            if result.rowcount == 1:
+                db.commit()
+                return worker_id, previous
+            # 被其他进程抢先接手
+            db.rollback()
+            continue
+
+        worker_id = db.execute(select(func.count()).select_from(WorkerLease)).scalar()
+        if worker_id >= snowflake.MAX_WORKERS:
+            raise RuntimeError("没有可用的 worker id")
+        try:
+            db.add(WorkerLease(worker_id=worker_id, owner=owner, expires_at=now_ms + lease_ms))
+            db.commit()
+            return worker_id, 0
+        except IntegrityError:
+            db.rollback()
+
+
+class OrderNumbers:
+    def __init__(self, lease_seconds: int):
+        self.lease_ms = lease_seconds * 1000
+        self._lock = threading.Lock()
+        self._generator: Optional[snowflake.Snowflake] = None
+        self._owner = ""
+
+    @property
+    def worker_id(self) -> Optional[int]:
+        generator = self._generator
+        return generator.worker_id if generator is not None else None
+
+    def start(self, db: Session) -> int:
+        """领取 worker id，返回 worker id"""
+        owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        now = snowflake.now_ms()
+        worker_id, previous = claim(db, owner, now, self.lease_ms)
+        with self._lock:
+            self._owner = owner
+            self._generator = snowflake.Snowflake(
+                worker_id, not_before_ms=previous, valid_until_ms=now + self.lease_ms
+            )
+        logger.info(f"订单号 worker id: {worker_id}")
+        return worker_id
+
+    def renew(self, db: Session) -> None:
+        """续期；租约已被其他进程接手时停止分配，尚未领取（或领取失败）时重新领取"""
+        generator = self._generator
+        if generator is None:
+            self.start(db)
+            return
+        expires_at = snowflake.now_ms() + self.lease_ms
+        result = db.execute(
+            update(WorkerLease)
+            .where(WorkerLease.worker_id == generator.worker_id, WorkerLease.owner == self._owner)
+            .values(expires_at=expires_at)
+        )
+        db.commit()
+        if result.rowcount == 1:
+            generator.extend(expires_at)
+            return
+        with self._lock:
+            if self._generator is generator:
+                self._generator = None
+        logger.error(f"订单号 worker id {generator.worker_id} 的租约已被接手")
+
+    def stop(self, db: Session) -> None:
+        """释放 worker id：租约到期时间设为已分配的最后一个时间戳之后"""
+        with self._lock:
+            generator, self._generator = self._generator, None
+        if generator is None:
+            return
+        db.execute(
+            update(WorkerLease)
+            .where(WorkerLease.worker_id == generator.worker_id, WorkerLease.owner == self._owner)
+            .values(expires_at=generator.last_ms + 1)
+        )
+        db.commit()
+
+    def generate(self) -> str:
+        """生成订单号；未领取 worker id 或租约过期时抛出 RuntimeError"""
+        generator = self._generator
+        if generator is None:
+            raise RuntimeError("订单号生成器未启动")
+        return format_order_no(generator.next_id())
+
+
+order_numbers = OrderNumbers(settings.ORDER_WORKER_LEASE_SECONDS)
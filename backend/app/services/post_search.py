@@ -0,0 +1,178 @@
+# 文章全文检索
+#
+# 索引表由 app.models.models 中的 DDL 创建：SQLite 使用 FTS5 虚拟表 posts_fts，
+# PostgreSQL 使用 post_search（tsvector + GIN 索引）。中文按二元组（另加单字，见 index_tokens）预先分词后写入，
+# 因此两种数据库都只需要最简单的空白分词器。
+# 索引中只保存已发布的文章，检索时无需再关联 posts 表过滤发布状态。
+import html
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.lib.text import cjk_bigrams, index_tokens, split_segments
+from app.models.models import Post
+
+logger = logging.getLogger(__name__)
+
+# 标题命中的权重高于正文
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+SNIPPET_WIDTH = 120
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def _index_text(value: str | None) -> str:
+    return " ".join(index_tokens(value or ""))
+
+
+def _fts5_query(query: str) -> str:
+    """构造 FTS5 查询：CJK 片段为二元组短语，拉丁单词做前缀匹配，各部分之间为 AND"""
+    parts = []
+    for segment, is_cjk in split_segments(query):
+        if is_cjk:
+            parts.append('"' + " ".join(cjk_bigrams(segment)) + '"')
+        else:
+            parts.append(f'"{segment}"*')
+    return " ".join(parts)
+
+
+def _tsquery(query: str) -> str:
+    """构造 PostgreSQL tsquery：CJK 片段使用 <-> 相邻短语，拉丁单词做前缀匹配"""
+    parts = []
+    for segment, is_cjk in split_segments(query):
+        if is_cjk:
+            parts.append("(" + " <-> ".join(f"'{gram}'" for gram in cjk_bigrams(segment)) + ")")
+        else:
+            parts.append(f"'{segment}':*")
+    return " & ".join(parts)
+
+
+def index_post(db: Session, post: Post) -> None:
+    """写入或更新文章的索引，未发布的文章从索引中移除（与业务写入在同一事务中，由调用方提交）"""
+    if post.published:
+        _write_index(db, post.id, post.title, post.content)
+    else:
+        remove_post(db, post.id)
+
+
+def _write_index(db: Session, post_id: int, title: str | None, content: str | None) -> None:
+    params = {"id": post_id, "title": _index_text(title), "body": _index_text(content)}
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        db.execute(text("DELETE FROM posts_fts WHERE rowid = :id"), {"id": post_id})
+        db.execute(text("INSERT INTO posts_fts (rowid, title, body) VALUES (:id, :title, :body)"), params)
+    elif dialect == "postgresql":
+        db.execute(
+            text(
+                "INSERT INTO post_search (post_id, document) VALUES (:id, "
+                "setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :body), 'B')) "
+                "ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            params,
+        )
+
+
+def remove_post(db: Session, post_id: int) -> None:
+    """从索引中删除文章"""
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        db.execute(text("DELETE FROM posts_fts WHERE rowid = :id"), {"id": post_id})
+    elif dialect == "postgresql":
+        db.execute(text("DELETE FROM post_search WHERE post_id = :id"), {"id": post_id})
+
+
+def search_posts(db: Session, query: str, offset: int, limit: int) -> tuple[list[int], int] | None:
+    """
+    检索已发布文章，按相关度排序
+    返回 (文章ID列表, 命中总数)；当前数据库不支持全文检索时返回 None，由调用方回退到 LIKE
+    """
+    dialect = _dialect(db)
+    if dialect not in ("sqlite", "postgresql"):
+        return None
+    if not split_segments(query):
+        return [], 0
+
+    if dialect == "sqlite":
+        params = {"match": _fts5_query(query)}
+        id_column = "rowid"
+        base = "FROM posts_fts WHERE posts_fts MATCH :match"
+        order = f"bm25(posts_fts, {TITLE_WEIGHT}, {BODY_WEIGHT})"
+    else:
+        params = {"match": _tsquery(query)}
+        id_column = "post_id"
+        base = "FROM post_search WHERE document @@ to_tsquery('simple', :match)"
+        order = "ts_rank(document, to_tsquery('simple', :match)) DESC"
+
+    total = db.execute(text(f"SELECT count(*) {base}"), params).scalar()
+    rows = db.execute(
+        text(f"SELECT {id_column} {base} ORDER BY {order}, {id_column} DESC LIMIT :limit OFFSET :offset"),
+        {**params, "limit": limit, "offset": offset},
+    )
+    return [row[0] for row in rows], total
+
+
+def make_snippet(content: str, query: str, width: int = SNIPPET_WIDTH) -> str:
+    """在原文中截取命中片段，HTML 转义后用 <mark> 标记命中词"""
+    content = content or ""
+    lowered = content.lower()
+    terms = sorted({segment for segment, _ in split_segments(query)}, key=len, reverse=True)
+
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    end = min(start + width, len(content))
+    window = content[start:end]
+    lowered_window = lowered[start:end]
+
+    # 从左到右标记命中位置，较长的词优先
+    pieces = []
+    i = 0
+    while i < len(window):
+        term = next((t for t in terms if t and lowered_window.startswith(t, i)), None)
+        if term:
+            pieces.append(f"<mark>{html.escape(window[i:i + len(term)])}</mark>")
+            i += len(term)
+        else:
+            pieces.append(html.escape(window[i]))
+            i += 1
+
+    snippet = "".join(pieces)
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(content):
+        snippet = snippet + "…"
+    return snippet
+
+
+def rebuild_index(db: Session, batch_size: int = 500) -> int:
+    """全量重建文章索引（仅已发布文章），返回写入的文章数"""
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        db.execute(text("DELETE FROM posts_fts"))
+    elif dialect == "postgresql":
+        db.execute(text("DELETE FROM post_search"))
+    else:
+        return 0
+
+    # 按主键分批读取，避免一次性加载全部正文
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.query(Post.id, Post.title, Post.content) \
+            .filter(Post.published == True, Post.id > last_id) \
+            .order_by(Post.id) \
+            .limit(batch_size) \
+            .all()
+        if not rows:
+            break
+        for post_id, title, content in rows:
+            _write_index(db, post_id, title, content)
+        count += len(rows)
+        last_id = rows[-1][0]
+    db.commit()
+    logger.info(f"文章全文索引重建完成，共 {count} 篇")
+    return count
@@ -0,0 +1,120 @@
+# 项目技术栈标签
+#
+# Project.tech_stack（JSON 列表）仍是项目的原始数据，写入路由在同一事务中调用 sync_project()/remove_project()，
+# 把它规范化到 tags / project_tags 两张表，并维护每个标签的项目数（Tag.project_count）。
+# 按技术筛选项目走 project_tags 上的索引，标签的项目数直接读冗余计数，都不需要扫描 JSON。
+from typing import Iterable, Literal
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.lib.prefix_index import normalize
+from app.models.models import Project, ProjectTag, Tag
+
+MAX_TAG_LENGTH = 100
+
+
+def tag_names(tech_stack) -> dict[str, str]:
+    """技术栈列表 -> {规范化名称: 首次出现的写法}，同一项目内去重"""
+    names = {}
+    for value in tech_stack if isinstance(tech_stack, list) else []:
+        name = " ".join(str(value).split())[:MAX_TAG_LENGTH]
+        slug = normalize(name)
+        if slug:
+            names.setdefault(slug, name)
+    return names
+
+
+def _tag_ids(db: Session, names: dict[str, str]) -> dict[str, int]:
+    """取标签 id，不存在的标签新建（并发新建同一标签时以先提交的为准）"""
+    ids = dict(db.query(Tag.slug, Tag.id).filter(Tag.slug.in_(names))) if names else {}
+    for slug, name in names.items():
+        if slug in ids:
+            continue
+        try:
+            with db.begin_nested():
+                tag = Tag(slug=slug, name=name, project_count=0)
+                db.add(tag)
+            ids[slug] = tag.id
+        except IntegrityError:
+            ids[slug] = db.query(Tag.id).filter(Tag.slug == slug).scalar()
+    return ids
+
+
+def _adjust(db: Session, tag_ids: Iterable[int], delta: int) -> None:
+    tag_ids = list(tag_ids)
+    if tag_ids:
+        db.execute(
+            update(Tag).where(Tag.id.in_(tag_ids)).values(project_count=Tag.project_count + delta),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def sync_project(db: Session, project: Project) -> None:
+    """按项目当前的 tech_stack 更新关联与计数（在当前事务中，由调用方提交；项目需已 flush）"""
+    wanted = set(_tag_ids(db, tag_names(project.tech_stack)).values())
+    current = set(db.scalars(select(ProjectTag.tag_id).where(ProjectTag.project_id == project.id)))
+    added, removed = wanted - current, current - wanted
+    if removed:
+        db.execute(delete(ProjectTag).where(ProjectTag.project_id == project.id, ProjectTag.tag_id.in_(removed)))
+        _adjust(db, removed, -1)
+    if added:
+        db.execute(insert(ProjectTag), [{"project_id": project.id, "tag_id": tag_id} for tag_id in added])
+        _adjust(db, added, 1)
+
+
+def remove_project(db: Session, project_id: int) -> None:
+    """删除项目前移除其标签关联（在当前事务中，由调用方提交）"""
+    tag_ids = db.scalars(select(ProjectTag.tag_id).where(ProjectTag.project_id == project_id)).all()
+    if tag_ids:
+        db.execute(delete(ProjectTag).where(ProjectTag.project_id == project_id))
+        _adjust(db, tag_ids, -1)
+
+
+def filter_projects(query, tech: list[str], match: Literal["all", "any"]):
+    """筛选使用了 tech 中全部（all）或任一（any）技术的项目"""
+    slugs = {normalize(name) for name in tech} - {""}
+    if not slugs:
+        return query
+    matching = select(ProjectTag.project_id).join(Tag, Tag.id == ProjectTag.tag_id).where(Tag.slug.in_(slugs))
+    if match == "all":
+        matching = matching.group_by(ProjectTag.project_id).having(func.count() == len(slugs))
+    return query.filter(Project.id.in_(matching))
+
+
+def facets(db: Session, limit: int) -> list[Tag]:
+    """使用最多的技术栈标签（读取冗余计数）"""
+    return db.query(Tag).filter(Tag.project_count > 0) \
+        .order_by(Tag.project_count.desc(), Tag.slug.asc()) \
+        .limit(limit).all()
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    """为全部项目重建标签关联并校准计数（升级或数据被直接修改后使用），返回项目数"""
+    count = 0
+    last_id = 0
+    while True:
+        projects = db.query(Project).filter(Project.id > last_id).order_by(Project.id).limit(batch_size).all()
+        if not projects:
+            break
+        for project in projects:
+            sync_project(db, project)
+        db.commit()
+        last_id = projects[-1].id
+        count += len(projects)
+    recount(db)
+    return count
+
+
+def recount(db: Session) -> int:
+    """用关联表校准全部标签的项目数，返回被修正的标签数"""
+    actual = dict(db.query(ProjectTag.tag_id, func.count()).group_by(ProjectTag.tag_id))
+    fixed = 0
+    for tag in db.query(Tag):
+        expected = actual.get(tag.id, 0)
+        if tag.project_count != expected:
+            tag.project_count = expected
+            fixed += 1
+    db.commit()
+    return fixed
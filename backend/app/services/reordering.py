@@ -0,0 +1,92 @@
+# 批量调整排序（项目、作品集、服务的 sort_order）
+#
+# 管理端拖拽排序后提交该集合的完整 id 列表。sort_order 使用稀疏排名（相邻间隔 RANK_GAP），
+# 只改写相对顺序发生变化的行：保留新顺序中排名已严格递增的最长子序列，其余行在前后保留行之间取中间值。
+# 拖动一项只改写这一行；间隔用尽（或原有排名重复）时整体按 RANK_GAP 重新编号。
+# 所有改动用一条 UPDATE ... CASE 写入，并记录到变更日志（首页缓存、站内搜索据此刷新），提交后重建目录快照。
+import bisect
+from typing import Optional
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from app.services import catalog_snapshots, site_search
+
+RANK_GAP = 1024
+
+
+def _kept_positions(ranks: list[int]) -> set[int]:
+    """排名严格递增的最长子序列（位置集合），O(n log n)"""
+    tails: list[int] = []  # tails[k]：长度为 k+1 的递增子序列的最小结尾排名
+    tail_positions: list[int] = []
+    previous: list[Optional[int]] = [None] * len(ranks)
+    for position, rank in enumerate(ranks):
+        k = bisect.bisect_left(tails, rank)
+        previous[position] = tail_positions[k - 1] if k > 0 else None
+        if k == len(tails):
+            tails.append(rank)
+            tail_positions.append(position)
+        else:
+            tails[k] = rank
+            tail_positions[k] = position
+    kept = set()
+    position = tail_positions[-1] if tail_positions else None
+    while position is not None:
+        kept.add(position)
+        position = previous[position]
+    return kept
+
+
+def plan(ranks: list[int]) -> tuple[list[int], bool]:
+    """按新顺序排列的当前排名 -> (新排名, 是否整体重新编号)；新排名严格递增且不小于 0"""
+    kept = _kept_positions(ranks)
+    result = list(ranks)
+    position = 0
+    while position < len(ranks):
+        if position in kept:
+            position += 1
+            continue
+        # 一段连续的待移动项，放到前后保留项之间
+        end = position
+        while end < len(ranks) and end not in kept:
+            end += 1
+        count = end - position
+        low = result[position - 1] if position > 0 else -1
+        high = ranks[end] if end < len(ranks) else low + RANK_GAP * (count + 1)
+        if high - low <= count:
+            return [RANK_GAP * (i + 1) for i in range(len(ranks))], True
+        for offset in range(count):
+            result[position + offset] = low + (high - low) * (offset + 1) // (count + 1)
+        position = end
+    return result, False
+
+
+def reorder(db: Session, model, kind: str, ids: list[int], scope=None) -> dict:
+    """按 ids 的顺序调整整个集合的排序（在当前事务中，由调用方提交），返回 {"updated", "rebalanced"}
+
+    scope 为可选的筛选条件（例如只排已上架的服务），集合为满足条件的行；
+    ids 必须恰好包含集合中的全部 id；有重复、缺少或不存在的 id 时抛出 ValueError
+    """
+    if len(set(ids)) != len(ids):
+        raise ValueError("id 列表中有重复")
+    query = select(model.id, model.sort_order)
+    if scope is not None:
+        query = query.where(scope)
+    current = dict(db.execute(query).all())
+    if set(ids) != set(current):
+        # 列表提交之前有其他管理员新增或删除了条目
+        raise ValueError("id 列表与当前数据不一致，请刷新后重试")
+
+    ranks, rebalanced = plan([current[item_id] or 0 for item_id in ids])
+    changed = {item_id: rank for item_id, rank in zip(ids, ranks) if current[item_id] != rank}
+    if changed:
+        statement = update(model).where(model.id.in_(changed))
+        if scope is not None:
+            statement = statement.where(scope)
+        db.execute(
+            statement.values(sort_order=case(changed, value=model.id)),
+            execution_options={"synchronize_session": False},
+        )
+        site_search.record(db, kind, changed)
+        catalog_snapshots.mark_changed(db)
+    return {"updated": len(changed), "rebalanced": rebalanced}
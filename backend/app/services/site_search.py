@@ -0,0 +1,364 @@
+# 站内统一搜索：文章、话题、评论、项目、作品集、服务
+#
+# 索引由两部分组成（见 app.lib.inverted_index）：
+# - 磁盘上的只读段：由一个 worker（文件锁）定期全量重建，各 worker 以 mmap 方式打开，共享同一份页缓存；
+# - 每个 worker 内存中的增量：读取变更日志 search_changes 中段生成之后的记录，重新读取这些文档。
+# ORM flush 时自动写入变更日志（与业务写入同一事务）；绕过 ORM 的批量删除需调用 record()。
+# 同时递增相应内容类型的版本号（app.services.counters.bump_versions）：变更日志会被清理，不能用其最大 id 作为版本。
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy import event, func, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.lib import inverted_index
+from app.models.models import Comment, Portfolio, Post, Project, SearchChange, Service, Topic
+from app.services import counters
+from app.services.post_search import make_snippet
+
+logger = logging.getLogger(__name__)
+
+DOC_TYPES = ("post", "topic", "comment", "project", "portfolio", "service")
+# 标题命中的词频按此倍数计
+TITLE_WEIGHT = 3
+# 文档键 = 类型序号 << 40 | id
+_TYPE_SHIFT = 40
+_CURRENT = "CURRENT"
+
+
+def _join(value) -> Optional[str]:
+    """JSON 列表字段（技术栈、服务特性）拼为文本"""
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class _Source:
+    model: type
+    columns: tuple
+    fields: Callable  # 行 -> [(文本, 权重)]
+    visible: Optional[object] = None  # 只索引满足条件的行
+
+
+SOURCES = {
+    "post": _Source(
+        Post, (Post.id, Post.title, Post.content),
+        lambda row: [(row.title, TITLE_WEIGHT), (row.content, 1)],
+        Post.published == True,
+    ),
+    "topic": _Source(
+        Topic, (Topic.id, Topic.title, Topic.content),
+        lambda row: [(row.title, TITLE_WEIGHT), (row.content, 1)],
+    ),
+    "comment": _Source(Comment, (Comment.id, Comment.content), lambda row: [(row.content, 1)]),
+    "project": _Source(
+        Project, (Project.id, Project.name, Project.description, Project.content, Project.tech_stack),
+        lambda row: [(row.name, TITLE_WEIGHT), (_join(row.tech_stack), 1), (row.description, 1), (row.content, 1)],
+    ),
+    "portfolio": _Source(
+        Portfolio, (Portfolio.id, Portfolio.title, Portfolio.category, Portfolio.description),
+        lambda row: [(row.title, TITLE_WEIGHT), (row.category, 1), (row.description, 1)],
+    ),
+    "service": _Source(
+        Service, (Service.id, Service.name, Service.description, Service.content, Service.features),
+        lambda row: [(row.name, TITLE_WEIGHT), (row.description, 1), (row.content, 1), (_join(row.features), 1)],
+        Service.active == True,
+    ),
+}
+_KIND_BY_MODEL = {source.model: kind for kind, source in SOURCES.items()}
+
+
+def doc_key(kind: str, doc_id: int) -> int:
+    return (DOC_TYPES.index(kind) << _TYPE_SHIFT) | doc_id
+
+
+def describe(key: int) -> tuple[str, int]:
+    """文档键 -> (类型, id)"""
+    return DOC_TYPES[key >> _TYPE_SHIFT], key & ((1 << _TYPE_SHIFT) - 1)
+
+
+def record(db: Session, kind: str, ids) -> None:
+    """记录绕过 ORM 的变更（在当前事务中，由调用方提交）"""
+    rows = [{"doc_type": kind, "doc_id": doc_id} for doc_id in ids]
+    if rows:
+        db.execute(insert(SearchChange), rows)
+        counters.bump_versions(db.connection(), [kind])
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed(session: Session, flush_context) -> None:
+    # after_flush 中 new/dirty/deleted 仍为本次 flush 前的状态
+    changes = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        kind = _KIND_BY_MODEL.get(type(obj))
+        if kind is not None and obj.id is not None:
+            changes.add((kind, obj.id))
+    if changes:
+        session.connection().execute(
+            insert(SearchChange), [{"doc_type": kind, "doc_id": doc_id} for kind, doc_id in sorted(changes)]
+        )
+        counters.bump_versions(session.connection(), {kind for kind, _ in changes})
+
+
+class SiteSearch:
+    """每个 worker 一个实例：打开当前段，并维护段之后的增量"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._use_segment(None, None)
+
+    def _use_segment(self, segment: Optional[inverted_index.Segment], generation: Optional[str]) -> None:
+        self.segment = segment
+        self.generation = generation
+        self.memory = inverted_index.MemoryIndex()
+        self._deleted: set[int] = set()
+        self._deleted_array = np.empty(0, dtype=np.uint32)
+        self.last_change_id = segment.meta["last_change_id"] if segment else 0
+
+    def _current_generation(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, _CURRENT), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _refresh_segment(self, db: Session) -> None:
+        """其他进程重建了段时切换到新段；数据库的变更日志比当前状态旧（数据库已更换）时重置"""
+        latest_change = db.query(func.max(SearchChange.id)).scalar() or 0
+        generation = self._current_generation()
+        if generation == self.generation and latest_change >= self.last_change_id:
+            return
+        segment = None
+        if generation:
+            try:
+                segment = inverted_index.Segment(os.path.join(self.directory, generation))
+            except (OSError, ValueError):
+                logger.exception(f"打开搜索索引段失败: {generation}")
+            # 段比数据库新：不是由当前数据库生成的
+            if segment is not None and segment.meta["last_change_id"] > latest_change:
+                segment = None
+        self._use_segment(segment, generation)
+
+    def sync(self, db: Session, batch_size: int = 1000, wait: bool = True) -> int:
+        """
+        应用变更日志中的新记录，返回处理的记录数
+        wait=False 时若其他线程正在同步则直接返回
+        """
+        if not self._lock.acquire(blocking=wait):
+            return 0
+        try:
+            self._refresh_segment(db)
+            applied = 0
+            while True:
+                changes = db.query(SearchChange.id, SearchChange.doc_type, SearchChange.doc_id) \
+                    .filter(SearchChange.id > self.last_change_id) \
+                    .order_by(SearchChange.id) \
+                    .limit(batch_size) \
+                    .all()
+                if not changes:
+                    break
+                by_kind: dict[str, set[int]] = {}
+                for change in changes:
+                    if change.doc_type in SOURCES:
+                        by_kind.setdefault(change.doc_type, set()).add(change.doc_id)
+                for kind, ids in by_kind.items():
+                    self._apply(db, kind, ids)
+                self.last_change_id = changes[-1].id
+                applied += len(changes)
+            if applied:
+                self._deleted_array = np.fromiter(sorted(self._deleted), dtype=np.uint32, count=len(self._deleted))
+            return applied
+        finally:
+            self._lock.release()
+
+    def _apply(self, db: Session, kind: str, ids: set[int]) -> None:
+        """重新读取文档：段内旧版本标记删除，存在且可见的写入增量"""
+        source = SOURCES[kind]
+        query = db.query(*source.columns).filter(source.model.id.in_(ids))
+        if source.visible is not None:
+            query = query.filter(source.visible)
+        rows = {row.id: row for row in query}
+        for doc_id in ids:
+            key = doc_key(kind, doc_id)
+            if self.segment is not None:
+                docno = self.segment.docno(key)
+                if docno is not None:
+                    self._deleted.add(docno)
+            self.memory.remove(key)
+            row = rows.get(doc_id)
+            if row is not None:
+                self.memory.add(key, *inverted_index.analyze(source.fields(row)))
+
+    def search(
+        self, db: Session, query: str, doc_type: Optional[str], offset: int, limit: int
+    ) -> tuple[list[tuple[str, int, float]], int, dict[str, int]]:
+        """返回 (当前页 [(类型, id, 分数)], 命中总数, 各类型命中数)"""
+        self.sync(db, wait=False)
+        terms = inverted_index.query_terms(query)
+        with self._lock:
+            matches = inverted_index.search(self.segment, self.memory, self._deleted_array, terms)
+        types = matches.keys >> _TYPE_SHIFT
+        counts = np.bincount(types, minlength=len(DOC_TYPES)) if len(types) else np.zeros(len(DOC_TYPES))
+        facets = {kind: int(count) for kind, count in zip(DOC_TYPES, counts) if count}
+
+        keys, scores = matches.keys, matches.scores
+        if doc_type is not None:
+            selected = types == DOC_TYPES.index(doc_type)
+            keys, scores = keys[selected], scores[selected]
+        total = len(keys)
+        end = min(offset + limit, total)
+        if offset >= end:
+            return [], total, facets
+        # 只对前 end 个做完整排序；分数相同按文档键倒序（较新的 id 在前）
+        top = np.argpartition(-scores, end - 1)[:end] if total > end else np.arange(total)
+        top = top[np.lexsort((-keys[top], -scores[top]))][offset:end]
+        hits = [(*describe(int(keys[i])), float(scores[i])) for i in top]
+        return hits, total, facets
+
+    def pending_changes(self, db: Session) -> Optional[int]:
+        """当前段之后的变更数，没有可用的段时返回 None"""
+        generation = self._current_generation()
+        if generation is None:
+            return None
+        try:
+            segment = inverted_index.Segment(os.path.join(self.directory, generation))
+        except (OSError, ValueError):
+            return None
+        return db.query(func.count(SearchChange.id)) \
+            .filter(SearchChange.id > segment.meta["last_change_id"]).scalar()
+
+    def rebuild(self, db: Session, batch_size: int = 1000) -> Optional[int]:
+        """
+        全量重建段并切换，返回文档数；其他进程正在重建时返回 None
+        重建期间的写入记录在变更日志中，各 worker 切换到新段后补读
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            last_change_id = db.query(func.max(SearchChange.id)).scalar() or 0
+            writer = inverted_index.SegmentWriter()
+            for kind, source in SOURCES.items():
+                last_id = 0
+                while True:
+                    query = db.query(*source.columns).filter(source.model.id > last_id)
+                    if source.visible is not None:
+                        query = query.filter(source.visible)
+                    rows = query.order_by(source.model.id).limit(batch_size).all()
+                    if not rows:
+                        break
+                    for row in rows:
+                        writer.add(doc_key(kind, row.id), *inverted_index.analyze(source.fields(row)))
+                    last_id = rows[-1].id
+
+            previous = self._current_generation()
+            generation = f"gen-{time.time_ns()}"
+            writer.write(os.path.join(self.directory, generation), last_change_id=last_change_id)
+            tmp_path = os.path.join(self.directory, f"{_CURRENT}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(generation)
+            os.replace(tmp_path, os.path.join(self.directory, _CURRENT))
+
+            # 保留上一代段及其之后的变更日志，仍在使用上一代的 worker 切换前可以继续补读；
+            # 最新一条始终保留，段的 last_change_id 不会超过日志中的最大 id（否则会被视为其他数据库的段）
+            if previous:
+                try:
+                    previous_last = inverted_index.Segment(os.path.join(self.directory, previous)) \
+                        .meta["last_change_id"]
+                    db.query(SearchChange).filter(SearchChange.id < previous_last).delete(synchronize_session=False)
+                    db.commit()
+                except (OSError, ValueError):
+                    pass
+            for name in os.listdir(self.directory):
+                if name.startswith("gen-") and name not in (generation, previous):
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        logger.info(f"站内搜索索引重建完成，共 {len(writer)} 个文档")
+        return len(writer)
+
+    def maintain(self, db: Session, max_pending: int) -> Optional[int]:
+        """没有段或段之后的变更超过 max_pending 时重建"""
+        pending = self.pending_changes(db)
+        if pending is not None and pending <= max_pending:
+            return None
+        return self.rebuild(db)
+
+
+index = SiteSearch(settings.SEARCH_INDEX_DIR)
+
+
+def hydrate(db: Session, hits: list[tuple[str, int, float]], query: str) -> list[dict]:
+    """按类型批量读取命中文档的标题与摘要，保持 hits 的顺序"""
+    by_kind: dict[str, list[int]] = {}
+    for kind, doc_id, _ in hits:
+        by_kind.setdefault(kind, []).append(doc_id)
+    details: dict[tuple[str, int], dict] = {}
+    for kind, ids in by_kind.items():
+        for item in _DETAILS[kind](db, ids):
+            text = item.pop("text")
+            details[(kind, item["id"])] = {**item, "type": kind, "snippet": make_snippet(text or "", query)}
+    results = []
+    for kind, doc_id, score in hits:
+        item = details.get((kind, doc_id))
+        # 增量同步之后刚被删除的文档
+        if item is not None:
+            results.append({**item, "score": round(score, 4)})
+    return results
+
+
+def _posts(db: Session, ids: list[int]) -> list[dict]:
+    rows = db.query(Post.id, Post.title, Post.slug, Post.content).filter(Post.id.in_(ids))
+    return [{"id": row.id, "title": row.title, "slug": row.slug, "text": row.content} for row in rows]
+
+
+def _topics(db: Session, ids: list[int]) -> list[dict]:
+    rows = db.query(Topic.id, Topic.title, Topic.content).filter(Topic.id.in_(ids))
+    return [{"id": row.id, "title": row.title, "text": row.content} for row in rows]
+
+
+def _comments(db: Session, ids: list[int]) -> list[dict]:
+    rows = db.query(Comment.id, Comment.content, Comment.topic_id, Comment.post_id).filter(Comment.id.in_(ids))
+    return [
+        {"id": row.id, "title": None, "topic_id": row.topic_id, "post_id": row.post_id, "text": row.content}
+        for row in rows
+    ]
+
+
+def _projects(db: Session, ids: list[int]) -> list[dict]:
+    rows = db.query(Project.id, Project.name, Project.slug, Project.description).filter(Project.id.in_(ids))
+    return [{"id": row.id, "title": row.name, "slug": row.slug, "text": row.description} for row in rows]
+
+
+def _portfolio(db: Session, ids: list[int]) -> list[dict]:
+    rows = db.query(Portfolio.id, Portfolio.title, Portfolio.description).filter(Portfolio.id.in_(ids))
+    return [{"id": row.id, "title": row.title, "text": row.description} for row in rows]
+
+
+def _services(db: Session, ids: list[int]) -> list[dict]:
+    rows = db.query(Service.id, Service.name, Service.slug, Service.description).filter(Service.id.in_(ids))
+    return [{"id": row.id, "title": row.name, "slug": row.slug, "text": row.description} for row in rows]
+
+
+_DETAILS = {
+    "post": _posts,
+    "topic": _topics,
+    "comment": _comments,
+    "project": _projects,
+    "portfolio": _portfolio,
+    "service": _services,
+}
@@ -0,0 +1,178 @@
+# 输入联想：文章标题、项目名称、技术栈、作品集分类
+#
+# 每个 worker 在内存中维护一份前缀索引（app.lib.prefix_index）。首次使用时全量加载，
+# 之后读取站内搜索的变更日志（search_changes，见 app.services.site_search）中的新记录，
+# 只重新读取变更的文章、项目、作品，因此其他 worker 的写入同样在下一次请求时生效。
+import logging
+import threading
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.lib.prefix_index import Entry, PrefixIndex, normalize
+from app.models.models import Portfolio, Post, Project, SearchChange
+from app.services import site_search  # noqa: F401  导入时注册变更日志的 flush 事件
+
+logger = logging.getLogger(__name__)
+
+_KINDS = ("post", "project", "portfolio")
+
+
+def _post_entry(row) -> Entry:
+    return Entry(ref=("post", row.id), text=row.title or "", data={"slug": row.slug})
+
+
+def _project_entry(row) -> Entry:
+    return Entry(ref=("project", row.id), text=row.name or "", weight=2 if row.featured else 1, data={"slug": row.slug})
+
+
+def _tag_entry(ref: tuple, text: str, count: int) -> Entry:
+    return Entry(ref=ref, text=text, weight=count, data={"count": count})
+
+
+class Suggester:
+    """标签（技术栈、分类）按使用次数计权，标题按项目是否精选计权"""
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.index.clear()
+            self.last_change_id: Optional[int] = None  # None 表示尚未加载
+            self._tag_counts: Counter = Counter()
+            self._tag_texts: dict[tuple, str] = {}
+            self._doc_tags: dict[tuple, list[tuple]] = {}
+
+    @staticmethod
+    def _tags(kind: str, row) -> list[tuple[tuple, str]]:
+        """文档的标签：[(标签引用, 显示文本)]，同一文档内去重"""
+        if kind == "project":
+            values, tag_kind = row.tech_stack if isinstance(row.tech_stack, list) else [], "tech"
+        else:
+            values, tag_kind = [row.category] if row.category else [], "category"
+        tags = {}
+        for value in values:
+            key = normalize(str(value))
+            if key:
+                tags.setdefault((tag_kind, key), str(value).strip())
+        return list(tags.items())
+
+    def sync(self, db: Session, batch_size: int = 1000, wait: bool = True) -> int:
+        """应用新的变更，返回处理的变更数；尚未加载或变更日志已被清理到当前位置之后时全量加载"""
+        if not self._lock.acquire(blocking=wait):
+            return 0
+        try:
+            applied = 0
+            while self.last_change_id is not None:
+                # 每次请求都会执行，只用一条查询：没有新变更时即返回
+                changes = db.execute(
+                    select(SearchChange.id, SearchChange.doc_type, SearchChange.doc_id)
+                    .where(SearchChange.id > self.last_change_id)
+                    .order_by(SearchChange.id)
+                    .limit(batch_size)
+                ).all()
+                if not changes:
+                    return applied
+                # 变更日志的 id 连续，缺口说明中间的记录已被清理
+                if changes[0].id != self.last_change_id + 1:
+                    break
+                self._apply_changes(db, changes)
+                self.last_change_id = changes[-1].id
+                applied += len(changes)
+            self._rebuild(db)
+            return applied
+        finally:
+            self._lock.release()
+
+    def _rebuild(self, db: Session) -> None:
+        latest = db.query(func.max(SearchChange.id)).scalar() or 0
+        self._tag_counts.clear()
+        self._tag_texts.clear()
+        self._doc_tags.clear()
+        entries = [_post_entry(row) for row in db.query(Post.id, Post.title, Post.slug).filter(Post.published == True)]
+        for row in db.query(Project.id, Project.name, Project.slug, Project.featured, Project.tech_stack):
+            entries.append(_project_entry(row))
+            self._count_tags(("project", row.id), self._tags("project", row))
+        for row in db.query(Portfolio.id, Portfolio.category):
+            self._count_tags(("portfolio", row.id), self._tags("portfolio", row))
+        entries.extend(_tag_entry(ref, self._tag_texts[ref], count) for ref, count in self._tag_counts.items())
+        self.index.load(entries)
+        self.last_change_id = latest
+
+    def _count_tags(self, doc: tuple, tags: list[tuple[tuple, str]]) -> None:
+        self._doc_tags[doc] = [ref for ref, _ in tags]
+        for ref, text in tags:
+            self._tag_counts[ref] += 1
+            self._tag_texts.setdefault(ref, text)
+
+    def _apply_changes(self, db: Session, changes: list) -> None:
+        by_kind: dict[str, set[int]] = {}
+        for change in changes:
+            if change.doc_type in _KINDS:
+                by_kind.setdefault(change.doc_type, set()).add(change.doc_id)
+        for kind, ids in by_kind.items():
+            self._apply(db, kind, ids)
+
+    def _apply(self, db: Session, kind: str, ids: set[int]) -> None:
+        if kind == "post":
+            rows = {row.id: row for row in db.query(Post.id, Post.title, Post.slug)
+                    .filter(Post.id.in_(ids), Post.published == True)}
+            for post_id in ids:
+                if post_id in rows:
+                    self.index.add(_post_entry(rows[post_id]))
+                else:
+                    self.index.remove(("post", post_id))
+            return
+
+        if kind == "project":
+            query = db.query(Project.id, Project.name, Project.slug, Project.featured, Project.tech_stack)
+            model = Project
+        else:
+            query = db.query(Portfolio.id, Portfolio.category)
+            model = Portfolio
+        rows = {row.id: row for row in query.filter(model.id.in_(ids))}
+        changed = set()
+        for doc_id in ids:
+            doc = (kind, doc_id)
+            for ref in self._doc_tags.pop(doc, []):
+                self._tag_counts[ref] -= 1
+                changed.add(ref)
+            row = rows.get(doc_id)
+            if kind == "project":
+                if row is not None:
+                    self.index.add(_project_entry(row))
+                else:
+                    self.index.remove(doc)
+            if row is not None:
+                tags = self._tags(kind, row)
+                self._count_tags(doc, tags)
+                changed.update(ref for ref, _ in tags)
+        for ref in changed:
+            count = self._tag_counts[ref]
+            if count > 0:
+                entry = self.index.get(ref)
+                if entry is None or entry.weight != count:
+                    self.index.add(_tag_entry(ref, self._tag_texts[ref], count))
+            else:
+                del self._tag_counts[ref]
+                self._tag_texts.pop(ref, None)
+                self.index.remove(ref)
+
+    def suggest(self, db: Session, prefix: str, limit: int) -> list[dict]:
+        self.sync(db, wait=False)
+        results = []
+        for entry in self.index.query(prefix, limit):
+            kind, _ = entry.ref
+            item = {"type": kind, "text": entry.text, **entry.data}
+            if kind in ("post", "project"):
+                item["id"] = entry.ref[1]
+            results.append(item)
+        return results
+
+
+suggester = Suggester()
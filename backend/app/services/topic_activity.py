@@ -0,0 +1,123 @@
+# 话题活跃度：评论数、最后活跃时间与热度分（冗余存储在 topics 表上）
+#
+# 评论增删时在业务事务内同步更新；浏览量由缓冲批量写回，不会即时刷新热度分，
+# 后台任务 recompute() 定期按实际数据重算全部话题。
+import logging
+import math
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, func, update
+from sqlalchemy.orm import Session
+
+from app.models.models import Comment, Topic
+
+logger = logging.getLogger(__name__)
+
+# 热度分 = log10(互动量) + 发布时间 / HOT_DECAY_SECONDS
+# 时间项随发布时间单调增加：新话题只需更少的互动即可排在前面，已有分数无需随时间衰减重算。
+# HOT_DECAY_SECONDS 秒的新旧差距相当于 10 倍互动量。
+HOT_EPOCH = datetime(2024, 1, 1)
+HOT_DECAY_SECONDS = 45000
+COMMENT_WEIGHT = 10  # 一条评论折合的浏览量
+
+_topics = Topic.__table__
+_UPDATE_ACTIVITY = (
+    update(_topics)
+    .where(_topics.c.id == bindparam("topic_id"))
+    .values(
+        comment_count=bindparam("new_comment_count"),
+        last_activity_at=bindparam("new_last_activity_at"),
+        hot_score=bindparam("new_hot_score"),
+        updated_at=_topics.c.updated_at,
+    )
+)
+
+
+def hot_score(views: int, comment_count: int, created_at: datetime) -> float:
+    engagement = (views or 0) + (comment_count or 0) * COMMENT_WEIGHT
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return round(math.log10(max(engagement, 1)) + age / HOT_DECAY_SECONDS, 7)
+
+
+def init_topic(topic: Topic) -> None:
+    """新建话题时填充活跃度字段"""
+    now = datetime.utcnow()
+    topic.created_at = topic.created_at or now
+    topic.views = topic.views or 0
+    topic.comment_count = 0
+    topic.last_activity_at = topic.created_at
+    topic.hot_score = hot_score(topic.views, 0, topic.created_at)
+
+
+def _refresh_hot_score(db: Session, topic_id: int) -> None:
+    views, comment_count, created_at = db.query(Topic.views, Topic.comment_count, Topic.created_at) \
+        .filter(Topic.id == topic_id).one()
+    db.query(Topic).filter(Topic.id == topic_id).update(
+        {Topic.hot_score: hot_score(views, comment_count, created_at), Topic.updated_at: Topic.updated_at},
+        synchronize_session=False,
+    )
+
+
+def comment_added(db: Session, topic_id: int, created_at: datetime) -> None:
+    """在当前事务中记录新增评论（由调用方提交）"""
+    db.query(Topic).filter(Topic.id == topic_id).update(
+        {
+            Topic.comment_count: Topic.comment_count + 1,
+            Topic.last_activity_at: created_at,
+            # 评论不算话题内容修改
+            Topic.updated_at: Topic.updated_at,
+        },
+        synchronize_session=False,
+    )
+    _refresh_hot_score(db, topic_id)
+
+
+def comment_removed(db: Session, topic_id: int, count: int = 1) -> None:
+    """在当前事务中记录删除 count 条评论（评论需已 flush 删除），最后活跃时间回退到剩余最新评论"""
+    latest = db.query(func.max(Comment.created_at)).filter(Comment.topic_id == topic_id).scalar_subquery()
+    db.query(Topic).filter(Topic.id == topic_id).update(
+        {
+            Topic.comment_count: case((Topic.comment_count > count, Topic.comment_count - count), else_=0),
+            Topic.last_activity_at: func.coalesce(latest, Topic.created_at),
+            Topic.updated_at: Topic.updated_at,
+        },
+        synchronize_session=False,
+    )
+    _refresh_hot_score(db, topic_id)
+
+
+def recompute(db: Session, batch_size: int = 500) -> int:
+    """按实际数据重算全部话题的活跃度字段，返回有变化的话题数"""
+    rows = db.query(Comment.topic_id, func.count(Comment.id), func.max(Comment.created_at)) \
+        .filter(Comment.topic_id.isnot(None)) \
+        .group_by(Comment.topic_id)
+    stats = {topic_id: (count, latest) for topic_id, count, latest in rows}
+    changed = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            Topic.id, Topic.views, Topic.created_at,
+            Topic.comment_count, Topic.last_activity_at, Topic.hot_score,
+        ).filter(Topic.id > last_id).order_by(Topic.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            count, latest = stats.get(row.id, (0, None))
+            last_activity_at = latest or row.created_at
+            score = hot_score(row.views, count, row.created_at)
+            if (row.comment_count, row.last_activity_at, row.hot_score) != (count, last_activity_at, score):
+                updates.append({
+                    "topic_id": row.id,
+                    "new_comment_count": count,
+                    "new_last_activity_at": last_activity_at,
+                    "new_hot_score": score,
+                })
+        if updates:
+            db.connection().execute(_UPDATE_ACTIVITY, updates)
+            changed += len(updates)
+        db.commit()
+    if changed:
+        logger.info(f"话题活跃度重算：更新 {changed} 个话题")
+    return changed
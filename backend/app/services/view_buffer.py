@@ -0,0 +1,89 @@
+# 话题浏览量写回缓冲（write-behind）
+#
+# 读取话题时只在当前 worker 的内存中累加，后台任务定期把增量合并成一条批量
+# UPDATE topics SET views = views + ? WHERE id = ? 写回。各 worker 只提交自己的增量，
+# 由数据库做加法，多个 worker 之间不会互相覆盖。
+#
+# 丢失上限：进程崩溃时最多丢失每个 worker 未写回的增量——不超过 VIEW_FLUSH_INTERVAL
+# 秒内的浏览量，且不超过 VIEW_BUFFER_MAX_PENDING 次（达到上限时在请求线程内立即写回）。
+# 正常关闭时在 lifespan 结束前写回全部增量。
+import logging
+import threading
+from collections import Counter
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Topic
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_pending: Counter[int] = Counter()
+_pending_total = 0
+
+_UPDATE_VIEWS = (
+    update(Topic.__table__)
+    .where(Topic.__table__.c.id == bindparam("topic_id"))
+    # 浏览不算话题内容修改，保持 updated_at 不变
+    .values(views=Topic.__table__.c.views + bindparam("delta"), updated_at=Topic.__table__.c.updated_at)
+)
+
+
+def record(db: Session, topic_id: int) -> None:
+    """记录一次浏览；缓冲的总次数达到上限时用当前会话立即写回"""
+    global _pending_total
+    with _lock:
+        _pending[topic_id] += 1
+        _pending_total += 1
+        full = _pending_total >= settings.VIEW_BUFFER_MAX_PENDING
+    if full:
+        try:
+            flush(db)
+        except Exception:
+            logger.exception("浏览量写回失败，增量保留到下次写回")
+
+
+def pending(topic_id: int) -> int:
+    """当前 worker 中尚未写回的浏览次数"""
+    with _lock:
+        return _pending.get(topic_id, 0)
+
+
+def _restore(batch: Counter[int]) -> None:
+    global _pending_total
+    with _lock:
+        _pending.update(batch)
+        _pending_total += sum(batch.values())
+
+
+def flush(db: Session) -> int:
+    """把缓冲的增量批量写回数据库，返回写回的浏览次数；失败时增量放回缓冲等待下次写回"""
+    global _pending_total
+    with _flush_lock:
+        with _lock:
+            if not _pending:
+                return 0
+            batch = _pending.copy()
+            _pending.clear()
+            _pending_total = 0
+        params = [{"topic_id": topic_id, "delta": delta} for topic_id, delta in sorted(batch.items())]
+        try:
+            db.connection().execute(_UPDATE_VIEWS, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            _restore(batch)
+            raise
+    total = sum(batch.values())
+    logger.debug(f"浏览量写回：{len(params)} 个话题，共 {total} 次")
+    return total
+
+
+def reset() -> None:
+    """丢弃全部未写回的增量（测试用）"""
+    global _pending_total
+    with _lock:
+        _pending.clear()
+        _pending_total = 0
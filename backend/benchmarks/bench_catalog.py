@@ -0,0 +1,76 @@
+# 目录列表基准：每次请求查询数据库并序列化 vs 读取预先编码的快照（原文 / gzip）
+#
+# 进程内通过 TestClient 调用，不含网络往返；TestClient 自身的开销可参考 304 一行，gzip 一行包含客户端解压。
+# 快照写在临时目录，重建耗时单独统计。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_catalog --projects 200 --portfolio 300 --services 20
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.limiter import limiter
+from app.db.session import get_db
+from app.main import app
+from app.services import catalog_snapshots
+from benchmarks.bench_home import seed_catalog
+from benchmarks.common import measure, report, temp_database
+
+ENDPOINTS = ["/api/projects", "/api/portfolio", "/api/portfolio?category=design", "/api/services"]
+
+
+def run(projects: int, portfolio: int, services: int, repeat: int) -> None:
+    rng = random.Random(9)
+    limiter.enabled = False
+    with temp_database() as (engine, Session), tempfile.TemporaryDirectory() as tmpdir:
+        seed_catalog(engine, rng, projects=projects, portfolio=portfolio, services=services)
+        snapshots = catalog_snapshots.snapshots
+        snapshots.path = Path(tmpdir) / "catalog.snap"
+        snapshots.reset()
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(app)
+        try:
+            print(f"{projects} 个项目，{portfolio} 个作品，{services} 项服务")
+            report("重建快照", measure(lambda: snapshots.rebuild(engine), max(1, repeat // 10)))
+            print(f"  快照文件 {snapshots.path.stat().st_size / 1024:.0f}KB")
+
+            for url in ENDPOINTS:
+                plain = client.get(url, headers={"Accept-Encoding": "identity"})
+                compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+                print(f"{url}  原文 {len(plain.content) / 1024:.0f}KB，gzip "
+                      f"{int(compressed.headers['content-length']) / 1024:.0f}KB")
+                report("  快照（gzip）", measure(lambda: client.get(url, headers={"Accept-Encoding": "gzip"}), repeat))
+                report("  快照（原文）", measure(lambda: client.get(url, headers={"Accept-Encoding": "identity"}), repeat))
+                etag = plain.headers["etag"]
+                report("  快照（304）", measure(lambda: client.get(url, headers={"If-None-Match": etag}), repeat))
+
+            snapshots.path.unlink()
+            for url in ENDPOINTS:
+                report(f"{url} 查询数据库", measure(lambda: client.get(url), repeat))
+        finally:
+            app.dependency_overrides.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="目录列表：查询数据库 vs 预先编码的快照")
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--portfolio", type=int, default=300)
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.projects, args.portfolio, args.services, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
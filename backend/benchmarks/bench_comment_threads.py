@@ -0,0 +1,113 @@
+# 楼中楼评论基准：逐层递归查询 vs 物化路径
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_comment_threads --comments 10000
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app.models.models import Comment, Topic, User
+from app.services import comment_threads
+from benchmarks.common import measure, report, temp_database
+
+PAGE_SIZE = 20
+REPLIES_PER_THREAD = 3
+
+
+def seed_thread_tree(engine, count: int, seed: int = 42) -> None:
+    """在一个话题下生成 count 条评论：约 10% 为顶层评论，其余随机回复已有评论"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for comment_id in range(1, count + 1):
+        parent = rng.choice(rows) if rows and rng.random() > 0.1 else None
+        if parent and parent["depth"] >= comment_threads.MAX_DEPTH:
+            parent = None
+        segment = comment_threads._segment(comment_id)
+        rows.append({
+            "id": comment_id,
+            "content": f"评论 {comment_id}",
+            "author_id": 1,
+            "topic_id": 1,
+            "parent_id": parent["id"] if parent else None,
+            "thread_id": parent["thread_id"] if parent else comment_id,
+            "depth": parent["depth"] + 1 if parent else 0,
+            "path": parent["path"] + segment if parent else segment,
+            "created_at": start + timedelta(seconds=comment_id),
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "role": "user"}])
+        conn.execute(insert(Topic), [{"id": 1, "title": "话题", "content": "内容", "author_id": 1}])
+        conn.execute(insert(Comment), rows)
+        # 递归方案按 parent_id 查子评论，给它一个索引以公平对比
+        conn.execute(text("CREATE INDEX idx_bench_comments_parent_id ON comments (parent_id)"))
+
+
+def to_node(comment: Comment) -> dict:
+    return {"id": comment.id, "content": comment.content}
+
+
+def recursive_children(db, parent_id: int, limit: list[int] | None = None) -> list[dict]:
+    """改造前的做法：每个节点一次查询；limit 为整楼剩余条数（跨递归共享）"""
+    nodes = []
+    for child in db.query(Comment).filter(Comment.parent_id == parent_id).order_by(Comment.id):
+        if limit is not None and limit[0] <= 0:
+            break
+        if limit is not None:
+            limit[0] -= 1
+        nodes.append({**to_node(child), "replies": recursive_children(db, child.id, limit)})
+    return nodes
+
+
+def recursive_topic(db) -> list[dict]:
+    roots = db.query(Comment).filter(Comment.topic_id == 1, Comment.parent_id.is_(None)).order_by(Comment.id).all()
+    return [{**to_node(root), "replies": recursive_children(db, root.id)} for root in roots]
+
+
+def path_topic(db) -> list[dict]:
+    return comment_threads.build_tree(
+        db.query(Comment).filter(Comment.topic_id == 1).order_by(Comment.path).all(), to_node
+    )
+
+
+def recursive_page(db) -> list[dict]:
+    roots = db.query(Comment).filter(Comment.topic_id == 1, Comment.parent_id.is_(None)) \
+        .order_by(Comment.created_at, Comment.id).limit(PAGE_SIZE).all()
+    return [
+        {**to_node(root), "replies": recursive_children(db, root.id, [REPLIES_PER_THREAD])}
+        for root in roots
+    ]
+
+
+def path_page(db) -> list[dict]:
+    roots = db.query(Comment).filter(Comment.topic_id == 1, Comment.depth == 0) \
+        .order_by(Comment.created_at, Comment.id).limit(PAGE_SIZE).all()
+    replies = comment_threads.first_replies(db, [root.id for root in roots], REPLIES_PER_THREAD)
+    return comment_threads.build_tree(roots + replies, to_node)
+
+
+def run(count: int, repeat: int) -> None:
+    with temp_database() as (engine, Session):
+        seed_thread_tree(engine, count)
+        print(f"单个话题 {count} 条评论")
+        with Session() as db:
+            assert recursive_topic(db) == path_topic(db)
+            assert recursive_page(db) == path_page(db)
+            report("整个话题  递归查询", measure(lambda: (recursive_topic(db), db.expunge_all()), repeat))
+            report("整个话题  物化路径", measure(lambda: (path_topic(db), db.expunge_all()), repeat))
+            report(f"{PAGE_SIZE} 楼×{REPLIES_PER_THREAD} 回复 递归查询", measure(lambda: (recursive_page(db), db.expunge_all()), repeat))
+            report(f"{PAGE_SIZE} 楼×{REPLIES_PER_THREAD} 回复 物化路径", measure(lambda: (path_page(db), db.expunge_all()), repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="楼中楼评论基准：递归查询 vs 物化路径")
+    parser.add_argument("--comments", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    run(args.comments, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# 首页数据加载基准：4 个接口分别请求 vs /api/home 聚合（缓存未命中 / 命中）
+#
+# 进程内通过 TestClient 调用，不含网络往返；按 --rtt 估算真实环境下首屏数据就绪的时间：
+# 分别请求时浏览器并行发出 4 个请求（各占一个连接），约为 1 个往返 + 并行处理时间；聚合接口为 1 个往返。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_home --posts 10000 --rtt 50
+import argparse
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.core.limiter import limiter
+from app.db.session import get_db
+from app.main import app
+from app.models.models import Portfolio, Project, Service
+from app.services import homepage
+from benchmarks.common import measure, random_text, report, seed_posts, temp_database
+
+ENDPOINTS = [
+    "/api/projects?featured=true",
+    "/api/blog/posts?limit=6&view=summary",
+    "/api/portfolio",
+    "/api/services",
+]
+
+
+def seed_catalog(engine, rng: random.Random, projects: int, portfolio: int, services: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(insert(Project), [{
+            "name": random_text(rng, 10), "slug": f"project-{i}", "description": random_text(rng, 100),
+            "content": random_text(rng, 2000), "tech_stack": ["python", "react"], "featured": i % 5 == 0,
+            "sort_order": i, "author_id": 1,
+        } for i in range(projects)])
+        conn.execute(insert(Portfolio), [{
+            "title": random_text(rng, 10), "category": "design", "description": random_text(rng, 200), "sort_order": i,
+        } for i in range(portfolio)])
+        conn.execute(insert(Service), [{
+            "name": random_text(rng, 8), "slug": f"service-{i}", "description": random_text(rng, 100),
+            "content": random_text(rng, 1000), "price_type": "fixed", "features": ["a", "b"], "active": True,
+            "sort_order": i,
+        } for i in range(services)])
+
+
+def run(posts: int, repeat: int, rtt: float) -> None:
+    rng = random.Random(5)
+    limiter.enabled = False
+    with temp_database() as (engine, Session):
+        seed_posts(engine, posts, content_length=2000)
+        seed_catalog(engine, rng, projects=60, portfolio=12, services=8)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(app)
+        pool = ThreadPoolExecutor(len(ENDPOINTS))
+        try:
+            print(f"{posts} 篇文章，60 个项目（12 个精选），12 个作品，8 项服务")
+
+            def sequential():
+                return [client.get(url).content for url in ENDPOINTS]
+
+            def parallel():
+                return list(pool.map(lambda url: client.get(url).content, ENDPOINTS))
+
+            def home_miss():
+                homepage.reset()
+                return client.get("/api/home").content
+
+            size = sum(len(body) for body in sequential())
+            print(f"  4 个接口响应共 {size / 1024:.0f}KB，聚合响应 {len(home_miss()) / 1024:.0f}KB")
+            stats = {
+                "4 个接口依次请求": measure(sequential, repeat),
+                "4 个接口并行请求": measure(parallel, repeat),
+                "/api/home（未命中缓存）": measure(home_miss, repeat),
+                "/api/home（命中缓存）": measure(lambda: client.get("/api/home"), repeat),
+            }
+            for label, values in stats.items():
+                report(label, values)
+
+            print(f"估算首屏数据就绪时间（往返 {rtt:.0f}ms）")
+            print(f"  4 个接口并行    {rtt + stats['4 个接口并行请求']['p50']:8.1f}ms")
+            print(f"  /api/home 未命中 {rtt + stats['/api/home（未命中缓存）']['p50']:8.1f}ms")
+            print(f"  /api/home 命中   {rtt + stats['/api/home（命中缓存）']['p50']:8.1f}ms")
+        finally:
+            pool.shutdown()
+            app.dependency_overrides.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="首页数据加载基准：分别请求 vs 聚合接口")
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--rtt", type=float, default=50, help="估算用的网络往返时间（毫秒）")
+    args = parser.parse_args()
+    run(args.posts, args.repeat, args.rtt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# 图片派生版本基准：作品集列表的图片传输量（原图 vs 640 宽 AVIF/WebP）、生成耗时与请求路径开销
+#
+# 用合成的“照片”（平滑色块 + 细噪声，JPEG 压缩率接近真实照片）代替真实素材。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_images --images 12 --size 2400x1600 --workers 2
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.lib import images
+from app.services.image_variants import ImageVariants
+from benchmarks.common import measure, report
+
+GALLERY_WIDTH = 640  # 作品卡片约 320px 宽，按 2 倍像素密度取 640w
+
+
+def synthetic_photo(rng: np.random.Generator, width: int, height: int) -> Image.Image:
+    base = Image.fromarray(rng.integers(0, 256, (12, 18, 3), dtype=np.uint8)).resize((width, height), Image.BICUBIC)
+    noise = rng.normal(0, 6, (height, width, 3))
+    return Image.fromarray(np.clip(np.asarray(base, dtype=np.float32) + noise, 0, 255).astype(np.uint8))
+
+
+def run(count: int, width: int, height: int, workers: int, repeat: int) -> None:
+    rng = np.random.default_rng(7)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        media = Path(tmpdir) / "media"
+        media.mkdir()
+        for i in range(count):
+            synthetic_photo(rng, width, height).save(media / f"{i}.jpg", quality=90)
+        urls = [f"/media/{i}.jpg" for i in range(count)]
+        original = sum((media / f"{i}.jpg").stat().st_size for i in range(count))
+        print(f"{count} 张 {width}x{height} JPEG 原图，共 {original / 1024:.0f}KB")
+
+        derivatives = ImageVariants(str(media), "/media/", [320, 640, 960, 1280, 1920], ["avif", "webp"], workers)
+        try:
+            begin = time.perf_counter()
+            for url in urls:
+                assert derivatives.variants(url) is None
+            derivatives.wait()
+            elapsed = time.perf_counter() - begin
+            print(f"  生成全部派生版本（{workers} 个进程） {elapsed:.2f}s，每张 {elapsed / count * 1000:.0f}ms")
+
+            # 再次请求同一批图片：已生成，不再编码
+            begin = time.perf_counter()
+            derivatives.reset()
+            for url in urls:
+                derivatives.variants(url)
+            print(f"  新 worker 读取记录（不重新生成） {(time.perf_counter() - begin) * 1000:.1f}ms，"
+                  f"提交生成 {derivatives.pending()} 张")
+
+            cache = media / "derived"
+            for fmt in ("avif", "webp"):
+                total = 0
+                for url in urls:
+                    digest = images.content_digest((media / url[len("/media/"):]).read_bytes())
+                    total += (images.derived_dir(cache, digest) / f"{GALLERY_WIDTH}.{fmt}").stat().st_size
+                print(f"  列表图片 {GALLERY_WIDTH}w {fmt.upper():<5} 共 {total / 1024:6.0f}KB"
+                      f"（原图的 {total / original:.1%}）")
+            placeholder = sum(len(derivatives.variants(url)["placeholder"]) for url in urls)
+            print(f"  占位图（内联在响应中）共 {placeholder / 1024:.1f}KB")
+
+            report(f"variants() 命中 x{count}", measure(lambda: [derivatives.variants(url) for url in urls], repeat))
+        finally:
+            derivatives.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="图片派生版本：传输量与生成耗时")
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--size", default="2400x1600", help="原图尺寸，宽x高")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    run(args.images, width, height, args.workers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
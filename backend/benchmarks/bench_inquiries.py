@@ -0,0 +1,119 @@
+# 询价收件箱基准：单列索引 vs (status, created_at) / (service_id, created_at) 复合索引
+#
+# 按状态、服务筛选后按时间倒序取一页（首页与深翻页），以及各状态计数（逐个 COUNT vs 一次 GROUP BY）。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_inquiries --size 300000
+import argparse
+import random
+from datetime import datetime, timedelta
+from typing import get_args
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import joinedload
+
+from app.lib.pagination import seek_after
+from app.models.models import Inquiry
+from app.schemas.service import InquiryStatus
+from benchmarks.common import measure, report, temp_database
+
+PAGE_SIZE = 50
+SERVICES = 20
+# 最近的询价大多待处理，较早的大多已处理完，只剩零星遗留的
+RECENT = 2000
+RECENT_WEIGHTS = {"pending": 60, "contacted": 30, "in_progress": 10}
+OLDER_WEIGHTS = {"completed": 850, "cancelled": 148, "in_progress": 1, "pending": 1}
+
+SINGLE_COLUMN = {
+    "idx_inquiries_status_created_at": "CREATE INDEX idx_inquiries_status ON inquiries (status)",
+    "idx_inquiries_service_created_at": "CREATE INDEX idx_inquiries_service_id ON inquiries (service_id)",
+}
+
+
+def seed(engine, size: int) -> None:
+    rng = random.Random(42)
+    start = datetime(2022, 1, 1)
+    with engine.begin() as conn:
+        batch = []
+        for i in range(1, size + 1):
+            created = start + timedelta(minutes=3 * i)
+            weights = RECENT_WEIGHTS if i > size - RECENT else OLDER_WEIGHTS
+            batch.append({
+                "id": i,
+                "client_name": f"客户{i}",
+                "client_email": f"client{i}@example.com",
+                "service_id": rng.randint(1, SERVICES),
+                "project_type": "网站开发",
+                "description": "需求描述" * 20,
+                "status": rng.choices(list(weights), list(weights.values()))[0],
+                "created_at": created,
+                "updated_at": created,
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Inquiry), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Inquiry), batch)
+        conn.execute(text("ANALYZE"))
+
+
+def use_single_column_indexes(engine) -> None:
+    with engine.begin() as conn:
+        for composite, single in SINGLE_COLUMN.items():
+            conn.execute(text(f"DROP INDEX {composite}"))
+            conn.execute(text(single))
+        conn.execute(text("ANALYZE"))
+
+
+def inbox(db, column, value, anchor=None):
+    query = db.query(Inquiry).options(joinedload(Inquiry.service)).filter(column == value)
+    if anchor is not None:
+        query = query.filter(seek_after(Inquiry.created_at, Inquiry.id, anchor.created_at, anchor.id))
+    return query.order_by(Inquiry.created_at.desc(), Inquiry.id.desc()).limit(PAGE_SIZE)
+
+
+def run_cases(Session, repeat: int) -> None:
+    with Session() as db:
+        for label, column, value in (("状态 pending", Inquiry.status, "pending"),
+                                     ("状态 in_progress", Inquiry.status, "in_progress"),
+                                     ("状态 cancelled", Inquiry.status, "cancelled"),
+                                     ("服务 #7", Inquiry.service_id, 7)):
+            # 深翻页的游标取自筛选结果中靠后的一行
+            total = db.query(func.count(Inquiry.id)).filter(column == value).scalar()
+            anchor = db.query(Inquiry).filter(column == value) \
+                .order_by(Inquiry.created_at.desc(), Inquiry.id.desc()).offset(int(total * 0.9)).first()
+            report(f"{label} 首页", measure(lambda: inbox(db, column, value).all(), repeat))
+            report(f"{label} 深翻页", measure(lambda: inbox(db, column, value, anchor).all(), repeat))
+
+        def count_each():
+            for name in get_args(InquiryStatus):
+                db.query(func.count(Inquiry.id)).filter(Inquiry.status == name).scalar()
+
+        def group_by():
+            db.query(Inquiry.status, func.count()).filter(Inquiry.status.isnot(None)).group_by(Inquiry.status).all()
+
+        report("状态计数 逐个 COUNT", measure(count_each, repeat))
+        report("状态计数 GROUP BY", measure(group_by, repeat))
+
+
+def run(size: int, repeat: int) -> None:
+    with temp_database() as (engine, Session):
+        seed(engine, size)
+        print(f"{size} 条询价，每页 {PAGE_SIZE} 条")
+        print("复合索引")
+        run_cases(Session, repeat)
+        use_single_column_indexes(engine)
+        print("单列索引")
+        run_cases(Session, repeat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="询价收件箱：单列索引 vs 复合索引")
+    parser.add_argument("--size", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    run(args.size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
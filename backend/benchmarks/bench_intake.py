@@ -0,0 +1,131 @@
+# 表单提交负载测试：每次提交直接写入数据库 vs 写入本地持久化队列、后台批量写入
+#
+# 多个进程（模拟 gunicorn worker）持续提交询价，同时另一个进程在业务数据库上持续执行写事务（模拟其他写入争用写锁）。
+# 统计提交的吞吐量、延迟与失败数（database is locked），以及队列方式下全部写入数据库所需的时间。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_intake --workers 4 --duration 5
+import argparse
+import multiprocessing
+import statistics
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.lib.durable_queue import DurableQueue
+from app.models.models import Counter, Inquiry
+from app.services import intake
+from benchmarks.common import temp_database
+
+PAYLOAD = {"client_name": "客户", "client_email": "client@example.com", "project_type": "网站开发", "description": "官网" * 50}
+
+
+def submitter(url: str, queue_path: str, mode: str, duration: float, seed: int, results) -> None:
+    engine = create_engine(url, connect_args={"timeout": 5})
+    Session = sessionmaker(bind=engine, autoflush=False)
+    queue = DurableQueue(queue_path)
+    samples, failed = [], 0
+    deadline = time.perf_counter() + duration
+    with Session() as db:
+        while time.perf_counter() < deadline:
+            begin = time.perf_counter()
+            try:
+                if mode == "direct":
+                    db.add(Inquiry(**PAYLOAD))
+                    db.commit()
+                else:
+                    queue.put(f"inquiry:{seed}-{len(samples)}", "inquiry", PAYLOAD)
+                samples.append((time.perf_counter() - begin) * 1000)
+            except Exception:
+                db.rollback()
+                failed += 1
+    results.put((samples, failed))
+
+
+def other_writer(url: str, stop) -> None:
+    """其他写入：每个事务持有写锁约 5ms，间隔 5ms"""
+    engine = create_engine(url, connect_args={"timeout": 5})
+    with engine.connect() as conn:
+        conn.execute(insert(Counter).values(key="bench", value=0))
+        conn.commit()
+        while not stop.is_set():
+            try:
+                conn.execute(update(Counter).where(Counter.key == "bench").values(value=Counter.value + 1))
+                time.sleep(0.005)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+            time.sleep(0.005)
+
+
+def consumer(url: str, queue_path: str, stop) -> None:
+    """后台消费，与服务中相同每 INTAKE_DRAIN_INTERVAL 秒写入一次；stop 后尽快写完剩余的提交"""
+    engine = create_engine(url, connect_args={"timeout": 5})
+    Session = sessionmaker(bind=engine, autoflush=False)
+    intake.queue = DurableQueue(queue_path)
+    with Session() as db:
+        while not stop.is_set() or intake.stats()["depth"]:
+            intake.drain(db)
+            time.sleep(0.01 if stop.is_set() else settings.INTAKE_DRAIN_INTERVAL)
+
+
+def run(workers: int, duration: float) -> None:
+    context = multiprocessing.get_context("fork")
+    for mode, label in (("direct", "直接写入数据库"), ("queue", "写入本地队列")):
+        with temp_database() as (engine, Session):
+            url = str(engine.url)
+            queue_path = str(Path(url.removeprefix("sqlite:///")).with_name("intake.db"))
+            stop = context.Event()
+            background = context.Process(target=other_writer, args=(url, stop))
+            background.start()
+            finished = context.Event()
+            drainer = context.Process(target=consumer, args=(url, queue_path, finished))
+            if mode == "queue":
+                drainer.start()
+            results = context.Queue()
+            processes = [
+                context.Process(target=submitter, args=(url, queue_path, mode, duration, seed, results))
+                for seed in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            outcomes = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            # 提交结束后（其他写入仍在进行）写完队列中剩余的提交
+            begin = time.perf_counter()
+            if mode == "queue":
+                finished.set()
+                drainer.join()
+            backlog_seconds = time.perf_counter() - begin
+            stop.set()
+            background.join()
+
+            samples = sorted(sample for outcome, _ in outcomes for sample in outcome)
+            failed = sum(count for _, count in outcomes)
+            with Session() as db:
+                stored = db.query(func.count(Inquiry.id)).scalar()
+            print(f"{label}（{workers} 个进程，{duration:.0f}s）")
+            print(f"  提交 {len(samples) / duration:8.0f} 次/秒  失败 {failed}  "
+                  f"p50={statistics.median(samples):.2f}ms  p99={samples[int(len(samples) * 0.99)]:.2f}ms  "
+                  f"max={samples[-1]:.2f}ms")
+            print(f"  数据库中 {stored} 条", end="")
+            if mode == "queue":
+                print(f"，提交结束后 {backlog_seconds:.2f}s 写完队列（每批 {settings.INTAKE_BATCH_SIZE} 条）", end="")
+            print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="表单提交：直接写入数据库 vs 本地队列批量写入")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+    run(args.workers, args.duration)
+
+
+if __name__ == "__main__":
+    main()
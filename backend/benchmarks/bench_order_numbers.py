@@ -0,0 +1,77 @@
+# 订单号生成基准：旧方式（毫秒时间戳 + 6 位随机字符）vs Snowflake 风格生成器
+#
+# 多个进程（模拟 gunicorn worker）同时生成，统计各进程吞吐量与重复数；Snowflake 的 worker id 通过临时 SQLite 中的租约领取。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_order_numbers --processes 4 --count 200000
+import argparse
+import multiprocessing
+import os
+import random
+import string
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.models import Base, WorkerLease
+from app.services.order_numbers import OrderNumbers
+
+
+def legacy_order_no() -> str:
+    """旧实现"""
+    timestamp = int(time.time() * 1000)
+    ts_str = format(timestamp, '036').upper()
+    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    return f"ORD-{ts_str}-{random_str}"
+
+
+def _run(kind: str, url: str, count: int, start_at: float, queue) -> None:
+    if kind == "legacy":
+        # fork 出的进程继承同一个随机数状态，与 gunicorn preload 时相同
+        generate = legacy_order_no
+    else:
+        engine = create_engine(url, connect_args={"timeout": 30})
+        numbers = OrderNumbers(60)
+        with Session(engine) as db:
+            numbers.start(db)
+        generate = numbers.generate
+    while time.time() < start_at:
+        time.sleep(0.001)
+    begin = time.perf_counter()
+    issued = [generate() for _ in range(count)]
+    queue.put((time.perf_counter() - begin, issued))
+
+
+def run(processes: int, count: int) -> None:
+    context = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        url = f"sqlite:///{os.path.join(tmpdir, 'leases.db')}"
+        Base.metadata.create_all(create_engine(url), tables=[WorkerLease.__table__])
+        print(f"{processes} 个进程，每个生成 {count} 个订单号")
+        for kind, label in (("legacy", "旧方式（时间戳 + 随机字符）"), ("snowflake", "Snowflake")):
+            queue = context.Queue()
+            start_at = time.time() + 1
+            workers = [context.Process(target=_run, args=(kind, url, count, start_at, queue)) for _ in range(processes)]
+            for worker in workers:
+                worker.start()
+            results = [queue.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+            issued = [number for _, numbers in results for number in numbers]
+            rate = sum(count / elapsed for elapsed, _ in results)
+            print(f"  {label:<24} 合计 {rate / 1000:8.0f}k 个/秒  重复 {len(issued) - len(set(issued))} 个  "
+                  f"长度 {len(issued[0])}  示例 {issued[0]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="订单号生成：旧方式 vs Snowflake")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+    run(args.processes, args.count)
+
+
+if __name__ == "__main__":
+    main()
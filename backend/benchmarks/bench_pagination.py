@@ -0,0 +1,50 @@
+# 分页基准：OFFSET 深翻页 vs 游标（keyset）分页
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_pagination --sizes 10000 100000
+import argparse
+
+from app.lib.pagination import seek_after
+from app.models.models import Post
+from benchmarks.common import measure, report, seed_posts, temp_database
+
+PAGE_SIZE = 20
+
+
+def published_posts(db):
+    return db.query(Post).filter(Post.published == True).order_by(Post.created_at.desc(), Post.id.desc())
+
+
+def run(size: int, repeat: int) -> None:
+    with temp_database() as (engine, Session):
+        seed_posts(engine, size, content_length=200)
+        print(f"{size} 篇文章，每页 {PAGE_SIZE} 条")
+        with Session() as db:
+            for depth in (0.1, 0.5, 0.99):
+                offset = int(size * depth)
+                # 游标取自上一页最后一行
+                anchor = published_posts(db).offset(offset - 1).limit(1).one()
+
+                def by_offset():
+                    published_posts(db).offset(offset).limit(PAGE_SIZE).all()
+
+                def by_cursor():
+                    published_posts(db) \
+                        .filter(seek_after(Post.created_at, Post.id, anchor.created_at, anchor.id)) \
+                        .limit(PAGE_SIZE).all()
+
+                report(f"OFFSET  (偏移 {offset})", measure(by_offset, repeat))
+                report(f"游标    (偏移 {offset})", measure(by_cursor, repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分页基准：OFFSET vs 游标")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
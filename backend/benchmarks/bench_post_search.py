@@ -0,0 +1,56 @@
+# 文章搜索基准：LIKE 全表扫描 vs 全文索引
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_post_search --sizes 10000 100000
+import argparse
+import random
+
+from sqlalchemy import or_
+
+from app.models.models import Post
+from app.services import post_search
+from benchmarks.common import HANZI, measure, report, seed_posts, temp_database
+
+
+def like_search(db, term: str, limit: int = 10):
+    query = db.query(Post).filter(Post.published == True) \
+        .filter(or_(Post.title.contains(term), Post.content.contains(term)))
+    total = query.count()
+    posts = query.order_by(Post.created_at.desc()).limit(limit).all()
+    return total, posts
+
+
+def fts_search(db, term: str, limit: int = 10):
+    ids, total = post_search.search_posts(db, term, offset=0, limit=limit)
+    posts = db.query(Post).filter(Post.id.in_(ids)).all() if ids else []
+    snippets = [post_search.make_snippet(post.content, term) for post in posts]
+    return total, snippets
+
+
+def run(size: int, repeat: int, content_length: int) -> None:
+    rng = random.Random(7)
+    terms = ["".join(rng.choice(HANZI) for _ in range(rng.choice([2, 3]))) for _ in range(repeat)]
+    with temp_database() as (engine, Session):
+        seed_posts(engine, size, content_length=content_length)
+        with Session() as db:
+            post_search.rebuild_index(db)
+        print(f"{size} 篇文章（正文约 {content_length} 字）")
+        with Session() as db:
+            it = iter(terms)
+            report("LIKE", measure(lambda: like_search(db, next(it)), repeat))
+            it = iter(terms)
+            report("全文索引 (FTS5 + bm25)", measure(lambda: fts_search(db, next(it)), repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文章搜索基准：LIKE vs 全文索引")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--content-length", type=int, default=1000)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat, args.content_length)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# 列表响应基准：完整视图 vs 摘要视图（响应体大小与延迟）
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_post_summary --size 2000 --content-length 20000
+import argparse
+
+from fastapi.testclient import TestClient
+
+from app.core.limiter import limiter
+from app.db.session import get_db
+from app.main import app
+from benchmarks.common import measure, report, seed_posts, temp_database
+
+PAGE_SIZE = 100
+
+
+def run(size: int, content_length: int, repeat: int) -> None:
+    with temp_database() as (engine, Session):
+        seed_posts(engine, size, content_length=content_length)
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            with TestClient(app) as client:
+                print(f"{size} 篇文章，正文 {content_length} 字，每页 {PAGE_SIZE} 条")
+                for view in ("full", "summary"):
+                    limiter.reset()  # 避免触发列表接口的频率限制
+                    params = {"limit": PAGE_SIZE, "view": view}
+
+                    def fetch():
+                        client.get("/api/blog/posts", params=params)
+
+                    payload = len(client.get("/api/blog/posts", params=params).content)
+                    report(f"{view:<8} ({payload / 1024:,.0f} KB)", measure(fetch, repeat))
+        finally:
+            app.dependency_overrides.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列表响应基准：完整视图 vs 摘要视图")
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--content-length", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.size, args.content_length, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
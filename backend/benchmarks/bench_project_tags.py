@@ -0,0 +1,66 @@
+# 项目技术栈筛选与计数基准：读取全部项目扫描 JSON vs 规范化标签表
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_project_tags --projects 20000
+import argparse
+import random
+from collections import Counter
+
+from sqlalchemy import insert
+
+from app.models.models import Project
+from app.services import project_tags
+from benchmarks.common import measure, random_text, report, temp_database
+
+TECH = [
+    "Python", "FastAPI", "Django", "Flask", "React", "Vue", "Next.js", "Svelte", "TypeScript", "Go", "Rust",
+    "PostgreSQL", "SQLite", "Redis", "Docker", "Kubernetes", "Nginx", "Tailwind", "GraphQL", "Celery",
+]
+
+
+def scan_filter(db, tech: list[str]):
+    wanted = {name.lower() for name in tech}
+    projects = db.query(Project).all()
+    return [project for project in projects if wanted <= {name.lower() for name in project.tech_stack or []}]
+
+
+def scan_facets(db):
+    counts = Counter()
+    for (tech_stack,) in db.query(Project.tech_stack):
+        counts.update({name.lower() for name in tech_stack or []})
+    return counts.most_common(50)
+
+
+def run(projects: int, repeat: int) -> None:
+    rng = random.Random(3)
+    with temp_database() as (engine, Session):
+        with engine.begin() as conn:
+            conn.execute(insert(Project), [{
+                "name": f"project {i}", "slug": f"project-{i}", "description": random_text(rng, 100),
+                "content": random_text(rng, 1000), "tech_stack": rng.sample(TECH, rng.randint(2, 6)), "author_id": 1,
+            } for i in range(projects)])
+        with Session() as db:
+            project_tags.backfill(db)
+        print(f"{projects} 个项目")
+        with Session() as db:
+            queries = [rng.sample(TECH, 2) for _ in range(repeat)]
+            it = iter(queries)
+            report("扫描 JSON 筛选", measure(lambda: scan_filter(db, next(it)), repeat))
+            it = iter(queries)
+            report("标签表筛选", measure(
+                lambda: project_tags.filter_projects(db.query(Project), next(it), "all").all(), repeat
+            ))
+            report("扫描 JSON 计数", measure(lambda: scan_facets(db), repeat))
+            report("读取标签计数", measure(lambda: project_tags.facets(db, 50), repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="项目技术栈筛选与计数基准")
+    parser.add_argument("--projects", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.projects, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
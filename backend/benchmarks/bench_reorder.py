@@ -0,0 +1,76 @@
+# 拖拽排序基准：逐项 PUT（每项一次提交）vs 批量排序（一条 UPDATE ... CASE，稀疏排名）
+#
+# 使用临时 SQLite 文件数据库（每次提交都会落盘），不经过 HTTP，只比较数据库部分。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_reorder --items 200
+import argparse
+import random
+
+from sqlalchemy import insert
+
+from app.models.models import Portfolio
+from app.services import reordering
+from benchmarks.common import measure, report, temp_database
+
+
+def per_item(Session, order: list[int]) -> None:
+    """旧方式：前端对每一项发一次 PUT，各自提交"""
+    for position, item_id in enumerate(order):
+        with Session() as db:
+            item = db.get(Portfolio, item_id)
+            item.sort_order = position
+            db.commit()
+
+
+def bulk(Session, order: list[int]) -> dict:
+    with Session() as db:
+        result = reordering.reorder(db, Portfolio, "portfolio", order)
+        db.commit()
+        return result
+
+
+def run(items: int, repeat: int) -> None:
+    rng = random.Random(11)
+    with temp_database() as (engine, Session):
+        with engine.begin() as conn:
+            conn.execute(insert(Portfolio), [
+                {"title": f"作品 {i}", "category": "design", "sort_order": 0} for i in range(items)
+            ])
+        ids = list(range(1, items + 1))
+        print(f"{items} 个作品")
+
+        def shuffled():
+            order = ids[:]
+            rng.shuffle(order)
+            return order
+
+        report("逐项 PUT（整体打乱）", measure(lambda: per_item(Session, shuffled()), max(1, repeat // 10)))
+        report("批量排序（整体打乱）", measure(lambda: bulk(Session, shuffled()), repeat))
+
+        # 单次拖动：把随机一项移到随机位置
+        with Session() as db:
+            current = [row.id for row in db.query(Portfolio.id).order_by(Portfolio.sort_order)]
+        updated = []
+
+        def drag():
+            item = current.pop(rng.randrange(len(current)))
+            current.insert(rng.randrange(len(current) + 1), item)
+            updated.append(bulk(Session, current))
+
+        report("批量排序（拖动一项）", measure(drag, repeat))
+        rows = sum(result["updated"] for result in updated)
+        rebalanced = sum(result["rebalanced"] for result in updated)
+        print(f"  拖动 {len(updated)} 次共改写 {rows} 行，整体重新编号 {rebalanced} 次")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="拖拽排序：逐项更新 vs 批量排序")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.items, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# 站内搜索基准：LIKE 全表扫描 vs 内存映射倒排索引（段 + 增量）
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_site_search --sizes 10000 50000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import or_
+
+from app.models.models import Post
+from app.services import site_search
+from benchmarks.common import HANZI, measure, random_text, report, seed_posts, temp_database
+
+
+def like_search(db, term: str, limit: int = 10):
+    query = db.query(Post.id).filter(Post.published == True) \
+        .filter(or_(Post.title.contains(term), Post.content.contains(term)))
+    return query.count(), query.order_by(Post.created_at.desc()).limit(limit).all()
+
+
+def directory_size(path: str) -> float:
+    return sum(entry.stat().st_size for entry in os.scandir(path)) / 1024 / 1024
+
+
+def run(size: int, repeat: int, content_length: int, changes: int) -> None:
+    rng = random.Random(7)
+    terms = ["".join(rng.choice(HANZI) for _ in range(2)) for _ in range(repeat)]
+    with temp_database() as (engine, Session), tempfile.TemporaryDirectory() as tmpdir:
+        seed_posts(engine, size, content_length=content_length)
+        index = site_search.SiteSearch(tmpdir)
+        with Session() as db:
+            begin = time.perf_counter()
+            index.rebuild(db)
+            built = time.perf_counter() - begin
+        generation = open(os.path.join(tmpdir, "CURRENT")).read()
+        print(f"{size} 篇文章（正文约 {content_length} 字）")
+        print(f"  重建段 {built:.1f}s  段大小 {directory_size(os.path.join(tmpdir, generation)):.0f}MB")
+
+        with Session() as db:
+            it = iter(terms)
+            report("LIKE", measure(lambda: like_search(db, next(it)), repeat))
+            it = iter(terms)
+            report("倒排索引（段）", measure(lambda: index.search(db, next(it), None, 0, 10), repeat))
+
+            # 段生成后修改一批文章，由各 worker 的增量补读
+            for post in db.query(Post).filter(Post.id <= changes):
+                post.content = random_text(rng, content_length)
+            db.commit()
+            begin = time.perf_counter()
+            index.sync(db)
+            print(f"  补读 {changes} 条变更 {time.perf_counter() - begin:.2f}s")
+            it = iter(terms)
+            report(f"倒排索引（段 + {changes} 增量）", measure(lambda: index.search(db, next(it), None, 0, 10), repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="站内搜索基准：LIKE vs 倒排索引")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--content-length", type=int, default=1000)
+    parser.add_argument("--changes", type=int, default=1000)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat, args.content_length, args.changes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# 输入联想基准：LIKE 前缀查询 vs 内存前缀索引（含每次请求的变更日志检查）
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_suggest --posts 100000 --projects 5000
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+
+from app.models.models import Post, Project
+from app.services.suggest import Suggester
+from benchmarks.common import LATIN, measure, random_text, report, seed_posts, temp_database
+
+
+def like_suggest(db, prefix: str, limit: int = 8):
+    posts = db.query(Post.id, Post.title).filter(Post.published == True, Post.title.like(f"{prefix}%")).limit(limit).all()
+    projects = db.query(Project.id, Project.name).filter(Project.name.like(f"{prefix}%")).limit(limit).all()
+    return posts + projects
+
+
+def run(posts: int, projects: int, repeat: int) -> None:
+    rng = random.Random(11)
+    with temp_database() as (engine, Session):
+        seed_posts(engine, posts, content_length=50)
+        with engine.begin() as conn:
+            conn.execute(insert(Project), [{
+                "id": i,
+                "name": f"{rng.choice(LATIN).title()} {random_text(rng, 8)}",
+                "slug": f"project-{i}",
+                "description": "",
+                "tech_stack": rng.sample(LATIN, 3),
+            } for i in range(1, projects + 1)])
+        print(f"{posts} 篇文章 + {projects} 个项目")
+        suggester = Suggester()
+        with Session() as db:
+            begin = time.perf_counter()
+            suggester.sync(db)
+            print(f"  全量加载 {time.perf_counter() - begin:.2f}s  条目 {len(suggester.index)}")
+
+            titles = [title for (title,) in db.query(Post.title).limit(repeat)]
+            prefixes = [title[:rng.randint(1, 3)] for title in titles] + [word[:2] for word in LATIN]
+            rng.shuffle(prefixes)
+            count = len(prefixes)
+
+            it = iter(prefixes)
+            report("LIKE 前缀", measure(lambda: like_suggest(db, next(it)), count))
+            it = iter(prefixes)
+            stats = measure(lambda: suggester.suggest(db, next(it), 8), count)
+            report("前缀索引", stats)
+            print(f"  前缀索引 p99={stats['p99']:.3f}ms")
+
+            # 增量：修改一批文章标题
+            for post in db.query(Post).filter(Post.id <= 1000):
+                post.title = random_text(rng, 20)
+            db.commit()
+            begin = time.perf_counter()
+            suggester.sync(db)
+            print(f"  增量应用 1000 条变更 {time.perf_counter() - begin:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="输入联想基准：LIKE vs 前缀索引")
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.posts, args.projects, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# 话题浏览量负载测试：每次读取都提交写事务 vs 内存缓冲批量写回
+#
+# 模拟多个 gunicorn worker（多进程）并发读取少量热门话题，统计吞吐量，
+# 并对比数据库中的最终浏览量与实际请求数（读-改-写竞争会丢失计数）。
+#
+# 用法（在 backend 目录下执行）:
+#   python -m benchmarks.bench_topic_views --workers 4 --duration 5
+import argparse
+import multiprocessing
+import random
+import time
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.models.models import Topic, User
+from app.services import view_buffer
+from benchmarks.common import temp_database
+
+TOPICS = 5
+FLUSH_INTERVAL = 1.0
+
+
+def read_commit(db, topic_id: int) -> None:
+    """改造前的 get_topic：读取后 views += 1 并提交"""
+    topic = db.query(Topic).options(joinedload(Topic.author)).filter(Topic.id == topic_id).first()
+    topic.views += 1
+    db.commit()
+
+
+def read_buffered(db, topic_id: int) -> None:
+    """改造后的 get_topic：只读，浏览量记入缓冲"""
+    db.query(Topic).options(joinedload(Topic.author)).filter(Topic.id == topic_id).first()
+    view_buffer.record(db, topic_id)
+    db.rollback()  # 结束只读事务，与请求结束时关闭会话一致
+
+
+def worker(url: str, mode: str, duration: float, seed: int) -> tuple[int, int]:
+    """单个 worker 进程，返回 (成功请求数, 失败请求数)"""
+    engine = create_engine(url, connect_args={"timeout": 5})
+    Session = sessionmaker(bind=engine, autoflush=False)
+    rng = random.Random(seed)
+    done = failed = 0
+    last_flush = time.perf_counter()
+    deadline = last_flush + duration
+    with Session() as db:
+        while time.perf_counter() < deadline:
+            topic_id = rng.randint(1, TOPICS)
+            try:
+                if mode == "commit":
+                    read_commit(db, topic_id)
+                else:
+                    read_buffered(db, topic_id)
+                    if time.perf_counter() - last_flush >= FLUSH_INTERVAL:
+                        view_buffer.flush(db)
+                        last_flush = time.perf_counter()
+                done += 1
+            except Exception:
+                db.rollback()
+                failed += 1
+        if mode == "buffered":
+            view_buffer.flush(db)
+    engine.dispose()
+    return done, failed
+
+
+def run(workers: int, duration: float) -> None:
+    print(f"{workers} 个 worker 进程，{TOPICS} 个热门话题，每轮 {duration}s")
+    for mode in ("commit", "buffered"):
+        with temp_database() as (engine, Session):
+            with engine.begin() as conn:
+                conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "role": "user"}])
+                conn.execute(insert(Topic), [
+                    {"id": i, "title": f"话题 {i}", "content": "内容", "author_id": 1, "views": 0}
+                    for i in range(1, TOPICS + 1)
+                ])
+            url = engine.url.render_as_string(hide_password=False)
+            with multiprocessing.get_context("spawn").Pool(workers) as pool:
+                results = pool.starmap(worker, [(url, mode, duration, seed) for seed in range(workers)])
+            done = sum(r[0] for r in results)
+            failed = sum(r[1] for r in results)
+            with Session() as db:
+                stored = db.query(func.sum(Topic.views)).scalar()
+            print(
+                f"  {mode:<9} {done / duration:10,.0f} req/s  失败 {failed:>5}  "
+                f"写入浏览量 {stored:>8,} / 请求 {done:,}（丢失 {done - stored:,}）"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="话题浏览量负载测试")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    run(args.workers, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# 基准测试公共工具
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import Base, Post, User
+
+# 常用汉字，用于生成接近真实分布的中文正文
+HANZI = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所"
+    "民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那"
+    "社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并"
+)
+LATIN = ["fastapi", "python", "sqlite", "react", "nextjs", "docker", "nginx", "redis", "api", "cache"]
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    """生成中英混排的随机正文"""
+    chunks = []
+    size = 0
+    while size < length:
+        if rng.random() < 0.1:
+            word = " " + rng.choice(LATIN) + " "
+        else:
+            word = "".join(rng.choice(HANZI) for _ in range(rng.randint(2, 12)))
+        chunks.append(word)
+        size += len(word)
+    return "".join(chunks)[:length]
+
+
+@contextmanager
+def temp_database():
+    """创建临时 SQLite 文件数据库，返回 (engine, Session 工厂)"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        try:
+            yield engine, sessionmaker(bind=engine, autoflush=False)
+        finally:
+            engine.dispose()
+
+
+def seed_posts(engine, count: int, content_length: int = 1000, seed: int = 42) -> None:
+    """批量写入已发布文章（不经过 ORM，加快造数）"""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "role": "admin"}])
+        batch = []
+        for i in range(1, count + 1):
+            created = start + timedelta(minutes=i)
+            batch.append({
+                "id": i,
+                "title": random_text(rng, 20),
+                "slug": f"post-{i}",
+                "content": random_text(rng, content_length),
+                "published": True,
+                "author_id": 1,
+                "created_at": created,
+                "updated_at": created,
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Post), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Post), batch)
+
+
+def measure(fn, repeat: int) -> dict:
+    """重复执行并返回延迟统计（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - begin) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max": samples[-1],
+    }
+
+
+def report(label: str, stats: dict) -> None:
+    print(f"  {label:<28} p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms  max={stats['max']:8.2f}ms")
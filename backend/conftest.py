@@ -22,6 +22,14 @@ def db_engine():
     return engine
 
 
+@pytest.fixture(autouse=True)
+def catalog_snapshot_path(tmp_path, monkeypatch):
+    """目录快照写到用例自己的目录：提交项目等数据后会重建，不读取之前用例（已删除的数据）生成的快照"""
+    from app.services import catalog_snapshots
+
+    monkeypatch.setattr(catalog_snapshots.snapshots, "path", tmp_path / "catalog.snap")
+
+
 @pytest.fixture(scope="function")
 def db_session(db_engine):
     """创建测试数据库会话"""
@@ -41,11 +49,17 @@ def db_session(db_engine):
 
 
 @pytest.fixture(scope="function")
-def client(db_engine):
-    """创建测试客户端"""
+def client(db_engine, db_session, tmp_path, monkeypatch):
+    """创建测试客户端（依赖 db_session：启动前建表，关闭后才清除数据，启动时领取的租约等不留给后续用例）"""
     from fastapi.testclient import TestClient
     from app.db.session import get_db
+    from app.core.limiter import limiter
+    from app import main
     from app.main import app
+    from app.core import tasks
+    from app.core.config import settings
+    from app.models.models import Base
+    from app.services import intake, site_search, view_buffer
 
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
 
@@ -57,15 +71,34 @@ def client(db_engine):
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    # 启动与关闭时的步骤（建表、目录快照、订单号租约等）同样使用测试数据库
+    monkeypatch.setattr(main, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(main, "create_tables", lambda: Base.metadata.create_all(bind=db_engine))
+    # 后台任务会在其他线程中与请求共用测试数据库的连接：不启动，需要时由用例直接调用
+    monkeypatch.setattr(tasks, "start", lambda name, coroutine: coroutine.close())
+    monkeypatch.setattr(tasks, "start_periodic", lambda name, interval, func: None)
+    # 速率限制计数与浏览量缓冲按进程保存，每个用例开始前清空
+    limiter.reset()
+    view_buffer.reset()
+    # 近似重复索引快照同样按用例隔离（启动时载入、关闭时保存）
+    monkeypatch.setattr(settings, "NEAR_DUPLICATE_INDEX_PATH", str(tmp_path / "near_duplicates.npz"))
+    # 站内搜索不读取真实数据库建出的索引段，只使用测试数据库中的变更日志
+    monkeypatch.setattr(site_search.index, "directory", str(tmp_path / "search"))
+    # 表单提交队列同样按用例隔离；关闭时不写入，由用例调用 intake.drain
+    monkeypatch.setattr(intake.queue, "path", tmp_path / "intake.db")
+    monkeypatch.setattr(intake.notifications, "path", tmp_path / "intake-notify.db")
+    monkeypatch.setattr(settings, "INTAKE_DRAIN_INTERVAL", 0)
 
     with TestClient(app) as c:
         yield c
+        # 关闭时会写回缓冲的浏览量，丢弃用例产生的增量（数据可能已被清除）
+        view_buffer.reset()
 
     app.dependency_overrides.clear()
 
 
 @pytest.fixture(scope="function")
-def admin_user(client):
+def admin_user(client, db_session):
     """创建并返回管理员用户和token"""
     # 注册管理员用户
     client.post(
@@ -77,6 +110,11 @@ def admin_user(client):
         }
     )
 
+    # 注册用户默认为普通用户，直接在数据库中提升为管理员
+    from app.models.models import User
+    db_session.query(User).filter(User.email == "pytest_admin@test.com").update({"role": "admin"})
+    db_session.commit()
+
     # 登录获取 token
     response = client.post(
         "/api/auth/login",
@@ -91,7 +129,7 @@ def admin_user(client):
 
 
 @pytest.fixture(scope="function")
-def normal_user(client):
+def normal_user(client, db_session):
     """创建并返回普通用户和token"""
     # 注册普通用户
     client.post(
@@ -6,6 +6,7 @@ from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.db.session import get_db
 from app.models.models import Base
+from app.services import intake
 
 # 测试数据库配置
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_portfolio.db"
@@ -279,8 +280,9 @@ class TestServices:
                 "description": "需要建设一个企业官网"
             }
         )
-        assert response.status_code == 200
-        assert response.json()["client_name"] == "客户A"
+        # 写入队列后立即返回，由后台任务写入数据库
+        assert response.status_code == 202
+        assert response.json()["key"]
 
 
 class TestUsers:
@@ -398,7 +400,7 @@ class TestInquiries:
                 "description": "测试询价内容"
             }
         )
-        assert response.status_code == 200
+        assert response.status_code == 202
 
     def test_get_inquiries_requires_admin(self):
         """测试获取询价列表需要管理员权限"""
@@ -419,6 +421,8 @@ class TestInquiries:
                 "description": "测试状态更新"
             }
         )
+        with TestingSessionLocal() as db:
+            intake.drain(db)
 
         # 更新状态
         response = client.put(
@@ -537,8 +541,8 @@ class TestContact:
                 "message": "这是测试消息内容，需要足够长以通过验证。"
             }
         )
-        # 即使没有配置 SMTP，也应该返回成功（取决于配置）
-        assert response.status_code in [200, 500]
+        # 写入队列后立即返回，邮件由后台任务发送
+        assert response.status_code == 202
 
     def test_contact_validation(self):
         """测试联系表单验证"""
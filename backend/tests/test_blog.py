@@ -0,0 +1,160 @@
+# 博客接口测试（使用 conftest 中的内存数据库夹具）
+import pytest
+from fastapi import HTTPException
+
+from conftest import get_auth_header
+
+
+def create_post(client, token, **overrides):
+    data = {
+        "title": "测试文章",
+        "slug": "test-post",
+        "content": "这是测试文章内容",
+        "published": True,
+    }
+    data.update(overrides)
+    response = client.post("/api/blog/posts", json=data, headers=get_auth_header(token))
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestPostSearch:
+    """文章全文检索测试"""
+
+    def test_search_cjk_with_highlight(self, client, admin_user):
+        """中文检索按二元组匹配并返回高亮片段"""
+        token = admin_user["token"]
+        create_post(client, token, slug="sqlite", title="SQLite 全文检索", content="使用 FTS5 实现数据库全文检索功能")
+        create_post(client, token, slug="react", title="前端框架", content="React 组件化开发实践")
+
+        response = client.get("/api/blog/posts", params={"search": "全文检索"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert [post["slug"] for post in data["posts"]] == ["sqlite"]
+        assert "<mark>全文检索</mark>" in data["highlights"]["sqlite"]
+
+    def test_search_single_cjk_character(self, client, admin_user):
+        """单字查询命中多字词中的任意位置"""
+        token = admin_user["token"]
+        create_post(client, token, slug="reading", title="读书笔记", content="一本好书的摘录")
+        create_post(client, token, slug="other", title="部署笔记", content="nginx 配置")
+
+        for query in ("书", "读", "摘"):
+            data = client.get("/api/blog/posts", params={"search": query}).json()
+            assert [post["slug"] for post in data["posts"]] == ["reading"]
+        # 多字查询仍按二元组短语匹配
+        assert client.get("/api/blog/posts", params={"search": "书笔"}).json()["total"] == 1
+        assert client.get("/api/blog/posts", params={"search": "书读"}).json()["total"] == 0
+
+    def test_search_ranks_title_first(self, client, admin_user):
+        """标题命中的文章排在正文命中之前，拉丁单词支持前缀匹配"""
+        token = admin_user["token"]
+        create_post(client, token, slug="body-hit", title="部署笔记", content="nginx 反向代理 FastAPI")
+        create_post(client, token, slug="title-hit", title="FastAPI 入门", content="路由与依赖注入")
+
+        data = client.get("/api/blog/posts", params={"search": "fasta"}).json()
+        assert [post["slug"] for post in data["posts"]] == ["title-hit", "body-hit"]
+
+    def test_index_follows_updates(self, client, admin_user):
+        """更新、取消发布和删除文章后索引同步变化"""
+        token = admin_user["token"]
+        create_post(client, token, slug="sync", title="旧标题", content="旧的正文")
+
+        client.put("/api/blog/posts/sync", json={"content": "新的正文内容"}, headers=get_auth_header(token))
+        assert client.get("/api/blog/posts", params={"search": "旧的"}).json()["total"] == 0
+        assert client.get("/api/blog/posts", params={"search": "新的"}).json()["total"] == 1
+
+        client.put("/api/blog/posts/sync", json={"published": False}, headers=get_auth_header(token))
+        assert client.get("/api/blog/posts", params={"search": "新的"}).json()["total"] == 0
+
+        client.put("/api/blog/posts/sync", json={"published": True}, headers=get_auth_header(token))
+        client.delete("/api/blog/posts/sync", headers=get_auth_header(token))
+        assert client.get("/api/blog/posts", params={"search": "新的"}).json()["total"] == 0
+
+
+class TestPostPagination:
+    """文章游标分页测试"""
+
+    def test_cursor_walks_all_pages(self, client, admin_user):
+        """按 next_cursor 翻页，结果与 page 翻页一致且不重复"""
+        token = admin_user["token"]
+        for i in range(4):
+            create_post(client, token, slug=f"post-{i}", title=f"文章 {i}")
+
+        first = client.get("/api/blog/posts", params={"limit": 2}).json()
+        slugs = [post["slug"] for post in first["posts"]]
+        cursor = first["next_cursor"]
+        pages = 1
+        while cursor:
+            data = client.get("/api/blog/posts", params={"limit": 2, "cursor": cursor}).json()
+            slugs += [post["slug"] for post in data["posts"]]
+            cursor = data["next_cursor"]
+            pages += 1
+
+        # 总数恰好是 limit 的倍数时，最后一页不再返回游标（不会多出一个空页）
+        assert pages == 2
+        assert slugs == [f"post-{i}" for i in reversed(range(4))]
+        page_two = client.get("/api/blog/posts", params={"limit": 2, "page": 2}).json()
+        assert [post["slug"] for post in page_two["posts"]] == slugs[2:4]
+
+    def test_cursor_rejected_with_search(self, client, admin_user):
+        """搜索结果按相关度排序，游标不适用"""
+        for i in range(2):
+            create_post(client, admin_user["token"], slug=f"post-{i}")
+        cursor = client.get("/api/blog/posts", params={"limit": 1}).json()["next_cursor"]
+        with pytest.raises(HTTPException) as exc:
+            client.get("/api/blog/posts", params={"search": "测试", "cursor": cursor})
+        assert exc.value.status_code == 400
+
+
+class TestPostRender:
+    """文章 Markdown 预渲染测试"""
+
+    def test_render_on_write(self, client, admin_user):
+        """写入时渲染并过滤 HTML，详情接口返回目录与阅读时间"""
+        content = "# 简介\n\n正文<script>alert(1)</script>\n\n## Usage\n\n[链接](javascript:alert(1))"
+        create_post(client, admin_user["token"], slug="render", content=content)
+
+        data = client.get("/api/blog/posts/render").json()
+        assert "<script>" not in data["content_html"]
+        assert "javascript:" not in data["content_html"]
+        assert '<h1 id="简介">简介</h1>' in data["content_html"]
+        assert [entry["id"] for entry in data["toc"]] == ["简介"]
+        assert data["toc"][0]["children"][0]["name"] == "Usage"
+        assert data["reading_time"] == 1
+
+    def test_update_rerenders(self, client, admin_user):
+        headers = get_auth_header(admin_user["token"])
+        create_post(client, admin_user["token"], slug="render", content="旧内容")
+        response = client.put("/api/blog/posts/render", json={"content": "**新内容**"}, headers=headers)
+        assert "<strong>新内容</strong>" in response.json()["content_html"]
+
+    def test_reading_stats_cjk(self):
+        """中文按字计数，英文按词计数"""
+        from app.services.markdown_render import reading_stats
+
+        assert reading_stats("中文字数 and three words") == (7, 1)
+        assert reading_stats("字" * 1000)[1] == 3
+
+
+class TestPostSummaryView:
+    """列表摘要视图测试"""
+
+    def test_summary_omits_content(self, client, admin_user):
+        token = admin_user["token"]
+        create_post(client, token, slug="manual", excerpt="手写摘要", content="正文" * 200)
+        create_post(client, token, slug="auto", content="# 标题\n\n" + "自动摘要" * 100)
+
+        posts = client.get("/api/blog/posts", params={"view": "summary"}).json()["posts"]
+        by_slug = {post["slug"]: post for post in posts}
+        assert "content" not in by_slug["manual"]
+        assert by_slug["manual"]["excerpt"] == "手写摘要"
+        assert by_slug["auto"]["excerpt"].startswith("标题 自动摘要")
+        assert by_slug["auto"]["excerpt"].endswith("…")
+
+    def test_full_view_unchanged(self, client, admin_user):
+        create_post(client, admin_user["token"])
+        post = client.get("/api/blog/posts").json()["posts"][0]
+        assert post["content"] == "这是测试文章内容"
+        assert post["excerpt"] is None
@@ -0,0 +1,120 @@
+# 目录快照测试
+from sqlalchemy import insert
+
+from app.lib import snapshot_file
+from app.models.models import Portfolio, Project, SearchChange, Service
+from app.services import catalog_snapshots, site_search
+from conftest import get_auth_header
+
+
+class TestSnapshotFile:
+    """快照文件"""
+
+    def test_write_and_remap(self, tmp_path):
+        path = tmp_path / "test.snap"
+        snapshot_file.write(path, {"version": 1}, {"a": b"[1]", "b": b""})
+        first = snapshot_file.MappedSnapshot(path)
+        assert first.meta == {"version": 1}
+        assert first.read("a") == b"[1]" and first.read("b") == b"" and first.read("c") is None
+
+        # 替换后旧映射仍读取旧内容，文件标识变化
+        snapshot_file.write(path, {"version": 2}, {"a": b"[1,2]"})
+        second = snapshot_file.MappedSnapshot(path)
+        assert first.read("a") == b"[1]"
+        assert second.read("a") == b"[1,2]" and second.identity != first.identity
+
+
+class TestCatalogSnapshots:
+    """项目、作品集、服务列表"""
+
+    def _seed(self, db):
+        db.add_all([
+            Project(name="项目一", slug="p1", description="简介", tech_stack=["Python"], author_id=1,
+                    featured=True, sort_order=2),
+            Project(name="项目二", slug="p2", description="简介", tech_stack=[], author_id=1, sort_order=1),
+            Portfolio(title="作品一", category="design", sort_order=1),
+            Portfolio(title="作品二", category="video", sort_order=0),
+            Service(name="服务一", slug="s1", description="说明", price_type="fixed", active=True, sort_order=0),
+            Service(name="已下线", slug="s2", description="说明", price_type="fixed", active=False, sort_order=1),
+        ])
+        db.commit()
+
+    def test_same_as_database(self, client, db_session):
+        self._seed(db_session)
+        urls = [
+            "/api/projects", "/api/projects?featured=true", "/api/portfolio",
+            "/api/portfolio?category=video", "/api/portfolio?category=3d", "/api/services",
+        ]
+        served = {url: client.get(url, headers={"Accept-Encoding": "identity"}) for url in urls}
+        assert all("etag" in response.headers for response in served.values())
+
+        catalog_snapshots.snapshots.path.unlink()
+        for url in urls:
+            assert served[url].json() == client.get(url).json(), url
+        assert [item["name"] for item in served["/api/projects"].json()] == ["项目二", "项目一"]
+        assert [item["name"] for item in served["/api/services"].json()] == ["服务一"]
+
+    def test_gzip_and_not_modified(self, client, db_session):
+        self._seed(db_session)
+        plain = client.get("/api/portfolio", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        compressed = client.get("/api/portfolio", headers={"Accept-Encoding": "br, gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["vary"] == "Accept-Encoding"
+        assert compressed.json() == plain.json()
+
+        response = client.get("/api/portfolio", headers={"If-None-Match": plain.headers["etag"]})
+        assert response.status_code == 304
+
+    def test_rebuilt_after_changes(self, client, admin_user, db_session):
+        headers = get_auth_header(admin_user["token"])
+        etag = client.get("/api/portfolio").headers["etag"]
+        ids = [
+            client.post("/api/portfolio", json={"title": f"作品 {i}", "category": "design"}, headers=headers).json()["id"]
+            for i in range(3)
+        ]
+        response = client.get("/api/portfolio")
+        assert response.headers["etag"] != etag
+        assert sorted(item["id"] for item in response.json()) == sorted(ids)
+
+        # 批量排序绕过 ORM，同样在提交后重建
+        order = ids[::-1]
+        client.put("/api/portfolio/order", json={"ids": order}, headers=headers)
+        assert [item["id"] for item in client.get("/api/portfolio").json()] == order
+
+    def test_maintain(self, client, db_session):
+        engine = db_session.get_bind()
+        snapshots = catalog_snapshots.snapshots
+        snapshots.rebuild(engine)
+        assert not snapshots.maintain(engine)
+
+        # 其他进程绕过 ORM 写入并记录变更日志：定期检查时发现版本不一致
+        with engine.begin() as conn:
+            conn.execute(insert(Service), [
+                {"name": "新服务", "slug": "new", "description": "说明", "price_type": "fixed", "active": True}
+            ])
+        with db_session.begin():
+            site_search.record(db_session, "service", [1])
+        assert snapshots.maintain(engine)
+        assert [item["name"] for item in client.get("/api/services").json()] == ["新服务"]
+
+        # 站内搜索重建后清理变更日志：之后的写入仍使版本号变化
+        with db_session.begin():
+            db_session.query(SearchChange).delete()
+        with db_session.begin():
+            site_search.record(db_session, "service", [1])
+        assert snapshots.maintain(engine)
+
+    def test_failed_rebuild_falls_back(self, client, db_session, monkeypatch):
+        engine = db_session.get_bind()
+        catalog_snapshots.snapshots.rebuild(engine)
+
+        def broken(db):
+            raise ValueError("数据不合法")
+
+        # 重建失败时删除快照，列表改为查询数据库，而不是继续返回旧数据
+        monkeypatch.setattr(catalog_snapshots, "_BUILDERS", (broken,))
+        db_session.add(Portfolio(title="作品", category="design"))
+        db_session.commit()
+        assert catalog_snapshots.snapshots.get("portfolio") is None
+        assert [item["title"] for item in client.get("/api/portfolio").json()] == ["作品"]
@@ -0,0 +1,73 @@
+# 计数器测试
+from conftest import get_auth_header
+from app.models.models import Counter, Portfolio
+from app.services import counters
+
+
+class TestCounters:
+    """维护计数与校准测试"""
+
+    def test_totals_follow_writes(self, client, admin_user, db_session):
+        """列表 total 来自计数器，并随创建、取消发布、删除同步变化"""
+        headers = get_auth_header(admin_user["token"])
+        for i in range(3):
+            client.post(
+                "/api/blog/posts",
+                json={"title": f"文章 {i}", "slug": f"post-{i}", "content": "内容", "published": True},
+                headers=headers,
+            )
+        client.put("/api/blog/posts/post-0", json={"published": False}, headers=headers)
+        client.delete("/api/blog/posts/post-1", headers=headers)
+
+        assert client.get("/api/blog/posts").json()["total"] == 1
+        assert db_session.get(Counter, counters.PUBLISHED_POSTS).value == 1
+
+    def test_portfolio_category_counts(self, client, admin_user):
+        headers = get_auth_header(admin_user["token"])
+        ids = [
+            client.post("/api/portfolio", json={"title": f"作品 {i}", "category": "design"}, headers=headers).json()["id"]
+            for i in range(2)
+        ]
+        client.put(f"/api/portfolio/{ids[0]}", json={"category": "video"}, headers=headers)
+
+        data = client.get("/api/portfolio/categories").json()
+        assert data["design"] == 1
+        assert data["video"] == 1
+        assert data["other"] == 0
+
+    def test_reconcile_fixes_drift(self, db_session):
+        """直接写库造成的偏差由校准修正"""
+        db_session.add(Portfolio(title="作品", category="3d"))
+        db_session.commit()
+        key = counters.portfolio_category_key("3d")
+        assert counters.get(db_session, key) == 1
+
+        db_session.add(Portfolio(title="作品 2", category="3d"))
+        db_session.commit()
+        assert counters.get(db_session, key) == 1
+
+        assert counters.reconcile(db_session) == 1
+        assert counters.get(db_session, key) == 2
+
+    def test_reconcile_updates_in_one_statement(self, db_session, db_engine):
+        """校准不先读出计数再写回：实际值在 UPDATE 语句内计算，不会覆盖并发提交的增量"""
+        from sqlalchemy import event
+
+        db_session.add_all([Portfolio(title="作品", category="3d"), Counter(key="topics.comments.1", value=3)])
+        db_session.commit()
+        counters.get(db_session, counters.portfolio_category_key("3d"))
+        db_session.query(Counter).update({"value": 99})
+        db_session.commit()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db_engine, "before_cursor_execute", listener)
+        try:
+            assert counters.reconcile(db_session) == 1
+        finally:
+            event.remove(db_engine, "before_cursor_execute", listener)
+        assert not any(statement.startswith("SELECT") and "counters.value" in statement for statement in statements)
+        stored = dict(db_session.query(Counter.key, Counter.value))
+        # 版本号不参与校准，废弃的键被删除
+        assert stored.pop(counters.version_key("portfolio")) == 99
+        assert stored == {counters.portfolio_category_key("3d"): 1, counters.PUBLISHED_POSTS: 0, counters.TOPICS: 0}
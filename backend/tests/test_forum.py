@@ -0,0 +1,510 @@
+# 论坛接口测试（使用 conftest 中的内存数据库夹具）
+from conftest import get_auth_header
+
+
+def create_topic(client, token, **overrides):
+    data = {"title": "测试话题", "content": "这是测试话题内容"}
+    data.update(overrides)
+    response = client.post("/api/forum/topics", json=data, headers=get_auth_header(token))
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestTopicPagination:
+    """话题游标分页测试"""
+
+    def test_cursor_pagination(self, client, normal_user):
+        token = normal_user["token"]
+        ids = [create_topic(client, token, title=f"话题 {i}")["id"] for i in range(3)]
+
+        first = client.get("/api/forum/topics", params={"limit": 2}).json()
+        assert [topic["id"] for topic in first["topics"]] == ids[:0:-1]
+        assert first["total"] == 3
+
+        second = client.get("/api/forum/topics", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+        assert [topic["id"] for topic in second["topics"]] == ids[:1]
+        assert second["next_cursor"] is None
+        # 恰好取完时不返回游标
+        assert client.get("/api/forum/topics", params={"limit": 3}).json()["next_cursor"] is None
+
+
+class TestTopicViews:
+    """话题浏览量缓冲写回测试"""
+
+    def test_views_buffered_then_flushed(self, client, normal_user, db_session):
+        from app.models.models import Topic
+        from app.services import view_buffer
+
+        topic_id = create_topic(client, normal_user["token"])["id"]
+        views = [client.get(f"/api/forum/topics/{topic_id}").json()["views"] for _ in range(3)]
+        assert views == [1, 2, 3]
+        # 尚未写回数据库
+        assert db_session.get(Topic, topic_id).views == 0
+
+        assert view_buffer.flush(db_session) == 3
+        db_session.expire_all()
+        assert db_session.get(Topic, topic_id).views == 3
+        assert client.get(f"/api/forum/topics/{topic_id}").json()["views"] == 4
+
+    def test_flush_adds_to_concurrent_writes(self, client, normal_user, db_session):
+        """写回是增量加法，不覆盖其他 worker 已写回的值"""
+        from app.models.models import Topic
+        from app.services import view_buffer
+
+        topic_id = create_topic(client, normal_user["token"])["id"]
+        client.get(f"/api/forum/topics/{topic_id}")
+        db_session.query(Topic).filter(Topic.id == topic_id).update({"views": 10})
+        db_session.commit()
+
+        view_buffer.flush(db_session)
+        db_session.expire_all()
+        assert db_session.get(Topic, topic_id).views == 11
+
+    def test_flush_when_buffer_full(self, client, normal_user, db_session, monkeypatch):
+        from app.core.config import settings
+        from app.models.models import Topic
+
+        monkeypatch.setattr(settings, "VIEW_BUFFER_MAX_PENDING", 2)
+        topic_id = create_topic(client, normal_user["token"])["id"]
+        client.get(f"/api/forum/topics/{topic_id}")
+        client.get(f"/api/forum/topics/{topic_id}")
+        assert db_session.get(Topic, topic_id).views == 2
+
+
+class TestCommentPagination:
+    """话题评论游标分页测试"""
+
+    def test_cursor_both_orders(self, client, normal_user):
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        ids = [
+            client.post(
+                f"/api/forum/topics/{topic_id}/comments",
+                json={"content": f"评论 {i}"},
+                headers=get_auth_header(token),
+            ).json()["id"]
+            for i in range(4)
+        ]
+
+        for order, expected in (("asc", ids), ("desc", ids[::-1])):
+            seen = []
+            params = {"limit": 2, "order": order}
+            while True:
+                response = client.get(f"/api/forum/topics/{topic_id}/comments", params=params)
+                # 恰好取完时不返回游标，不会多出一个空页
+                assert response.json()
+                seen += [comment["id"] for comment in response.json()]
+                cursor = response.headers.get("x-next-cursor")
+                if not cursor:
+                    break
+                params["cursor"] = cursor
+            assert seen == expected
+
+        topic = client.get(f"/api/forum/topics/{topic_id}").json()
+        assert topic["comment_count"] == 4
+
+
+class TestTopicActivity:
+    """话题活跃度字段与排序测试"""
+
+    def add_comment(self, client, token, topic_id):
+        response = client.post(
+            f"/api/forum/topics/{topic_id}/comments",
+            json={"content": "评论"},
+            headers=get_auth_header(token),
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    def test_sort_modes(self, client, normal_user):
+        token = normal_user["token"]
+        old, new = (create_topic(client, token, title=title)["id"] for title in ("旧话题", "新话题"))
+        for _ in range(3):
+            self.add_comment(client, token, old)
+
+        def ids(sort):
+            return [topic["id"] for topic in client.get("/api/forum/topics", params={"sort": sort}).json()["topics"]]
+
+        assert ids("latest") == [new, old]
+        assert ids("active") == [old, new]
+        assert ids("comments") == [old, new]
+        assert ids("hot") == [old, new]
+
+    def test_sort_cursor(self, client, normal_user):
+        token = normal_user["token"]
+        topic_ids = [create_topic(client, token, title=f"话题 {i}")["id"] for i in range(3)]
+        for i, topic_id in enumerate(topic_ids):
+            for _ in range(i):
+                self.add_comment(client, token, topic_id)
+
+        first = client.get("/api/forum/topics", params={"sort": "comments", "limit": 2}).json()
+        second = client.get(
+            "/api/forum/topics", params={"sort": "comments", "limit": 2, "cursor": first["next_cursor"]}
+        ).json()
+        assert [t["id"] for t in first["topics"] + second["topics"]] == topic_ids[::-1]
+
+    def test_comment_delete_and_recompute(self, client, normal_user, admin_user, db_session):
+        from app.models.models import Topic
+        from app.services import topic_activity
+
+        token = normal_user["token"]
+        topic = create_topic(client, token)
+        first = self.add_comment(client, token, topic["id"])
+        second = self.add_comment(client, token, topic["id"])
+
+        client.delete(f"/api/forum/admin/comments/{second['id']}", headers=get_auth_header(admin_user["token"]))
+        data = client.get(f"/api/forum/topics/{topic['id']}").json()
+        assert data["comment_count"] == 1
+        assert data["last_activity_at"] == first["created_at"]
+        assert data["updated_at"] == topic["updated_at"]
+
+        # 直接写库造成的偏差由后台重算修正
+        db_session.query(Topic).update({"comment_count": 7})
+        db_session.commit()
+        assert topic_activity.recompute(db_session) == 1
+        db_session.expire_all()
+        assert db_session.get(Topic, topic["id"]).comment_count == 1
+
+
+class TestCommentThreads:
+    """楼中楼评论测试"""
+
+    def reply(self, client, token, topic_id, parent_id=None, content="回复"):
+        response = client.post(
+            f"/api/forum/topics/{topic_id}/comments",
+            json={"content": content, "parent_id": parent_id},
+            headers=get_auth_header(token),
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    def test_threads_with_first_replies(self, client, normal_user):
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        root = self.reply(client, token, topic_id, content="一楼")
+        child = self.reply(client, token, topic_id, root["id"])
+        grandchild = self.reply(client, token, topic_id, child["id"])
+        sibling = self.reply(client, token, topic_id, root["id"])
+        other = self.reply(client, token, topic_id, content="二楼")
+        assert grandchild["depth"] == 2
+
+        threads = client.get(f"/api/forum/topics/{topic_id}/threads", params={"replies": 2}).json()
+        assert [thread["id"] for thread in threads] == [root["id"], other["id"]]
+        first = threads[0]
+        assert first["reply_count"] == 3
+        # 深度优先的前两条回复：子回复与其下的回复
+        assert [node["id"] for node in first["replies"]] == [child["id"]]
+        assert [node["id"] for node in first["replies"][0]["replies"]] == [grandchild["id"]]
+
+        subtree = client.get(f"/api/forum/comments/{root['id']}/thread").json()
+        assert [node["id"] for node in subtree["replies"]] == [child["id"], sibling["id"]]
+        shallow = client.get(f"/api/forum/comments/{root['id']}/thread", params={"max_depth": 1}).json()
+        assert shallow["replies"][0]["replies"] == []
+
+    def test_depth_limit(self, client, normal_user):
+        from app.services.comment_threads import MAX_DEPTH
+
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        parent = self.reply(client, token, topic_id)
+        for _ in range(MAX_DEPTH + 2):
+            parent = self.reply(client, token, topic_id, parent["id"])
+        assert parent["depth"] == MAX_DEPTH
+
+    def test_admin_delete_removes_subtree(self, client, normal_user, admin_user):
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        root = self.reply(client, token, topic_id)
+        self.reply(client, token, topic_id, self.reply(client, token, topic_id, root["id"])["id"])
+        self.reply(client, token, topic_id)
+
+        client.delete(f"/api/forum/admin/comments/{root['id']}", headers=get_auth_header(admin_user["token"]))
+        assert client.get(f"/api/forum/topics/{topic_id}").json()["comment_count"] == 1
+        assert len(client.get(f"/api/forum/topics/{topic_id}/comments").json()) == 1
+
+
+class TestCommentEvents:
+    """评论增量轮询与实时推送测试"""
+
+    def post_comment(self, client, token, topic_id, content="评论"):
+        response = client.post(
+            f"/api/forum/topics/{topic_id}/comments", json={"content": content}, headers=get_auth_header(token)
+        )
+        return response.json()
+
+    def test_since_returns_delta(self, client, normal_user):
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        first = self.post_comment(client, token, topic_id)
+        later = [self.post_comment(client, token, topic_id)["id"] for _ in range(2)]
+
+        response = client.get(f"/api/forum/topics/{topic_id}/comments", params={"since": first["id"]})
+        assert [comment["id"] for comment in response.json()] == later
+
+    def test_feed_fans_out_to_subscribers(self, client, normal_user, db_session):
+        """新增评论经 feed 读取后推送给本进程的订阅者，其他话题的订阅者收不到"""
+        import asyncio
+        from app.services.comment_events import CommentBroker, CommentFeed
+
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        other_id = create_topic(client, token, title="其他话题")["id"]
+        broker = CommentBroker()
+        feed = CommentFeed(broker)
+
+        async def scenario():
+            subscription = broker.subscribe(topic_id)
+            other = broker.subscribe(other_id)
+            feed.poll(db_session)  # 记录起点
+            comment = await asyncio.to_thread(self.post_comment, client, token, topic_id)
+            db_session.expire_all()
+            assert feed.poll(db_session) == 1
+            event = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+            assert event["id"] == comment["id"]
+            assert other.queue.empty()
+
+        asyncio.run(scenario())
+
+    def test_feed_publishes_comments_committed_out_of_order(self, client, normal_user, db_session):
+        """较小的 id 在较大的 id 被读到之后才提交，下一次读取时补发"""
+        import asyncio
+        from app.models.models import Comment
+        from app.services.comment_events import CommentBroker, CommentFeed
+
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        first = self.post_comment(client, token, topic_id)
+        broker = CommentBroker()
+        feed = CommentFeed(broker)
+
+        def insert(comment_id):
+            db_session.add(Comment(id=comment_id, content="评论", author_id=first["author_id"], topic_id=topic_id))
+            db_session.commit()
+
+        async def scenario():
+            subscription = broker.subscribe(topic_id)
+            feed.poll(db_session)  # 记录起点
+            insert(first["id"] + 2)
+            assert feed.poll(db_session) == 1
+            insert(first["id"] + 1)
+            assert feed.poll(db_session) == 1
+            assert feed.poll(db_session) == 0
+            return [(await asyncio.wait_for(subscription.queue.get(), timeout=1))["id"] for _ in range(2)]
+
+        assert asyncio.run(scenario()) == [first["id"] + 2, first["id"] + 1]
+
+    def test_backlog_includes_late_comments(self, client, normal_user, db_session):
+        """轮询与断线续传：已取到较大的 id 之后提交的较小 id 也会返回"""
+        from app.models.models import Comment
+        from app.services import comment_events
+        from app.services.comment_events import CommentBroker, CommentFeed
+
+        token = normal_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        first = self.post_comment(client, token, topic_id)
+        feed = CommentFeed(CommentBroker())
+
+        def insert(comment_id):
+            db_session.add(Comment(id=comment_id, content="评论", author_id=first["author_id"], topic_id=topic_id))
+            db_session.commit()
+
+        feed.poll(db_session)
+        insert(first["id"] + 2)
+        feed.poll(db_session)
+        after_id = comment_events.backlog(db_session, topic_id, first["id"], source=feed)[-1].id
+        assert after_id == first["id"] + 2
+        insert(first["id"] + 1)
+        feed.poll(db_session)
+        late = comment_events.backlog(db_session, topic_id, after_id, source=feed)
+        assert [comment.id for comment in late] == [first["id"] + 1]
+
+    def test_stream_replays_then_dedupes_live_events(self):
+        import asyncio
+        from app.services.comment_events import CommentBroker, stream
+
+        broker = CommentBroker()
+
+        async def scenario():
+            subscription = broker.subscribe(1)
+            checks = iter([False, False, False, True])
+
+            async def is_disconnected():
+                return next(checks)
+
+            # 续传的事件与订阅后收到的实时事件重叠
+            broker.publish(1, {"id": 6, "content": "重复"})
+            broker.publish(1, {"id": 7, "content": "新评论"})
+            # 晚提交的评论 id 较小，也要转发
+            broker.publish(1, {"id": 3, "content": "晚提交"})
+            await asyncio.sleep(0)
+            replay = [{"id": 5, "content": "旧评论"}, {"id": 6, "content": "重复"}]
+            chunks = [chunk async for chunk in stream(subscription, replay, 4, is_disconnected, broker)]
+            return chunks
+
+        chunks = asyncio.run(scenario())
+        assert [chunk.split("\n")[0] for chunk in chunks] == ["id: 5", "id: 6", "id: 7", "id: 3"]
+        assert not broker._subscribers
+
+    def test_stream_dedupe_window_is_bounded(self, monkeypatch):
+        """去重只覆盖已发送的最大 id 以下 MAX_GAPS 的窗口，更早的事件不再转发"""
+        import asyncio
+        from app.services import comment_events
+        from app.services.comment_events import CommentBroker, stream
+
+        monkeypatch.setattr(comment_events, "MAX_GAPS", 3)
+        broker = CommentBroker()
+
+        async def scenario():
+            subscription = broker.subscribe(1)
+            checks = iter([False] * 4 + [True])
+
+            async def is_disconnected():
+                return next(checks)
+
+            for event_id in (10, 9, 6, 7):
+                broker.publish(1, {"id": event_id, "content": "评论"})
+            await asyncio.sleep(0)
+            replay = [{"id": 8, "content": "评论"}]
+            return [chunk async for chunk in stream(subscription, replay, 5, is_disconnected, broker)]
+
+        chunks = asyncio.run(scenario())
+        # 8 之后窗口为 (5, 8]，10 之后为 (7, 10]：9 转发，6、7 已在窗口之外
+        assert [chunk.split("\n")[0] for chunk in chunks] == ["id: 8", "id: 10", "id: 9"]
+
+
+class TestBulkModeration:
+    """管理端批量删除测试"""
+
+    def reply(self, client, token, topic_id, parent_id=None, content="回复"):
+        response = client.post(
+            f"/api/forum/topics/{topic_id}/comments",
+            json={"content": content, "parent_id": parent_id},
+            headers=get_auth_header(token),
+        )
+        return response.json()
+
+    def test_bulk_delete_topics_cascades_comments(self, client, normal_user, admin_user, db_session):
+        from app.models.models import Comment
+        from app.services import moderation
+
+        token = normal_user["token"]
+        spam = [create_topic(client, token, title=f"广告 {i}")["id"] for i in range(3)]
+        keep = create_topic(client, token, title="正常话题")["id"]
+        for topic_id in spam + [keep]:
+            self.reply(client, token, topic_id)
+        headers = get_auth_header(admin_user["token"])
+
+        preview = client.post(
+            "/api/forum/admin/topics/bulk-delete", json={"search": "广告", "dry_run": True}, headers=headers
+        ).json()
+        assert preview == {"matched": 3, "topics_deleted": 3, "comments_deleted": 3, "dry_run": True}
+        assert client.get("/api/forum/topics").json()["total"] == 4
+
+        # 小批量以覆盖分批事务
+        from app.schemas.topic import BulkDeleteRequest
+        result = moderation.delete_topics(db_session, BulkDeleteRequest(search="广告"), chunk_size=2)
+        assert result == {"matched": 3, "topics_deleted": 3, "comments_deleted": 3, "dry_run": False}
+        topics = client.get("/api/forum/topics").json()
+        assert [topic["id"] for topic in topics["topics"]] == [keep]
+        assert topics["total"] == 1
+        assert db_session.query(Comment).count() == 1
+
+    def test_bulk_delete_comments_with_replies(self, client, normal_user, admin_user):
+        token = normal_user["token"]
+        other_token = admin_user["token"]
+        topic_id = create_topic(client, token)["id"]
+        spam = self.reply(client, other_token, topic_id, content="广告")
+        self.reply(client, token, topic_id, spam["id"])
+        # 祖先已匹配的回复只计入一次
+        self.reply(client, other_token, topic_id, spam["id"], content="广告")
+        kept = self.reply(client, token, topic_id, content="正常评论")
+        headers = get_auth_header(admin_user["token"])
+
+        author_id = client.get("/api/auth/me", headers=headers).json()["id"]
+        criteria = {"author_id": author_id, "search": "广告"}
+        preview = client.post(
+            "/api/forum/admin/comments/bulk-delete", json={**criteria, "dry_run": True}, headers=headers
+        ).json()
+        assert preview == {"matched": 2, "topics_deleted": 0, "comments_deleted": 3, "dry_run": True}
+
+        result = client.post("/api/forum/admin/comments/bulk-delete", json=criteria, headers=headers).json()
+        assert result["comments_deleted"] == 3
+        comments = client.get(f"/api/forum/topics/{topic_id}/comments").json()
+        assert [comment["id"] for comment in comments] == [kept["id"]]
+        assert client.get(f"/api/forum/topics/{topic_id}").json()["comment_count"] == 1
+
+    def test_bulk_delete_comments_preview_matches_result(self, client, normal_user, admin_user, db_session):
+        from app.schemas.topic import BulkDeleteRequest
+        from app.services import moderation
+
+        token = admin_user["token"]
+        topic_id = create_topic(client, normal_user["token"])["id"]
+        spam = self.reply(client, token, topic_id, content="广告")
+        self.reply(client, token, topic_id, spam["id"], content="广告")
+        self.reply(client, token, topic_id, content="广告")
+
+        # 每批一条：匹配的回复在实际执行时已随前一批的祖先删除
+        criteria = {"search": "广告"}
+        preview = moderation.delete_comments(db_session, BulkDeleteRequest(**criteria, dry_run=True), chunk_size=1)
+        result = moderation.delete_comments(db_session, BulkDeleteRequest(**criteria), chunk_size=1)
+        assert preview == {**result, "dry_run": True}
+        assert (result["matched"], result["comments_deleted"]) == (3, 3)
+
+
+class TestAdminListing:
+    """管理端列表分页与流式导出测试"""
+
+    def test_cursor_and_streaming(self, client, normal_user, admin_user):
+        import json
+
+        ids = [create_topic(client, normal_user["token"], title=f"话题 {i}")["id"] for i in range(5)]
+        expected = ids[::-1]
+        headers = get_auth_header(admin_user["token"])
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/forum/admin/topics", params=params, headers=headers)
+            seen += [topic["id"] for topic in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == expected
+
+        # 不分页时流式返回完整 JSON 数组
+        full = client.get("/api/forum/admin/topics", headers=headers)
+        assert [topic["id"] for topic in full.json()] == expected
+
+        export = client.get("/api/forum/admin/topics", params={"format": "ndjson"}, headers=headers)
+        assert export.headers["content-type"].startswith("application/x-ndjson")
+        lines = export.text.splitlines()
+        assert [json.loads(line)["id"] for line in lines] == expected
+        assert json.loads(lines[0])["title"] == "话题 4"
+
+        # 导出时 limit 同样生效，按 X-Next-Cursor 续导
+        exported, params = [], {"format": "ndjson", "limit": 2}
+        while True:
+            export = client.get("/api/forum/admin/topics", params=params, headers=headers)
+            lines = export.text.splitlines()
+            assert len(lines) <= 2
+            exported += [json.loads(line)["id"] for line in lines]
+            if "X-Next-Cursor" not in export.headers:
+                break
+            params["cursor"] = export.headers["X-Next-Cursor"]
+        assert exported == expected
+
+    def test_streaming_spans_batches(self, client, normal_user, db_session):
+        import json
+        from app.lib.listing import _serialize
+        from app.models.models import Topic
+        from app.schemas.topic import TopicResponse
+
+        for i in range(7):
+            create_topic(client, normal_user["token"], title=f"话题 {i}")
+        chunks = list(_serialize(
+            db_session.get_bind(), lambda session: session.query(Topic).order_by(Topic.id),
+            TopicResponse, ndjson=False, batch_size=3,
+        ))
+        # 每批写出一次
+        assert len(chunks) == 3
+        assert [topic["title"] for topic in json.loads("".join(chunks))] == [f"话题 {i}" for i in range(7)]
@@ -0,0 +1,62 @@
+# 首页聚合接口测试
+from app.models.models import Portfolio, Post, Project, SearchChange, Service
+from app.services import counters, homepage
+
+
+def add_samples(db):
+    db.add_all([
+        Project(name="精选项目", slug="featured", description="简介", tech_stack=[], featured=True, author_id=1),
+        Project(name="普通项目", slug="plain", description="简介", tech_stack=[], author_id=1),
+        Post(title="已发布", slug="published", content="正文", excerpt="摘要", published=True),
+        Post(title="草稿", slug="draft", content="正文", published=False),
+        Portfolio(title="海报", category="design", description=""),
+        Service(name="网站开发", slug="web", description="简介", price_type="fixed", features=[], active=True),
+        Service(name="已下架", slug="old", description="简介", price_type="fixed", features=[], active=False),
+    ])
+    db.commit()
+
+
+class TestHome:
+    """首页聚合数据"""
+
+    def test_sections(self, client, db_session):
+        add_samples(db_session)
+        response = client.get("/api/home")
+        assert response.status_code == 200
+        data = response.json()
+        assert [project["slug"] for project in data["featured_projects"]] == ["featured"]
+        assert [(post["slug"], post["excerpt"]) for post in data["latest_posts"]] == [("published", "摘要")]
+        assert "content" not in data["latest_posts"][0]
+        assert [item["title"] for item in data["portfolio"]] == ["海报"]
+        assert [service["slug"] for service in data["services"]] == ["web"]
+
+    def test_cache_invalidated_by_writes(self, client, db_session, monkeypatch):
+        add_samples(db_session)
+        first = client.get("/api/home")
+        etag = first.headers["etag"]
+        assert client.get("/api/home", headers={"If-None-Match": etag}).status_code == 304
+
+        # 版本不变时不重新查询
+        calls = []
+        original = homepage.build
+        monkeypatch.setattr(homepage, "build", lambda bind: calls.append(bind) or original(bind))
+        assert client.get("/api/home").content == first.content
+        assert calls == []
+
+        db_session.query(Post).filter(Post.slug == "draft").one().published = True
+        db_session.commit()
+        response = client.get("/api/home", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and len(calls) == 1
+        assert [post["slug"] for post in response.json()["latest_posts"]] == ["draft", "published"]
+        assert response.headers["etag"] != etag
+
+    def test_version_monotonic_after_change_log_cleanup(self, client, db_session):
+        add_samples(db_session)
+        before = homepage.version(db_session)
+        # 站内搜索重建索引后清理变更日志；计数校准不影响版本号
+        db_session.query(SearchChange).delete()
+        db_session.commit()
+        db_session.query(Post).filter(Post.slug == "draft").one().title = "改名"
+        db_session.commit()
+        counters.reconcile(db_session)
+        assert homepage.version(db_session) > before
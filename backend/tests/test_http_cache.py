@@ -0,0 +1,56 @@
+# 条件请求（ETag / Last-Modified）测试
+from conftest import get_auth_header
+from tests.test_blog import create_post
+
+
+class TestConditionalGet:
+    """详情接口的 304 响应"""
+
+    def test_post_etag_roundtrip(self, client, admin_user):
+        create_post(client, admin_user["token"])
+        response = client.get("/api/blog/posts/test-post")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+
+        response = client.get("/api/blog/posts/test-post", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        # nginx gzip 后客户端带回的是弱 ETag
+        response = client.get("/api/blog/posts/test-post", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == 304
+
+    def test_post_update_changes_etag(self, client, admin_user):
+        create_post(client, admin_user["token"])
+        etag = client.get("/api/blog/posts/test-post").headers["etag"]
+        client.put(
+            "/api/blog/posts/test-post",
+            json={"content": "新内容"},
+            headers=get_auth_header(admin_user["token"]),
+        )
+        response = client.get("/api/blog/posts/test-post", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_if_modified_since(self, client, admin_user):
+        create_post(client, admin_user["token"])
+        last_modified = client.get("/api/blog/posts/test-post").headers["last-modified"]
+        response = client.get("/api/blog/posts/test-post", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+        response = client.get(
+            "/api/blog/posts/test-post", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}
+        )
+        assert response.status_code == 200
+
+    def test_portfolio_content_etag(self, client, admin_user):
+        """没有 updated_at 的数据按内容生成 ETag"""
+        headers = get_auth_header(admin_user["token"])
+        item_id = client.post("/api/portfolio", json={"title": "作品", "category": "design"}, headers=headers).json()["id"]
+        etag = client.get(f"/api/portfolio/{item_id}").headers["etag"]
+        assert client.get(f"/api/portfolio/{item_id}", headers={"If-None-Match": etag}).status_code == 304
+
+        client.put(f"/api/portfolio/{item_id}", json={"title": "新标题"}, headers=headers)
+        response = client.get(f"/api/portfolio/{item_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["title"] == "新标题"
@@ -0,0 +1,159 @@
+# 图片派生版本测试
+import os
+
+import pytest
+from PIL import Image
+
+from app.lib import images
+from app.models.models import Portfolio
+from app.services import image_variants
+
+
+def save_image(path, size=(1000, 600), color=(200, 80, 40)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, color).save(path, format="JPEG")
+
+
+@pytest.fixture
+def derivatives(tmp_path, monkeypatch):
+    instance = image_variants.ImageVariants(str(tmp_path / "media"), "/media/", [320, 640], ["avif", "webp"], 1)
+    monkeypatch.setattr(image_variants, "derivatives", instance)
+    yield instance
+    instance.shutdown()
+
+
+class TestGenerate:
+    """派生文件生成（进程池中执行的任务）"""
+
+    def test_widths_formats_and_placeholder(self, tmp_path):
+        source = tmp_path / "cover.jpg"
+        save_image(source)
+        digest, manifest = images.generate(str(source), str(tmp_path / "cache"), [320, 640, 2000], ["avif", "webp"])
+        assert (manifest["width"], manifest["height"]) == (1000, 600)
+        # 超过原图宽度的目标宽度跳过
+        assert [width for width, _ in manifest["files"]["webp"]] == [320, 640]
+        for fmt in ("avif", "webp"):
+            for width, relative in manifest["files"][fmt]:
+                with Image.open(tmp_path / "cache" / relative) as image:
+                    assert image.format == fmt.upper() and image.width == width
+        assert manifest["placeholder"].startswith("data:image/webp;base64,")
+        assert len(manifest["placeholder"]) < 400
+        assert manifest["files"]["webp"][0][1].startswith(f"{digest[:2]}/{digest}/")
+
+    def test_each_derivative_generated_once(self, tmp_path):
+        source = tmp_path / "cover.jpg"
+        save_image(source)
+        cache = tmp_path / "cache"
+        digest, manifest = images.generate(str(source), str(cache), [320], ["webp"])
+        path = cache / manifest["files"]["webp"][0][1]
+        mtime = path.stat().st_mtime_ns
+
+        # 相同内容（包括换了路径的副本）直接复用
+        copy = tmp_path / "copy.jpg"
+        copy.write_bytes(source.read_bytes())
+        assert images.generate(str(copy), str(cache), [320], ["webp"]) == (digest, manifest)
+        # 增加宽度与格式时只补充缺少的文件
+        _, extended = images.generate(str(source), str(cache), [320, 640], ["webp", "avif"])
+        assert [width for width, _ in extended["files"]["avif"]] == [320, 640]
+        assert path.stat().st_mtime_ns == mtime
+        assert len(list((cache / digest[:2] / digest).glob("*.webp"))) == 2
+
+    def test_small_image_keeps_original_width(self, tmp_path):
+        source = tmp_path / "icon.png"
+        Image.new("RGBA", (100, 80), (0, 0, 0, 0)).save(source)
+        _, manifest = images.generate(str(source), str(tmp_path / "cache"), [320, 640], ["webp"])
+        assert [width for width, _ in manifest["files"]["webp"]] == [100]
+        with Image.open(tmp_path / "cache" / manifest["files"]["webp"][0][1]) as image:
+            assert image.mode == "RGBA"
+
+
+class TestImageVariants:
+    """请求路径：已生成的返回 srcset，未生成的提交到进程池"""
+
+    def test_scheduled_then_ready(self, derivatives, tmp_path):
+        save_image(tmp_path / "media" / "uploads" / "a.jpg")
+        assert derivatives.variants("/media/uploads/a.jpg") is None
+        assert derivatives.wait(timeout=60)
+        result = derivatives.variants("/media/uploads/a.jpg")
+        assert [source["type"] for source in result["sources"]] == ["image/avif", "image/webp"]
+        srcset = result["sources"][1]["srcset"].split(", ")
+        assert srcset[0].startswith("/media/derived/") and srcset[0].endswith(".webp 320w")
+        assert srcset[1].endswith(".webp 640w")
+
+        # 其他 worker（新实例）读取记录即可使用，不再提交生成
+        other = image_variants.ImageVariants(str(tmp_path / "media"), "/media/", [320, 640], ["avif", "webp"], 1)
+        assert other.variants("/media/uploads/a.jpg") == result
+        assert other.pending() == 0
+
+    def test_replaced_original_regenerated(self, derivatives, tmp_path):
+        path = tmp_path / "media" / "a.jpg"
+        save_image(path)
+        derivatives.variants("/media/a.jpg")
+        derivatives.wait(timeout=60)
+        first = derivatives.variants("/media/a.jpg")
+
+        save_image(path, size=(800, 800))
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+        assert derivatives.variants("/media/a.jpg") is None
+        derivatives.wait(timeout=60)
+        second = derivatives.variants("/media/a.jpg")
+        assert second["height"] == 800 and second != first
+
+    def test_non_local_urls_ignored(self, derivatives, tmp_path):
+        save_image(tmp_path / "outside.jpg")
+        for url in (None, "", "https://example.com/a.jpg", "/media/../outside.jpg", "/media/missing.jpg",
+                    "/media/derived/ab/x.webp"):
+            assert derivatives.variants(url) is None
+        assert derivatives.pending() == 0
+
+    def test_broken_original_not_retried(self, derivatives, tmp_path):
+        path = tmp_path / "media" / "broken.jpg"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"not an image")
+        assert derivatives.variants("/media/broken.jpg") is None
+        derivatives.wait(timeout=60)
+        assert derivatives.variants("/media/broken.jpg") is None
+        assert derivatives.pending() == 0
+
+
+class TestApiVariants:
+    """响应中的派生版本"""
+
+    def test_portfolio_detail(self, client, db_session, derivatives, tmp_path):
+        save_image(tmp_path / "media" / "poster.jpg")
+        item = Portfolio(title="海报", category="design", description="", image_url="/media/poster.jpg")
+        db_session.add(item)
+        db_session.commit()
+
+        first = client.get(f"/api/portfolio/{item.id}")
+        assert first.status_code == 200 and first.json()["image_variants"] is None
+        derivatives.wait(timeout=60)
+        second = client.get(f"/api/portfolio/{item.id}", headers={"If-None-Match": first.headers["etag"]})
+        # 生成完成后 ETag 变化，客户端能拿到新的响应
+        assert second.status_code == 200
+        assert second.json()["image_variants"]["width"] == 1000
+
+    def test_home_refreshed_after_generation(self, client, db_session, derivatives, tmp_path):
+        save_image(tmp_path / "media" / "poster.jpg")
+        db_session.add(Portfolio(title="海报", category="design", description="", image_url="/media/poster.jpg"))
+        db_session.commit()
+
+        assert client.get("/api/home").json()["portfolio"][0]["image_variants"] is None
+        derivatives.wait(timeout=60)
+        assert client.get("/api/home").json()["portfolio"][0]["image_variants"]["placeholder"]
+
+    def test_schema_serialization_has_no_side_effects(self, db_session, derivatives, monkeypatch, tmp_path):
+        from app.schemas.portfolio import PortfolioResponse
+
+        save_image(tmp_path / "media" / "poster.jpg")
+        item = Portfolio(title="海报", category="design", description="", image_url="/media/poster.jpg")
+        db_session.add(item)
+        db_session.commit()
+
+        # 响应模型只承载数据，派生版本由路由填入
+        looked_up = []
+        monkeypatch.setattr(derivatives, "variants", lambda url: looked_up.append(url))
+        assert PortfolioResponse.model_validate(item).model_dump()["image_variants"] is None
+        assert looked_up == []
+        image_variants.to_response(PortfolioResponse, item)
+        assert looked_up == ["/media/poster.jpg"]
@@ -0,0 +1,71 @@
+# 询价收件箱测试
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models.models import Inquiry, Service
+from conftest import get_auth_header
+
+START = datetime(2026, 1, 1)
+
+
+def seed(db):
+    service = Service(name="网站开发", slug="web", description="简介", price_type="fixed", features=[], active=True)
+    db.add(service)
+    db.flush()
+    statuses = ["pending", "contacted", "completed", "completed"]
+    db.add_all([
+        Inquiry(client_name=f"客户{i}", client_email=f"c{i}@example.com", project_type="网站开发", description="需求",
+                service_id=service.id if i % 2 else None, status=statuses[i % 4], created_at=START + timedelta(days=i))
+        for i in range(12)
+    ])
+    db.commit()
+    return service
+
+
+class TestInquiryInbox:
+    """询价筛选、分页与状态计数"""
+
+    def test_filters_and_cursor(self, client, db_session, admin_user):
+        service = seed(db_session)
+        headers = get_auth_header(admin_user["token"])
+
+        names = []
+        params = {"status": "completed", "limit": 2}
+        while True:
+            response = client.get("/api/services/inquiries", params=params, headers=headers)
+            names += [item["client_name"] for item in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+        assert names == ["客户11", "客户10", "客户7", "客户6", "客户3", "客户2"]
+
+        response = client.get("/api/services/inquiries", headers=headers, params={
+            "service_id": service.id, "created_from": "2026-01-04T00:00:00", "created_to": "2026-01-08T00:00:00Z",
+        })
+        # created_to 不含
+        assert [item["client_name"] for item in response.json()] == ["客户5", "客户3"]
+        assert response.json()[0]["service"]["slug"] == "web"
+
+    def test_status_counts_single_query(self, client, db_session, db_engine, admin_user):
+        service = seed(db_session)
+        headers = get_auth_header(admin_user["token"])
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db_engine, "before_cursor_execute", listener)
+        try:
+            response = client.get("/api/services/inquiries/stats", headers=headers)
+        finally:
+            event.remove(db_engine, "before_cursor_execute", listener)
+        assert sum("GROUP BY" in statement for statement in statements) == 1
+        assert response.json() == {
+            "total": 12,
+            "by_status": {"pending": 3, "contacted": 3, "in_progress": 0, "completed": 6, "cancelled": 0},
+        }
+
+        response = client.get("/api/services/inquiries/stats", headers=headers,
+                              params={"service_id": service.id, "created_from": "2026-01-06T00:00:00"})
+        assert response.json()["by_status"] == {
+            "pending": 0, "contacted": 2, "in_progress": 0, "completed": 2, "cancelled": 0,
+        }
@@ -0,0 +1,136 @@
+# 表单提交队列测试
+import time
+
+from app.core.config import settings
+from app.lib.durable_queue import DurableQueue
+from app.models.models import Inquiry
+from app.services import intake
+from app.services.intake import MAX_RETRY_DELAY
+from conftest import get_auth_header
+
+INQUIRY = {"client_name": "客户", "client_email": "client@example.com", "project_type": "网站开发", "description": "官网"}
+
+
+class TestDurableQueue:
+    """持久化队列"""
+
+    def test_put_take_ack_retry(self, tmp_path):
+        queue = DurableQueue(str(tmp_path / "queue.db"))
+        assert queue.put("a", "inquiry", {"n": 1}, now=100)
+        assert not queue.put("a", "inquiry", {"n": 2}, now=101)
+        queue.put("b", "inquiry", {"n": 3}, now=102)
+        queue.close()
+
+        # 重新打开后消息仍在
+        queue = DurableQueue(str(tmp_path / "queue.db"))
+        first, second = queue.take(10, now=200)
+        assert (first.key, first.payload, second.key) == ("a", {"n": 1}, "b")
+        queue.retry(first.id, 60, now=200)
+        queue.ack([second.id])
+        assert queue.take(10, now=200) == []
+        assert queue.stats(now=200) == {"depth": 1, "oldest_age": 100.0, "retrying": 1}
+        assert [message.attempts for message in queue.take(10, now=260)] == [1]
+
+
+class TestIntake:
+    """询价与联系表单"""
+
+    def test_queued_then_drained(self, client, db_session):
+        response = client.post("/api/services/inquiries", json=INQUIRY)
+        assert response.status_code == 202
+        client.post("/api/contact", json={
+            "name": "联系人", "email": "contact@example.com", "subject": "合作咨询", "message": "想了解一下合作方式。",
+        })
+        assert db_session.query(Inquiry).count() == 0
+        assert intake.stats()["depth"] == 2
+
+        assert intake.drain(db_session) == 2
+        inquiry, contact = db_session.query(Inquiry).order_by(Inquiry.id).all()
+        assert inquiry.client_name == "客户" and inquiry.status == "pending"
+        assert inquiry.intake_key == f"inquiry:{response.json()['key']}"
+        assert contact.project_type == intake.CONTACT_PROJECT_TYPE and "合作" in contact.description
+        assert intake.stats()["depth"] == 0
+
+    def test_idempotent_redelivery(self, client, db_session):
+        headers = {"Idempotency-Key": "retry-1"}
+        for _ in range(2):
+            assert client.post("/api/services/inquiries", json=INQUIRY, headers=headers).json()["key"] == "retry-1"
+        # 写入提交后、从队列删除前崩溃：同一批再次写入
+        intake._insert(db_session, intake.queue.take(10))
+        assert intake.drain(db_session) == 0
+        # 客户端在写入数据库之后重试
+        client.post("/api/services/inquiries", json=INQUIRY, headers=headers)
+        intake.drain(db_session)
+        assert db_session.query(Inquiry).count() == 1
+
+    def test_failed_submission_retried(self, client, db_session):
+        intake.submit("inquiry", {**INQUIRY, "client_name": {"无法写入": 1}}, "broken")
+        intake.submit("inquiry", INQUIRY, "good")
+        # 批量写入失败后逐条写入，失败的推迟重试，不影响其他提交
+        assert intake.drain(db_session) == 1
+        assert db_session.query(Inquiry.intake_key).all() == [("inquiry:good",)]
+        stats = intake.stats()
+        assert (stats["depth"], stats["retrying"]) == (1, 1)
+
+    def test_database_errors(self, client, db_session, monkeypatch):
+        import sqlite3
+        from sqlalchemy.exc import OperationalError
+
+        def failing(message):
+            def insert(db, messages):
+                raise OperationalError("INSERT INTO inquiries ...", {}, sqlite3.OperationalError(message))
+            return insert
+
+        intake.submit("inquiry", INQUIRY, "first")
+        # 数据库被锁：整批留在队列中，不计为重试
+        monkeypatch.setattr(intake, "_insert", failing("database is locked"))
+        assert intake.drain(db_session) == 0
+        assert (intake.stats()["depth"], intake.stats()["retrying"]) == (1, 0)
+        # 表结构错误（未执行迁移）不是暂时性的：逐条退避重试，在监控中可见
+        monkeypatch.setattr(intake, "_insert", failing("no such column: inquiries.intake_key"))
+        assert intake.drain(db_session) == 0
+        assert (intake.stats()["depth"], intake.stats()["retrying"]) == (1, 1)
+
+    def test_single_consumer(self, client, db_session):
+        intake.submit("inquiry", INQUIRY)
+        with intake._consumer_lock(intake.queue) as acquired:
+            assert acquired
+            assert intake.drain(db_session) == 0
+        assert intake.drain(db_session) == 1
+
+    def test_contact_notification_sent_outside_drain(self, client, db_session, monkeypatch):
+        sent = []
+        monkeypatch.setattr(intake, "_notify_contact", sent.append)
+        contact = {"name": "联系人", "email": "contact@example.com", "subject": "合作咨询", "message": "想了解一下合作方式。"}
+        intake.submit("contact", contact)
+
+        # 未配置 SMTP 时不发送
+        monkeypatch.setattr(settings, "SMTP_HOST", "")
+        intake.drain(db_session)
+        assert intake.notifications.stats()["depth"] == 0
+
+        # 配置后写入数据库时只放入通知队列，由 send_notifications 单独发送
+        monkeypatch.setattr(settings, "SMTP_HOST", "smtp.example.com")
+        intake.submit("contact", contact)
+        assert intake.drain(db_session) == 1
+        assert sent == [] and intake.notifications.stats()["depth"] == 1
+
+        def unavailable(payload):
+            raise OSError("timed out")
+
+        monkeypatch.setattr(intake, "_notify_contact", unavailable)
+        assert intake.send_notifications() == 0
+        assert intake.notifications.stats()["retrying"] == 1
+
+        monkeypatch.setattr(intake, "_notify_contact", sent.append)
+        # 跳过退避等待
+        (message,) = intake.notifications.take(1, now=time.time() + MAX_RETRY_DELAY)
+        intake.notifications.retry(message.id, 0)
+        assert intake.send_notifications() == 1
+        assert sent == [contact] and intake.notifications.stats()["depth"] == 0
+
+    def test_queue_stats(self, client, admin_user):
+        intake.submit("inquiry", INQUIRY)
+        response = client.get("/api/services/inquiries/queue", headers=get_auth_header(admin_user["token"]))
+        assert response.json()["depth"] == 1
+        assert client.get("/health/detailed").json()["intake_queue"]["depth"] == 1
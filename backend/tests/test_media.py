@@ -0,0 +1,125 @@
+# 媒体上传测试
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services import image_variants, media_uploads
+from conftest import get_auth_header
+
+BOUNDARY = "testboundary"
+
+
+def png_bytes(size=(40, 30), color=(10, 120, 200)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def multipart_body(data: bytes, filename="a.png", content_type="image/png", name="file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="note"\r\n\r\n说明\r\n'
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def chunked(body: bytes, size: int, stop_after: int | None = None):
+    """按 size 分块产出请求体；读取超过 stop_after 块时报错（验证提前中止）"""
+    for count, start in enumerate(range(0, len(body), size)):
+        if stop_after is not None and count >= stop_after:
+            raise AssertionError("超限后仍在读取请求体")
+        yield body[start:start + size]
+
+
+def receive(body: bytes, size=7, stop_after=None, content_length=None):
+    return asyncio.run(media_uploads.receive(
+        chunked(body, size, stop_after), f"multipart/form-data; boundary={BOUNDARY}", content_length
+    ))
+
+
+@pytest.fixture
+def media_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ROOT", str(tmp_path / "media"))
+    return tmp_path / "media"
+
+
+class TestReceive:
+    """流式解析与保存"""
+
+    def test_store_and_deduplicate(self, media_root):
+        data = png_bytes()
+        first = receive(multipart_body(data))
+        assert first["url"] == f"/media/uploads/{first['sha256'][:2]}/{first['sha256']}.png"
+        assert (first["size"], first["width"], first["height"]) == (len(data), 40, 30)
+        assert first["content_type"] == "image/png" and not first["deduplicated"]
+        assert (media_root / first["url"][len("/media/"):]).read_bytes() == data
+
+        # 相同内容（文件名、声明类型不同）只保存一份
+        second = receive(multipart_body(data, filename="b.bin", content_type="application/octet-stream"), size=4096)
+        assert second["url"] == first["url"] and second["deduplicated"]
+        assert len(list((media_root / "uploads").rglob("*.png"))) == 1
+        assert list((media_root / "uploads" / ".tmp").iterdir()) == []
+
+    def test_extension_from_content_not_filename(self, media_root):
+        buffer = io.BytesIO()
+        Image.new("RGB", (8, 8)).save(buffer, format="JPEG")
+        stored = receive(multipart_body(buffer.getvalue(), filename="a.png", content_type="image/png"))
+        assert stored["content_type"] == "image/jpeg" and stored["url"].endswith(".jpg")
+
+    def test_reject_non_image_early(self, media_root):
+        body = multipart_body(b"<svg onload=alert(1)>" + b"x" * 100_000, content_type="image/png")
+        with pytest.raises(media_uploads.UploadRejected) as exc:
+            receive(body, size=1024, stop_after=3)
+        assert exc.value.status_code == 415
+        assert list((media_root / "uploads" / ".tmp").iterdir()) == []
+
+    def test_reject_declared_type(self, media_root):
+        with pytest.raises(media_uploads.UploadRejected) as exc:
+            receive(multipart_body(png_bytes(), content_type="image/svg+xml"))
+        assert exc.value.status_code == 415
+
+    def test_reject_oversized(self, media_root, monkeypatch):
+        monkeypatch.setattr(settings, "MEDIA_UPLOAD_MAX_BYTES", 10_000)
+        body = multipart_body(png_bytes() + b"\0" * 200_000)
+        # 声明的长度超限：不读取请求体
+        with pytest.raises(media_uploads.UploadRejected) as exc:
+            receive(body, stop_after=0, content_length=str(len(body)))
+        assert exc.value.status_code == 413
+        # 未声明长度：写入超过上限时中止
+        with pytest.raises(media_uploads.UploadRejected) as exc:
+            receive(body, size=1024, stop_after=20)
+        assert exc.value.status_code == 413
+        assert list((media_root / "uploads" / ".tmp").iterdir()) == []
+
+    def test_missing_file_field(self, media_root):
+        with pytest.raises(media_uploads.UploadRejected) as exc:
+            receive(multipart_body(png_bytes(), name="image"))
+        assert exc.value.status_code == 400
+
+
+class TestUploadApi:
+    """上传接口"""
+
+    def test_admin_upload(self, client, admin_user, media_root, monkeypatch):
+        derivatives = image_variants.ImageVariants(str(media_root), "/media/", [16], ["webp"], 1)
+        monkeypatch.setattr(image_variants, "derivatives", derivatives)
+        try:
+            data = png_bytes()
+            response = client.post(
+                "/api/media",
+                files={"file": ("cover.png", data, "image/png")},
+                headers=get_auth_header(admin_user["token"]),
+            )
+            assert response.status_code == 201
+            url = response.json()["url"]
+            assert (media_root / url[len("/media/"):]).read_bytes() == data
+            # 上传后即在后台生成派生版本
+            assert derivatives.wait(timeout=60)
+            assert derivatives.variants(url)["width"] == 40
+        finally:
+            derivatives.shutdown()
@@ -0,0 +1,86 @@
+# 近似重复检测测试
+from conftest import get_auth_header
+
+from app.lib import minhash
+
+SPAM = "今天给大家推荐一款超级好用的理财产品，年化收益高达百分之二十，加微信了解详情，名额有限先到先得"
+SPAM_VARIANT = "今天给大家推荐一款超级好用的理财产品，年化收益高达百分之二十五，加微信了解详情，名额有限先到先得！"
+ARTICLE = "这篇文章介绍如何在 FastAPI 中使用依赖注入管理数据库会话，以及如何为路由编写测试"
+
+
+def texts(count):
+    return [f"第 {i} 条测试内容：编号 {i * 7919} 的随机文本，用于填充索引 {i % 97} 号分组" for i in range(count)]
+
+
+class TestMinHash:
+    """MinHash 签名与 LSH 索引测试"""
+
+    def test_similarity_estimate(self):
+        spam, variant, article = (minhash.signature(text) for text in (SPAM, SPAM_VARIANT, ARTICLE))
+        assert minhash.estimate_similarity(spam.bits, variant.bits) > 0.7
+        assert minhash.estimate_similarity(spam.bits, article.bits) < 0.2
+        # 英文按单词切分
+        english = minhash.signature("Buy cheap watches online today with free shipping and a full refund guarantee")
+        english_variant = minhash.signature("Buy cheap watches online today with free shipping and full refund guarantee!!")
+        assert minhash.estimate_similarity(english.bits, english_variant.bits) > 0.7
+        assert minhash.signature("谢谢分享") is None
+
+    def test_index_query_merge_and_eviction(self, monkeypatch):
+        monkeypatch.setattr(minhash, "MERGE_BATCH", 256)
+        index = minhash.MinHashIndex(capacity=1500)
+        index.add(minhash.signature(SPAM), 1)
+        # 多次归并，并覆盖最早的条目
+        for ref, text in enumerate(texts(1600), start=2):
+            index.add(minhash.signature(text), ref)
+        assert len(index) == 1500
+        assert index.query(minhash.signature(SPAM_VARIANT), 0.7) is None
+
+        index.add(minhash.signature(SPAM), 9999)
+        match = index.query(minhash.signature(SPAM_VARIANT), 0.7)
+        assert match.ref == 9999
+        assert index.query(minhash.signature(texts(1600)[-1]), 0.99).ref == 1601
+        assert index.query(minhash.signature(ARTICLE), 0.7) is None
+
+    def test_arrays_grow_on_demand(self, monkeypatch):
+        """条目数组按写入的条数扩容，不预先按 capacity 分配"""
+        monkeypatch.setattr(minhash, "INITIAL_SLOTS", 16)
+        index = minhash.MinHashIndex(capacity=100_000)
+        assert index._bits.shape[0] == 16
+        for ref, text in enumerate(texts(40)):
+            index.add(minhash.signature(text), ref)
+        assert index._bits.shape[0] == 64
+        assert index.query(minhash.signature(texts(40)[3]), 0.99).ref == 3
+
+    def test_snapshot_roundtrip(self, tmp_path):
+        path = str(tmp_path / "index.npz")
+        index = minhash.MinHashIndex(capacity=100)
+        for ref, text in enumerate(texts(150)):
+            index.add(minhash.signature(text), ref)
+        index.save(path, last_id=149)
+
+        restored = minhash.MinHashIndex(capacity=100)
+        assert restored.load(path) == {"last_id": 149}
+        assert len(restored) == 100
+        assert restored.query(minhash.signature(texts(150)[120]), 0.99).ref == 120
+        assert restored.query(minhash.signature(texts(150)[10]), 0.99) is None
+
+
+class TestNearDuplicateScreening:
+    """发布前的近似重复检查"""
+
+    def test_screen_matches_content_from_database(self, client, normal_user, db_session, monkeypatch):
+        from app.core.config import settings
+        from app.services import near_duplicates
+
+        headers = get_auth_header(normal_user["token"])
+        topic = client.post("/api/forum/topics", json={"title": "理财", "content": SPAM}, headers=headers).json()
+        client.post(f"/api/forum/topics/{topic['id']}/comments", json={"content": ARTICLE}, headers=headers)
+
+        assert near_duplicates.find(db_session, near_duplicates.topic_text("理财", SPAM_VARIANT))[:2] == ("topic", topic["id"])
+        assert near_duplicates.find(db_session, ARTICLE + "。")[0] == "comment"
+
+        # 默认只记录，reject 时拒绝
+        assert near_duplicates.screen(db_session, SPAM_VARIANT, 1) is False
+        monkeypatch.setattr(settings, "NEAR_DUPLICATE_ACTION", "reject")
+        assert near_duplicates.screen(db_session, near_duplicates.topic_text("理财", SPAM_VARIANT), 1) is True
+        assert near_duplicates.screen(db_session, "完全不同的一段内容，讨论周末去哪里爬山比较合适呢", 1) is False
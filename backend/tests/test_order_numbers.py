@@ -0,0 +1,134 @@
+# 订单号生成测试
+import multiprocessing
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.lib import snowflake
+from app.lib.snowflake import EPOCH_MS, MAX_SEQUENCE, LeaseExpired, Snowflake
+from app.models.models import Base, WorkerLease
+from app.services.order_numbers import OrderNumbers, format_order_no, parse_order_no
+from conftest import get_auth_header
+
+
+class FrozenClock:
+    def __init__(self, ms: int):
+        self.ms = ms
+
+    def __call__(self) -> int:
+        return self.ms
+
+
+class TestSnowflake:
+    """id 生成器"""
+
+    def test_monotonic_across_sequence_overflow_and_clock_rollback(self):
+        clock = FrozenClock(EPOCH_MS + 1000)
+        generator = Snowflake(3, clock=clock)
+        ids = [generator.next_id() for _ in range(MAX_SEQUENCE + 10)]
+        # 一毫秒内的序号用尽后借用下一毫秒
+        assert snowflake.parts(ids[MAX_SEQUENCE]) == (EPOCH_MS + 1000, 3, MAX_SEQUENCE)
+        assert snowflake.parts(ids[MAX_SEQUENCE + 1]) == (EPOCH_MS + 1001, 3, 0)
+
+        clock.ms -= 500
+        ids += [generator.next_id() for _ in range(10)]
+        assert ids == sorted(ids) and len(set(ids)) == len(ids)
+
+    def test_bounded_by_lease(self):
+        clock = FrozenClock(EPOCH_MS + 1000)
+        generator = Snowflake(0, not_before_ms=EPOCH_MS + 2000, valid_until_ms=EPOCH_MS + 3000, clock=clock)
+        # 不早于上一个持有者的租约到期时间
+        assert snowflake.parts(generator.next_id())[0] == EPOCH_MS + 2000
+        clock.ms = EPOCH_MS + 3000
+        with pytest.raises(LeaseExpired):
+            generator.next_id()
+        generator.extend(EPOCH_MS + 4000)
+        assert snowflake.parts(generator.next_id())[0] == EPOCH_MS + 3000
+
+    def test_order_no_format(self):
+        generator = Snowflake(5, clock=FrozenClock(snowflake.now_ms()))
+        first, second = format_order_no(generator.next_id()), format_order_no(generator.next_id())
+        assert first < second
+        prefix, date, encoded = first.split("-")
+        assert prefix == "ORD" and len(encoded) == 13
+        assert date == f"{snowflake.timestamp(snowflake.decode(encoded)):%Y%m%d}"
+        assert parse_order_no(second)[1:] == (5, 1)
+        # 人工抄写时的大小写与易混淆字符
+        assert snowflake.decode(encoded.lower().replace("1", "l").replace("0", "o")) == snowflake.decode(encoded)
+        with pytest.raises(ValueError):
+            parse_order_no("ORD-000000000000000000000000000001700000000000-ABC123")
+
+
+class TestLeases:
+    """worker id 租约"""
+
+    def test_claim_release_and_takeover(self, db_session):
+        first, second = OrderNumbers(60), OrderNumbers(60)
+        assert (first.start(db_session), second.start(db_session)) == (0, 1)
+        issued = [first.generate() for _ in range(100)]
+
+        # 正常关闭后立即被接手，接手者的订单号排在之前的订单号之后
+        first.stop(db_session)
+        # 释放的租约在最后一个时间戳的下一毫秒到期
+        time.sleep(0.01)
+        third = OrderNumbers(60)
+        assert third.start(db_session) == 0
+        assert third.generate() > issued[-1]
+
+        # 租约过期后被接手：原持有者续期失败，停止分配
+        db_session.query(WorkerLease).filter(WorkerLease.worker_id == 1).update({"expires_at": 0})
+        db_session.commit()
+        fourth = OrderNumbers(60)
+        assert fourth.start(db_session) == 1
+        second.renew(db_session)
+        assert second.worker_id != 1
+
+    def test_create_order(self, client, normal_user, db_session):
+        from app.services.order_numbers import order_numbers
+
+        # 启动时在测试数据库中领取 worker id
+        assert db_session.get(WorkerLease, order_numbers.worker_id) is not None
+        response = client.post(
+            "/api/services/orders",
+            json={"service_id": 1, "total_amount": 100, "description": "测试订单"},
+            headers=get_auth_header(normal_user["token"]),
+        )
+        assert parse_order_no(response.json()["order_no"])[1] == order_numbers.worker_id
+
+
+def _generate(url: str, count: int, queue) -> None:
+    engine = create_engine(url, connect_args={"timeout": 30})
+    with Session(engine) as db:
+        numbers = OrderNumbers(60)
+        numbers.start(db)
+        issued = [numbers.generate() for _ in range(count)]
+        numbers.stop(db)
+    queue.put((parse_order_no(issued[0])[1], issued))
+    engine.dispose()
+
+
+def test_unique_across_processes(tmp_path):
+    """多个进程（模拟 gunicorn worker 先后重启）同时生成，订单号不重复且各进程内递增"""
+    url = f"sqlite:///{tmp_path / 'leases.db'}"
+    Base.metadata.create_all(create_engine(url), tables=[WorkerLease.__table__])
+    context = multiprocessing.get_context("spawn")
+    count = 20000
+    issued = []
+    last_by_worker = {}
+    for _ in range(2):
+        queue = context.Queue()
+        processes = [context.Process(target=_generate, args=(url, count, queue)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        results = [queue.get(timeout=120) for _ in processes]
+        for process in processes:
+            process.join()
+        assert sorted(worker for worker, _ in results) == [0, 1, 2, 3]
+        for worker, numbers in results:
+            # 重启后接手同一 worker id 的进程接着之前的订单号递增
+            assert numbers == sorted(numbers) and numbers[0] > last_by_worker.get(worker, "")
+            last_by_worker[worker] = numbers[-1]
+            issued += numbers
+    assert len(set(issued)) == len(issued) == 2 * 4 * count
@@ -0,0 +1,61 @@
+# 项目技术栈标签测试
+from conftest import get_auth_header
+
+from app.models.models import Project, ProjectTag, Tag
+from app.services import project_tags
+
+
+def create_project(client, headers, slug, tech_stack):
+    response = client.post("/api/projects", json={
+        "name": slug, "slug": slug, "description": "简介", "tech_stack": tech_stack,
+    }, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def slugs(response):
+    return sorted(project["slug"] for project in response.json())
+
+
+class TestProjectTags:
+    """技术栈筛选与计数"""
+
+    def test_filter_and_facets(self, client, admin_user):
+        headers = get_auth_header(admin_user["token"])
+        create_project(client, headers, "api", ["FastAPI", "React", "react "])
+        create_project(client, headers, "web", ["react", "Next.js"])
+        create_project(client, headers, "cli", ["Python"])
+
+        # 同一项目内大小写、空白不同的写法合并为一个标签
+        facets = client.get("/api/projects/tech").json()
+        assert facets[0] == {"name": "React", "slug": "react", "count": 2}
+        assert {facet["slug"]: facet["count"] for facet in facets} == {
+            "react": 2, "fastapi": 1, "next.js": 1, "python": 1,
+        }
+
+        assert slugs(client.get("/api/projects", params={"tech": "REACT"})) == ["api", "web"]
+        assert slugs(client.get("/api/projects", params={"tech": ["react", "fastapi"]})) == ["api"]
+        assert slugs(client.get("/api/projects", params={"tech": ["fastapi", "python"], "match": "any"})) == ["api", "cli"]
+        assert slugs(client.get("/api/projects", params={"tech": ["react", "python"]})) == []
+
+    def test_counts_follow_updates_and_deletes(self, client, admin_user, db_session):
+        headers = get_auth_header(admin_user["token"])
+        create_project(client, headers, "api", ["FastAPI", "React"])
+        create_project(client, headers, "web", ["React"])
+
+        client.put("/api/projects/api", json={"tech_stack": ["FastAPI", "Vue"]}, headers=headers)
+        assert {facet["slug"]: facet["count"] for facet in client.get("/api/projects/tech").json()} == {
+            "react": 1, "fastapi": 1, "vue": 1,
+        }
+        client.delete("/api/projects/web", headers=headers)
+        assert {facet["slug"] for facet in client.get("/api/projects/tech").json()} == {"fastapi", "vue"}
+
+        # 直接写入数据库的项目由回填补齐，并校准计数
+        db_session.add(Project(name="旧项目", slug="legacy", description="简介", tech_stack=["vue"], author_id=1))
+        db_session.query(Tag).filter(Tag.slug == "fastapi").update({"project_count": 5})
+        db_session.commit()
+        assert project_tags.backfill(db_session) == 2
+        assert {facet["slug"]: facet["count"] for facet in client.get("/api/projects/tech").json()} == {
+            "fastapi": 1, "vue": 2,
+        }
+        assert db_session.query(ProjectTag).count() == 3
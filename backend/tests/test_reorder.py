@@ -0,0 +1,115 @@
+# 批量排序测试
+import pytest
+from sqlalchemy import event
+
+from app.models.models import Portfolio, Project, SearchChange, Service
+from app.services import reordering
+from app.services.reordering import RANK_GAP, plan
+from conftest import get_auth_header
+
+
+class TestPlan:
+    """稀疏排名"""
+
+    def test_single_move_touches_one_row(self):
+        ranks = [RANK_GAP * (i + 1) for i in range(200)]
+        moved = ranks[:50] + ranks[51:120] + [ranks[50]] + ranks[120:]
+        result, rebalanced = plan(moved)
+        assert not rebalanced
+        assert result == sorted(result) and len(set(result)) == len(result)
+        assert sum(old != new for old, new in zip(moved, result)) == 1
+
+    def test_move_to_ends(self):
+        ranks = [RANK_GAP, RANK_GAP * 2, RANK_GAP * 3]
+        assert plan([ranks[2], ranks[0], ranks[1]]) == ([RANK_GAP // 2 - 1, RANK_GAP, RANK_GAP * 2], False)
+        assert plan([ranks[1], ranks[2], ranks[0]]) == ([RANK_GAP * 2, RANK_GAP * 3, RANK_GAP * 4], False)
+
+    def test_rebalance_when_gap_exhausted(self):
+        # 默认排序值均为 0（旧数据）
+        assert plan([0, 0, 0]) == ([RANK_GAP, RANK_GAP * 2, RANK_GAP * 3], True)
+        assert plan([1, 0, 2]) == ([RANK_GAP, RANK_GAP * 2, RANK_GAP * 3], True)
+
+    def test_repeated_moves_stay_sorted(self):
+        ranks = [RANK_GAP * (i + 1) for i in range(10)]
+        for _ in range(30):
+            # 反复把最后一项拖到第二位
+            order = [ranks[0], ranks[-1], *ranks[1:-1]]
+            ranks, _ = plan(order)
+            assert ranks == sorted(ranks) and len(set(ranks)) == len(ranks) and ranks[0] >= 0
+
+
+class TestReorderApi:
+    """排序接口"""
+
+    def test_reorder_portfolio(self, client, admin_user, db_session):
+        items = [Portfolio(title=f"作品{i}", category="design", description="", sort_order=0) for i in range(5)]
+        db_session.add_all(items)
+        db_session.commit()
+        ids = [item.id for item in items]
+        headers = get_auth_header(admin_user["token"])
+
+        new_order = [ids[3], ids[0], ids[4], ids[1], ids[2]]
+        response = client.put("/api/portfolio/order", json={"ids": new_order}, headers=headers)
+        assert response.json() == {"updated": 5, "rebalanced": True}
+        assert [item["id"] for item in client.get("/api/portfolio").json()] == new_order
+
+        # 之后拖动一项只改写一行，且只执行一条 UPDATE
+        statements = []
+        engine = db_session.get_bind()
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            moved = [new_order[1], new_order[0], *new_order[2:]]
+            response = client.put("/api/portfolio/order", json={"ids": moved}, headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert response.json() == {"updated": 1, "rebalanced": False}
+        assert sum(statement.startswith("UPDATE portfolio") for statement in statements) == 1
+        assert [item["id"] for item in client.get("/api/portfolio").json()] == moved
+
+    def test_reorder_services_after_delete(self, client, admin_user, db_session):
+        services = [
+            Service(name=f"服务{i}", slug=f"s{i}", description="简介", price_type="fixed", features=[], active=True)
+            for i in range(3)
+        ]
+        db_session.add_all(services)
+        db_session.commit()
+        ids = [service.id for service in services]
+        headers = get_auth_header(admin_user["token"])
+
+        # 删除（下架）后，管理端只提交仍上架的服务
+        client.delete("/api/services/s1", headers=headers)
+        response = client.put("/api/services/order", json={"ids": [ids[2], ids[0]]}, headers=headers)
+        assert response.json()["updated"] >= 1
+        assert [item["id"] for item in client.get("/api/services").json()] == [ids[2], ids[0]]
+
+    def test_changes_recorded(self, db_session):
+        projects = [
+            Project(name=f"项目{i}", slug=f"p{i}", description="简介", tech_stack=[], author_id=1,
+                    sort_order=RANK_GAP * (i + 1))
+            for i in range(3)
+        ]
+        db_session.add_all(projects)
+        db_session.commit()
+        before = db_session.query(SearchChange).count()
+
+        ids = [projects[1].id, projects[0].id, projects[2].id]
+        assert reordering.reorder(db_session, Project, "project", ids) == {"updated": 1, "rebalanced": False}
+        db_session.commit()
+        # 只有被改写的行进入变更日志（首页缓存据此失效）
+        changes = db_session.query(SearchChange).order_by(SearchChange.id).all()[before:]
+        assert [change.doc_type for change in changes] == ["project"]
+        assert changes[0].doc_id in (projects[0].id, projects[1].id)
+        db_session.expire_all()
+        assert [p.id for p in db_session.query(Project).order_by(Project.sort_order)] == ids
+
+    def test_stale_list_rejected(self, db_session):
+        db_session.add_all([Portfolio(title="a", category="design"), Portfolio(title="b", category="design")])
+        db_session.commit()
+        ids = [item.id for item in db_session.query(Portfolio)]
+        for stale in (ids[:1], [*ids, 999], [ids[0], ids[0]]):
+            with pytest.raises(ValueError):
+                reordering.reorder(db_session, Portfolio, "portfolio", stale)
@@ -0,0 +1,166 @@
+# 站内统一搜索测试
+from conftest import get_auth_header
+
+from app.models.models import Portfolio, Post, Project, SearchChange, Service, Topic
+from app.services import site_search
+
+
+def add_samples(db):
+    db.add_all([
+        Post(title="向量数据库入门", slug="vector-db", content="介绍向量检索的基本原理", published=True),
+        Post(title="向量数据库草稿", slug="vector-draft", content="尚未发布", published=False),
+        Project(name="检索服务", slug="search-svc", description="基于向量数据库的语义检索", tech_stack=["FastAPI", "NumPy"]),
+        Portfolio(title="数据可视化", category="向量图形", description="一组向量插画"),
+        Service(name="检索咨询", slug="consult", description="向量数据库选型", features=["方案设计"], active=False),
+    ])
+    db.commit()
+
+
+class TestSiteSearch:
+    """统一搜索端点"""
+
+    def test_search_across_types_with_facets(self, client, normal_user, db_session):
+        add_samples(db_session)
+        headers = get_auth_header(normal_user["token"])
+        topic = client.post(
+            "/api/forum/topics", json={"title": "求推荐向量数据库", "content": "团队准备做语义检索"}, headers=headers
+        ).json()
+        client.post(f"/api/forum/topics/{topic['id']}/comments", json={"content": "可以试试向量数据库 Milvus"}, headers=headers)
+
+        data = client.get("/api/search", params={"q": "向量数据库"}).json()
+        # 未发布的文章、停用的服务不在结果中
+        assert data["facets"] == {"post": 1, "topic": 1, "comment": 1, "project": 1}
+        assert data["total"] == 4
+        # 标题命中排在前面
+        assert {hit["type"] for hit in data["results"][:2]} == {"post", "topic"}
+        post = next(hit for hit in data["results"] if hit["type"] == "post")
+        assert post["slug"] == "vector-db" and "向量" in post["snippet"]
+        comment = next(hit for hit in data["results"] if hit["type"] == "comment")
+        assert comment["topic_id"] == topic["id"]
+
+        # 类型筛选不影响分面统计；技术栈、分类字段可搜索
+        data = client.get("/api/search", params={"q": "向量数据库", "type": "topic"}).json()
+        assert data["total"] == 1 and data["results"][0]["id"] == topic["id"]
+        assert data["facets"]["post"] == 1
+        assert client.get("/api/search", params={"q": "numpy"}).json()["facets"] == {"project": 1}
+        assert client.get("/api/search", params={"q": "向量图形"}).json()["results"][0]["type"] == "portfolio"
+        assert client.get("/api/search", params={"q": "不存在的词"}).json()["total"] == 0
+
+    def test_single_cjk_character(self, client, db_session):
+        add_samples(db_session)
+        # 单字命中多字词中的任意位置（含词尾）
+        assert client.get("/api/search", params={"q": "库"}).json()["facets"] == {"post": 1, "project": 1}
+        assert client.get("/api/search", params={"q": "画"}).json()["facets"] == {"portfolio": 1}
+
+    def test_updates_and_deletes_are_reflected(self, client, admin_user, db_session):
+        add_samples(db_session)
+        assert client.get("/api/search", params={"q": "向量", "type": "post"}).json()["total"] == 1
+
+        draft = db_session.query(Post).filter(Post.slug == "vector-draft").one()
+        draft.published = True
+        db_session.query(Project).one().name = "语义引擎"
+        db_session.delete(db_session.query(Portfolio).one())
+        db_session.commit()
+
+        assert client.get("/api/search", params={"q": "向量", "type": "post"}).json()["total"] == 2
+        assert client.get("/api/search", params={"q": "语义引擎"}).json()["facets"] == {"project": 1}
+        assert client.get("/api/search", params={"q": "向量图形"}).json()["total"] == 0
+
+        # 批量删除（绕过 ORM）同样生效
+        headers = get_auth_header(admin_user["token"])
+        topic = client.post("/api/forum/topics", json={"title": "灌水", "content": "刷屏广告内容"}, headers=headers).json()
+        client.post(f"/api/forum/topics/{topic['id']}/comments", json={"content": "广告回复"}, headers=headers)
+        assert client.get("/api/search", params={"q": "广告"}).json()["total"] == 2
+        client.post("/api/forum/admin/topics/bulk-delete", json={"ids": [topic["id"]]}, headers=headers)
+        assert client.get("/api/search", params={"q": "广告"}).json()["total"] == 0
+
+    def test_rebuilt_segment_with_delta(self, db_session, tmp_path):
+        add_samples(db_session)
+        worker = site_search.SiteSearch(str(tmp_path))
+        assert worker.maintain(db_session, max_pending=1000) == 3
+
+        def search(index, query):
+            hits, total, _ = index.search(db_session, query, None, 0, 10)
+            return {(kind, doc_id) for kind, doc_id, _ in hits}
+
+        # 段生成之后的修改、删除与新增
+        post = db_session.query(Post).filter(Post.slug == "vector-db").one()
+        post.title = "嵌入模型入门"
+        post.content = "介绍嵌入模型"
+        db_session.delete(db_session.query(Portfolio).one())
+        db_session.add(Topic(title="向量检索性能", content="索引如何选型", author_id=1))
+        db_session.commit()
+        topic_id = db_session.query(Topic.id).scalar()
+
+        # 另一个 worker 打开同一个段并补读变更
+        other = site_search.SiteSearch(str(tmp_path))
+        for index in (worker, other):
+            assert search(index, "向量") == {("project", 1), ("topic", topic_id)}
+            assert search(index, "嵌入模型") == {("post", post.id)}
+        assert worker.maintain(db_session, max_pending=1000) is None
+
+        # 重建后切换到新段，并清理上一代段之前的变更日志
+        assert worker.rebuild(db_session) == 3
+        assert worker.rebuild(db_session) == 3
+        assert db_session.query(SearchChange).count() == 1
+        assert search(other, "向量") == {("project", 1), ("topic", topic_id)}
+        assert len(other.memory) == 0
+        assert len([name for name in tmp_path.iterdir() if name.name.startswith("gen-")]) == 2
+
+
+class TestSuggest:
+    """输入联想"""
+
+    def test_prefix_suggestions(self, client, db_session):
+        db_session.add_all([
+            Post(title="从零开始 React 实战", slug="react", content="...", published=True),
+            Post(title="Rust 草稿", slug="rust", content="...", published=False),
+            Project(name="Realtime Dashboard", slug="dash", description="", tech_stack=["React", "FastAPI"], featured=True),
+            Project(name="博客系统", slug="blog", description="", tech_stack=["react", "Redis"]),
+            Portfolio(title="海报", category="design", description=""),
+        ])
+        db_session.commit()
+
+        items = client.get("/api/suggest", params={"q": "re"}).json()
+        # 技术栈按使用次数计权，大小写合并；标题中的单词也可作为开头
+        assert items[0] == {"type": "tech", "text": "React", "id": None, "slug": None, "count": 2}
+        assert {(item["type"], item["text"]) for item in items} == {
+            ("tech", "React"), ("tech", "Redis"), ("project", "Realtime Dashboard"), ("post", "从零开始 React 实战"),
+        }
+        assert client.get("/api/suggest", params={"q": "从零"}).json()[0]["slug"] == "react"
+        assert client.get("/api/suggest", params={"q": "ＲＵＳＴ"}).json() == []
+        assert client.get("/api/suggest", params={"q": "des"}).json()[0]["count"] == 1
+        assert len(client.get("/api/suggest", params={"q": "r", "limit": 2}).json()) == 2
+
+    def test_top_weights_beyond_lexical_order(self):
+        from app.lib.prefix_index import Entry, PrefixIndex
+
+        index = PrefixIndex()
+        # 按字典序排在后面的条目权重更高
+        index.load([Entry(ref=i, text=f"a{i:04d}", weight=i) for i in range(1000)])
+        assert [entry.ref for entry in index.query("a", 3)] == [999, 998, 997]
+        assert [entry.ref for entry in index.query("a0", 2)] == [999, 998]
+        assert [entry.ref for entry in index.query("a05", 2)] == [599, 598]
+        # 缓存的短前缀结果随增删更新
+        index.add(Entry(ref="new", text="a-new", weight=5000))
+        assert index.query("a", 1)[0].ref == "new"
+        index.remove("new")
+        index.remove(999)
+        assert [entry.ref for entry in index.query("a", 2)] == [998, 997]
+
+    def test_incremental_updates(self, client, db_session):
+        project = Project(name="Realtime Dashboard", slug="dash", description="", tech_stack=["React"])
+        db_session.add_all([project, Portfolio(title="海报", category="design", description="")])
+        db_session.commit()
+        assert [item["text"] for item in client.get("/api/suggest", params={"q": "rea"}).json()] == ["React", "Realtime Dashboard"]
+
+        project.name = "Live Dashboard"
+        project.tech_stack = ["Vue"]
+        db_session.delete(db_session.query(Portfolio).one())
+        db_session.add(Post(title="React Hooks 入门", slug="hooks", content="...", published=True))
+        db_session.commit()
+
+        assert [item["type"] for item in client.get("/api/suggest", params={"q": "rea"}).json()] == ["post"]
+        assert client.get("/api/suggest", params={"q": "vue"}).json()[0]["count"] == 1
+        assert client.get("/api/suggest", params={"q": "dash"}).json()[0]["text"] == "Live Dashboard"
+        assert client.get("/api/suggest", params={"q": "design"}).json() == []